@@ -0,0 +1,61 @@
+import time
+import argparse
+import multiprocessing
+
+from pro import run_productor, TAMANO_BLOQUE
+from consumidor import lanzar_worker
+from dashboard import run_dashboard
+from protocolo import FORMATOS
+from transporte import BrokerLocal
+
+# Banco de pruebas: corre productor, consumidores y dashboard de consola en un solo equipo.
+# Con --transporte local no necesita RabbitMQ; con --transporte rabbit corre la misma
+# carga sobre el broker para medir su costo contra el transporte local.
+
+SIMULACIONES = 100000
+
+def run_banco(simulaciones=SIMULACIONES, bloque=TAMANO_BLOQUE, workers=2, transporte='local', formato='json', semilla=None,
+              registro=None):
+    broker = BrokerLocal() if transporte == 'local' else None
+
+    # Consumidores y dashboard reciben el modelo que publica el productor
+    opciones = {'registro': registro} if registro else None
+    consumidores = [lanzar_worker(i, opciones, broker=broker) for i in range(workers)]
+    inicio = time.perf_counter()
+    productor = multiprocessing.Process(
+        target=run_productor,
+        kwargs=dict(simulaciones=simulaciones, bloque=bloque, semilla=semilla,
+                    formato=FORMATOS[formato], broker=broker),
+        name='productor',
+    )
+    productor.start()
+    try:
+        dashboard = run_dashboard(total=simulaciones, use_gui=False, broker=broker, usar_cache=False)
+        duracion = time.perf_counter() - inicio
+    finally:
+        productor.join(timeout=5)
+        for proceso in consumidores + [productor]:
+            if proceso.is_alive():
+                proceso.terminate()
+            proceso.join()
+
+    procesadas = dashboard.total_processed if dashboard is not None else 0
+    tasa = procesadas / duracion if duracion > 0 else 0.0
+    print(f"\nBanco ({transporte}, {workers} workers, bloque {bloque}, {formato}): "
+          f"{procesadas} simulaciones en {duracion:.2f}s -> {tasa:.0f} sims/s")
+    return tasa
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Banco de pruebas del pipeline completo en un solo equipo')
+    parser.add_argument('-n', '--simulaciones', type=int, default=SIMULACIONES)
+    parser.add_argument('-b', '--bloque', type=int, default=TAMANO_BLOQUE)
+    parser.add_argument('-w', '--workers', type=int, default=2)
+    parser.add_argument('--transporte', choices=('local', 'rabbit'), default='local',
+                        help='local: colas de multiprocessing sin broker; rabbit: RabbitMQ en localhost')
+    parser.add_argument('--formato', choices=sorted(FORMATOS), default='json')
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--registro', default=None, metavar='DIR',
+                        help='los consumidores escriben sus partidas en registros binarios dentro de DIR')
+    args = parser.parse_args()
+    run_banco(args.simulaciones, args.bloque, max(1, args.workers), args.transporte, args.formato, args.semilla,
+              args.registro)
@@ -0,0 +1,190 @@
+import io
+import sys
+import json
+import random
+import timeit
+import argparse
+import statistics
+import platform
+import contextlib
+
+from deck import (Baraja, _HAS_NUMPY, get_valor_carta, calcular_mano, compilar_baraja, _plantilla_baraja,
+                  simulate_blackjack, simular_conteos, rng_escenario)
+from consumidor import procesar_escenario
+from protocolo import CONTENT_TYPE_JSON, CONTENT_TYPE_BINARIO, codificar, decodificar
+from estadistica import registro_parcial, fusionar_parcial, compactar_rangos
+
+# Microbenchmarks de las rutas calientes; no necesitan RabbitMQ.
+# Cada caso se mide con timeit y se reporta la mediana del tiempo por llamada de REPETICIONES
+# corridas. Junto a cada caso se mide un caso de referencia en Python puro que ningun cambio
+# del proyecto toca; la comparacion contra la base usa el tiempo relativo a esa referencia,
+# asi que la velocidad del equipo (o su carga en ese momento) se cancela.
+
+RUTA_BASE = 'benchmark_base.json'
+REPETICIONES = 15
+DIVISOR_LLAMADAS = 10 # Cada repeticion dura ~20 ms (autorange calibra a 0.2 s)
+TOLERANCIA = 0.25 # Una regresion es un caso mas de 25% lento que la base (en tiempo relativo)
+SEMILLA = 12345
+
+def _referencia():
+    # Trabajo fijo del interprete: aritmetica, un dict y una lista
+    cuenta = {}
+    for i in range(200):
+        cuenta[i & 7] = cuenta.get(i & 7, 0) + i * i
+    return sorted(cuenta.values())
+
+def _casos():
+    """Regresa {nombre: funcion sin argumentos} con todos los casos a medir."""
+    config = Baraja().config
+    items = tuple(config.items())
+    rng = random.Random(SEMILLA)
+    rng_lote = rng_escenario(SEMILLA, 0)
+    mano = ['A', '7', '5', 'K']
+
+    escenario = json.dumps({'sim_id': 1, 'semilla': SEMILLA}).encode('utf-8')
+    escenario_bloque = json.dumps({'sim_range': [1, 100], 'semilla': SEMILLA}).encode('utf-8')
+    bloque = {'sim_range': [1, 100], 'counts': {'VICTORIA': 40, 'DERROTA': 50, 'EMPATE': 10},
+              'suma_jugador': 1950, 'pasados': 28, 'semilla': SEMILLA}
+    # Lo que publica un consumidor: un registro parcial con los bloques de una ventana (ACK_CADA)
+    resultado = registro_parcial(bloque)
+    for b in range(50):
+        fusionar_parcial(resultado, dict(bloque, sim_range=[1 + b * 100, (b + 1) * 100]))
+    resultado['rangos'] = compactar_rangos(resultado['rangos'])
+    resultado_json, _ = codificar(resultado, CONTENT_TYPE_JSON)
+    resultado_bin, tipo_bin = codificar(resultado, CONTENT_TYPE_BINARIO)
+    assert tipo_bin == CONTENT_TYPE_BINARIO
+
+    # El dashboard de consola escribe en stdout; la barra de progreso se omite para medir solo update_stats
+    from dashboard import Dashboard
+    with contextlib.redirect_stderr(io.StringIO()):
+        dashboard = Dashboard(total=10**12)
+    dashboard.bar.close()
+    dashboard.bar = None
+    contador = iter(range(1, 10**12, 5000))
+
+    def update_stats():
+        inicio = next(contador)
+        with contextlib.redirect_stdout(io.StringIO()):
+            dashboard.update_stats(dict(resultado, rangos=[[inicio, inicio + 4999]]))
+
+    casos = {
+        'get_valor_carta': lambda: get_valor_carta('K'),
+        'calcular_mano': lambda: calcular_mano(mano),
+        'construir_baraja': lambda: _plantilla_baraja.__wrapped__(items),
+        'compilar_baraja_cache': lambda: compilar_baraja(config),
+        'simulate_blackjack': lambda: simulate_blackjack(config, rng),
+        'simular_conteos_100': lambda: simular_conteos(config, 100, rng_lote),
+        'json_codificar_escenario': lambda: codificar({'sim_range': [1, 100], 'semilla': SEMILLA}),
+        'json_decodificar_escenario': lambda: decodificar(escenario_bloque, CONTENT_TYPE_JSON),
+        'json_codificar_resultado': lambda: codificar(resultado, CONTENT_TYPE_JSON),
+        'json_decodificar_resultado': lambda: decodificar(resultado_json, CONTENT_TYPE_JSON),
+        'binario_codificar_resultado': lambda: codificar(resultado, CONTENT_TYPE_BINARIO),
+        'binario_decodificar_resultado': lambda: decodificar(resultado_bin, CONTENT_TYPE_BINARIO),
+        'procesar_escenario': lambda: procesar_escenario(escenario, config, CONTENT_TYPE_JSON),
+        'procesar_escenario_bloque_100': lambda: procesar_escenario(escenario_bloque, config, CONTENT_TYPE_JSON),
+        'dashboard_update_stats': update_stats,
+    }
+    return casos
+
+def _llamadas(timer):
+    numero, _ = timer.autorange()
+    return max(1, numero // DIVISOR_LLAMADAS)
+
+def medir_relativo(funcion, repeticiones=REPETICIONES, numero_ref=None):
+    """Regresa (ns por llamada, razon contra _referencia) alternando caso y referencia.
+
+    Cada repeticion mide el caso y la referencia uno tras otro, de modo que ambos ven la
+    misma carga del equipo; la razon es la mediana de las razones por repeticion.
+    """
+    caso, referencia = timeit.Timer(funcion), timeit.Timer(_referencia)
+    numero = _llamadas(caso)
+    if numero_ref is None:
+        numero_ref = _llamadas(referencia)
+    tiempos, razones = [], []
+    for _ in range(repeticiones):
+        t = caso.timeit(numero) / numero
+        t_ref = referencia.timeit(numero_ref) / numero_ref
+        tiempos.append(t)
+        razones.append(t / t_ref)
+    return statistics.median(tiempos) * 1e9, statistics.median(razones)
+
+def run_benchmarks(filtro=None, repeticiones=REPETICIONES):
+    resultados = {}
+    numero_ref = _llamadas(timeit.Timer(_referencia))
+    for nombre, funcion in _casos().items():
+        if filtro and filtro not in nombre:
+            continue
+        ns, relativo = medir_relativo(funcion, repeticiones, numero_ref)
+        resultados[nombre] = {'ns_por_llamada': round(ns, 1), 'relativo': round(relativo, 4)}
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'numpy': _HAS_NUMPY,
+        },
+        'resultados': resultados,
+    }
+
+def comparar(actual, base):
+    """Regresa (nombre, base_ns, actual_ns, razon) de cada caso presente en ambas corridas.
+
+    La razon es la de los tiempos relativos a la referencia; solo si la base no los trae
+    se comparan los tiempos absolutos.
+    """
+    filas = []
+    for nombre, medida in actual['resultados'].items():
+        previo = base['resultados'].get(nombre)
+        if previo is None:
+            continue
+        if 'relativo' in previo and 'relativo' in medida:
+            razon = medida['relativo'] / previo['relativo']
+        else:
+            razon = medida['ns_por_llamada'] / previo['ns_por_llamada']
+        filas.append((nombre, previo['ns_por_llamada'], medida['ns_por_llamada'], razon))
+    return filas
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Microbenchmarks de deck, consumidor y dashboard')
+    parser.add_argument('-k', '--filtro', default=None, help='solo corre los casos cuyo nombre contiene el texto')
+    parser.add_argument('-r', '--repeticiones', type=int, default=REPETICIONES)
+    parser.add_argument('-o', '--salida', default=None, help='escribe el resultado JSON en este archivo')
+    parser.add_argument('--base', default=RUTA_BASE, help='archivo de base para comparar')
+    parser.add_argument('--guardar', action='store_true', help='guarda esta corrida como la nueva base')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help='fraccion de lentitud permitida antes de marcar regresion')
+    parser.add_argument('--estricto', action='store_true',
+                        help='termina con codigo 1 si hay regresiones (para CI en un equipo dedicado)')
+    args = parser.parse_args()
+
+    actual = run_benchmarks(args.filtro, args.repeticiones)
+    salida = json.dumps(actual, indent=2, sort_keys=True)
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            f.write(salida + '\n')
+    if args.guardar:
+        with open(args.base, 'w') as f:
+            f.write(salida + '\n')
+        print(f"Base guardada en {args.base}")
+
+    try:
+        with open(args.base) as f:
+            base = json.load(f)
+    except FileNotFoundError:
+        print(salida)
+        sys.exit(0)
+
+    regresiones = 0
+    # Razon: tiempo relativo a la referencia contra el de la base (los ns solo son informativos)
+    print(f"{'Caso':<32} {'Base ns':>12} {'Actual ns':>12} {'Razon':>7}")
+    for nombre, base_ns, actual_ns, razon in comparar(actual, base):
+        marca = ''
+        if razon > 1 + args.tolerancia:
+            marca = '  REGRESION'
+            regresiones += 1
+        print(f"{nombre:<32} {base_ns:>12.1f} {actual_ns:>12.1f} {razon:>7.2f}{marca}")
+
+    if regresiones:
+        print(f"{regresiones} caso(s) mas lentos que la base por encima de {args.tolerancia:.0%}")
+        if args.estricto:
+            sys.exit(1)
@@ -0,0 +1,69 @@
+import os
+import json
+import sqlite3
+import time
+
+from deck import clave_config
+
+# Totales acumulados por configuracion de baraja entre ejecuciones.
+# La clave es el hash canonico de la configuracion (deck.clave_config).
+# Solo el dashboard escribe la cache y el productor la lee con --hasta, asi que ambos deben
+# abrir el mismo archivo: por defecto esta junto a este modulo (no en el directorio de
+# trabajo) y la variable de entorno BLACKJACK_CACHE lo cambia, por ejemplo a un disco compartido.
+
+VARIABLE_CACHE = 'BLACKJACK_CACHE'
+RUTA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados_cache.sqlite3')
+
+def ruta_cache():
+    """Ruta de la cache: BLACKJACK_CACHE si esta definida, si no RUTA_CACHE."""
+    return os.environ.get(VARIABLE_CACHE) or RUTA_CACHE
+
+class CacheResultados:
+    """Almacen en disco (SQLite) de conteos acumulados por configuracion de baraja."""
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta = ruta or ruta_cache()
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute(
+            """CREATE TABLE IF NOT EXISTS totales (
+                clave TEXT PRIMARY KEY,
+                config TEXT NOT NULL,
+                victorias INTEGER NOT NULL DEFAULT 0,
+                derrotas INTEGER NOT NULL DEFAULT 0,
+                empates INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                actualizado REAL
+            )"""
+        )
+        self.conexion.commit()
+
+    def obtener(self, baraja_config):
+        """Regresa los totales acumulados de la configuracion (ceros si no hay registro)."""
+        fila = self.conexion.execute(
+            'SELECT victorias, derrotas, empates, total FROM totales WHERE clave = ?',
+            (clave_config(baraja_config),)
+        ).fetchone()
+        if fila is None:
+            fila = (0, 0, 0, 0)
+        return dict(zip(('VICTORIA', 'DERROTA', 'EMPATE', 'total'), fila))
+
+    def acumular(self, baraja_config, victorias, derrotas, empates, total):
+        """Suma los conteos de una ejecucion a los totales de la configuracion."""
+        if total <= 0:
+            return
+        with self.conexion:
+            self.conexion.execute(
+                """INSERT INTO totales (clave, config, victorias, derrotas, empates, total, actualizado)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(clave) DO UPDATE SET
+                       victorias = victorias + excluded.victorias,
+                       derrotas = derrotas + excluded.derrotas,
+                       empates = empates + excluded.empates,
+                       total = total + excluded.total,
+                       actualizado = excluded.actualizado""",
+                (clave_config(baraja_config), json.dumps(baraja_config, sort_keys=True),
+                 victorias, derrotas, empates, total, time.time())
+            )
+
+    def close(self):
+        self.conexion.close()
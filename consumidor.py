@@ -2,52 +2,395 @@ import json
 import time
 import os
 import sys
-import pika
-# Soportar ausencia de pika
-try:
-    import pika
-    _HAS_PIKA = True
-except Exception:
-    _HAS_PIKA = False
+import argparse
+import multiprocessing
+import socket
+from collections import deque, OrderedDict
 
 # Importar la lógica centralizada del modelo
-from deck import Baraja, simulate_blackjack
+from deck import (Baraja, simulate_blackjack, simular_conteos, simular_zapato, rng_escenario, compilar_baraja, clave_config,
+                  MUESTREOS, PENETRACION)
+from estrategias import ESTRATEGIAS, compilar_estrategias, simular_estrategias
+from protocolo import CONTENT_TYPE_JSON, codificar, decodificar
+from estadistica import percentil, registro_parcial, fusionar_parcial, compactar_rangos
+from transporte import conectar, _HAS_PIKA # Soportar ausencia de pika
+from registro import RegistrosPorConfig
+from modelo import SuscripcionModelo, ultimo_modelo, ESPERA_MODELO, ESPERA_MODELO_MAX, ESPERA_VERSION
+
+ESPERA_SUPERVISOR = 1 # Segundos entre revisiones del pool de workers
+REINICIO_MAX = 60     # Segundos maximos de espera antes de reiniciar un worker que fallo
+VIDA_MINIMA = 30      # Un worker que muere antes de estos segundos cuenta como arranque fallido
+FALLOS_MAX = 6        # Arranques fallidos seguidos antes de dejar de reiniciar un worker
+PREFETCH = 100        # Entregas sin confirmar que el broker envia por adelantado
+ACK_CADA = 50         # Mensajes por ventana de confirmacion
+ACK_MS = 200          # Duracion maxima de una ventana de confirmacion (ms)
+EXCHANGE_RESULTADOS = 'resultados.fanout' # Fanout para que dashboard y productor vean los resultados
+EXCHANGE_ESTADISTICAS = 'estadisticas.fanout' # Latidos de telemetria de cada worker
+INTERVALO_TELEMETRIA = 2.0 # Segundos entre latidos
+MUESTRAS_LATENCIA = 10000 # Latencias que se guardan por intervalo para p50/p99
+MAZOS_EN_CACHE = 32 # Barajas compiladas por worker en un barrido (LRU por hash de configuracion)
 
 # --- Lógica del Consumidor ---
 
-def callback_escenario(ch, method, properties, body, baraja_config):
-    """Callback que procesa un escenario y publica el resultado."""
-    try:
-        if isinstance(body, bytes):
-            body = body.decode('utf-8')
-        scenario_data = json.loads(body)
+def procesar_escenario(body, baraja_config, content_type=None):
+    """Decodifica un escenario, ejecuta el modelo y regresa el resultado como dict."""
+    return ejecutar_escenario(decodificar(body, content_type), baraja_config)
+
+def ejecutar_escenario(scenario_data, baraja_config, estrategias=None, muestreo='simple', zapato=None, partidas=None):
+    """Ejecuta un escenario ya decodificado.
+
+    Si el escenario trae 'semilla', el flujo aleatorio se deriva de (semilla, primer sim_id),
+    de modo que volver a procesarlo (redelivery o replay) da exactamente el mismo resultado.
+    Con `estrategias` (tablas compiladas) cada estrategia juega las mismas barajas; 'counts'
+    es el de la primera y 'estrategias'/'diferencias' traen el detalle de todas.
+    `muestreo` (deck.MUESTREOS) decide como se barajan las partidas de un bloque y con
+    `zapato` ({'mazos', 'penetracion'}) el bloque se juega en rondas seguidas desde un zapato.
+    El resultado trae tambien 'suma_jugador' y 'pasados' (ver deck.anotar_detalle); si se
+    pasa la lista `partidas`, se le agrega el detalle de cada partida para el registro binario.
+    """
+    semilla = scenario_data.get('semilla')
+    detalle = {'suma_jugador': 0, 'pasados': 0}
+    if partidas is not None:
+        detalle['partidas'] = partidas
+    if zapato:
+        # Cada bloque empieza con un zapato nuevo, asi que sigue siendo reproducible por si solo
+        inicio, fin = scenario_data['sim_range'] if 'sim_range' in scenario_data else (scenario_data['sim_id'],) * 2
+        rng = None if semilla is None else rng_escenario(semilla, inicio)
+        counts = simular_zapato(baraja_config, fin - inicio + 1, rng, **zapato, detalle=detalle)
+        resultado = {'sim_range': [inicio, fin], 'counts': counts}
+    elif estrategias:
+        inicio, fin = scenario_data['sim_range'] if 'sim_range' in scenario_data else (scenario_data['sim_id'],) * 2
+        rng = None if semilla is None else rng_escenario(semilla, inicio)
+        conteos, diferencias = simular_estrategias(baraja_config, fin - inicio + 1, estrategias, rng, muestreo, detalle)
+        resultado = {'sim_range': [inicio, fin], 'counts': next(iter(conteos.values())),
+                     'estrategias': conteos, 'diferencias': diferencias}
+    elif 'sim_range' in scenario_data:
+        # Bloque de escenarios: se simula todo el rango y se regresa un solo conteo
+        inicio, fin = scenario_data['sim_range']
+        rng = None if semilla is None else rng_escenario(semilla, inicio)
+        counts = simular_conteos(baraja_config, fin - inicio + 1, rng, muestreo, detalle)
+        resultado = {'sim_range': [inicio, fin], 'counts': counts}
+    else:
         sim_id = scenario_data['sim_id']
-        
+        rng = None if semilla is None else rng_escenario(semilla, sim_id)
+
         # Ejecutar el modelo importado
-        result = simulate_blackjack(baraja_config)
-        
-        # Publicar resultado
-        result_message = json.dumps({'sim_id': sim_id, 'result': result})
-        ch.basic_publish(
-            exchange='',
-            routing_key='resultados',
-            body=result_message,
-            properties=pika.BasicProperties(
-                delivery_mode=pika.DeliveryMode.Transient
-            )
-        )
-        
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+        result = simulate_blackjack(baraja_config, rng, detalle)
+        resultado = {'sim_id': sim_id, 'result': result}
 
-    except Exception as e:
-        print(f"CONSUMER {os.getpid()} Error processing scenario: {e}")
-        ch.basic_nack(delivery_tag=method.delivery_tag) 
+    resultado['suma_jugador'] = detalle['suma_jugador']
+    resultado['pasados'] = detalle['pasados']
+
+    if semilla is not None:
+        resultado['semilla'] = semilla
+    if 'clave' in scenario_data:
+        resultado['clave'] = scenario_data['clave']
+    return resultado
+
+def run_replay(semilla, inicio, fin, modelo, clave=None, perfil=False):
+    """Vuelve a ejecutar localmente un escenario sembrado, opcionalmente con cProfile.
+
+    `modelo` es el mensaje de modelo de la corrida (al menos 'config'); su muestreo, zapato
+    y estrategias se aplican como en el consumidor. En un barrido `clave` elige la
+    configuracion del escenario, de modelo['configs'] si viene ahi y si no de 'config'.
+    """
+    escenario = {'sim_id': inicio} if inicio == fin else {'sim_range': [inicio, fin]}
+    escenario['semilla'] = semilla
+    baraja_config = modelo['config']
+    if clave is not None:
+        escenario['clave'] = clave
+        baraja_config = modelo.get('configs', {}).get(clave, baraja_config)
+    estrategias = compilar_estrategias(modelo['estrategias']) if modelo.get('estrategias') else None
+    argumentos = (escenario, baraja_config, estrategias, modelo.get('muestreo', 'simple'), modelo.get('zapato'))
+
+    if perfil:
+        import cProfile
+        import pstats
+        perfilador = cProfile.Profile()
+        resultado = perfilador.runcall(ejecutar_escenario, *argumentos)
+        pstats.Stats(perfilador).sort_stats('cumulative').print_stats(15)
+    else:
+        t0 = time.perf_counter()
+        resultado = ejecutar_escenario(*argumentos)
+        print(f"Replay en {(time.perf_counter() - t0) * 1000:.2f} ms")
+    print(json.dumps(resultado))
+    return resultado
+
+class ProcesadorEscenarios:
+    """Procesa escenarios y confirma por ventanas en lugar de mensaje por mensaje.
+
+    Los resultados se acumulan hasta juntar `ack_cada` entregas o pasar `ack_ms`
+    milisegundos; entonces se publican en un solo mensaje y se confirman todas las
+    entregas de la ventana con un ack multiple. Como el ack va despues de
+    publicar, si el worker muere a mitad de ventana las entregas sin confirmar
+    regresan a la cola y se vuelven a procesar.
+
+    Dentro de la ventana los resultados no viajan uno por uno: se funden en un registro
+    parcial por grupo (semilla, clave) con conteos, puntajes, pasados, rangos de sim_id y
+    las sumas por bloque del estimador por replicas (ver estadistica.fusionar_parcial), asi
+    que el dashboard recibe un registro por worker y ventana. Las reentregas van sueltas, para que el dashboard pueda descartar solo
+    esas si el worker anterior alcanzo a publicarlas.
+
+    Los resultados se responden en el mismo formato (content_type) que el escenario.
+    Los escenarios de una version de modelo anterior a la cargada se descartan (se
+    confirman sin resultado). Uno de una version mas nueva se retiene sin confirmar, junto
+    con las entregas que lleguen detras de el, hasta que llega ese modelo (por push o
+    releyendo su cola con temporizadores, sin bloquear el lazo de eventos); si no llega en
+    ESPERA_VERSION segundos, las entregas retenidas regresan a la cola.
+    En un barrido cada escenario indica en 'clave' su configuracion, cuya baraja compilada
+    se guarda en un LRU. Si el modelo trae estrategias, cada escenario las evalua todas
+    sobre las mismas barajas.
+    Cada `telemetria_s` segundos publica un latido con sims/s, latencias p50/p99 por
+    escenario y entregas en vuelo en el exchange de estadisticas.
+    Con `registro` (registro.RegistrosPorConfig) cada partida se agrega ademas al
+    registro binario de su modelo y configuracion, que se escribe de una vez al cerrar
+    cada ventana.
+    """
+
+    def __init__(self, transporte, baraja_config=None, ack_cada=ACK_CADA, ack_ms=ACK_MS, telemetria_s=INTERVALO_TELEMETRIA, version=None,
+                 registro=None):
+        self.transporte = transporte
+        self.baraja_config = baraja_config
+        self.version = version
+        self.descartados = 0
+        self.configs = {}
+        self.estrategias = None
+        self.muestreo = 'simple'
+        self.zapato = None
+        self.hash = None
+        self.etiquetas = {}
+        self.registro = registro
+        self._metadatos = {}
+        self._mazos = OrderedDict()
+        self.ack_cada = max(1, ack_cada)
+        self.ack_ms = ack_ms
+        self.telemetria_s = telemetria_s
+        self._parciales = {} # (semilla, clave) -> registro parcial de la ventana
+        self._retenidos = [] # Entregas en espera de un modelo mas nuevo, en orden de llegada
+        self._limite_retencion = 0.0
+        self._espera_modelo = ESPERA_MODELO
+        self._sueltos = []
+        self._en_ventana = 0
+        self._ultimo_tag = None
+        self._content_type = CONTENT_TYPE_JSON
+
+        # Telemetria
+        self.host = socket.gethostname()
+        self.worker_id = f"{self.host}-{os.getpid()}"
+        self._latencias = deque(maxlen=MUESTRAS_LATENCIA)
+        self._sims_intervalo = 0
+        self._sims_total = 0
+        self._inicio_intervalo = time.perf_counter()
+
+    def cargar_modelo(self, modelo):
+        """Cambia al modelo recibido sin reiniciar; la ventana abierta se cierra con el modelo anterior."""
+        if self.version is not None and modelo['version'] <= self.version:
+            # Ya cargado al leerlo de la cola del modelo; este llega despues por push
+            return
+        self.vaciar()
+        self.baraja_config = modelo['config']
+        self.version = modelo['version']
+        self.configs = modelo.get('configs', {})
+        self.estrategias = compilar_estrategias(modelo['estrategias']) if modelo.get('estrategias') else None
+        self.muestreo = modelo.get('muestreo', 'simple')
+        self.zapato = modelo.get('zapato')
+        self.hash = modelo['hash']
+        self.etiquetas = modelo.get('etiquetas', {})
+        self._mazos.clear()
+        self._metadatos.clear()
+        print(f"CONSUMER {os.getpid()}: Modelo {self.version} cargado. Total de cartas: {sum(self.baraja_config.values())}")
+        self._liberar()
+
+    def _retener(self, mensaje):
+        # Nada de la ventana queda abierto: un ack multiple posterior confirmaria la entrega retenida
+        self.vaciar()
+        self._retenidos.append(mensaje)
+        self._limite_retencion = time.monotonic() + ESPERA_VERSION
+        self._espera_modelo = ESPERA_MODELO
+        self.transporte.programar(self._espera_modelo, self._revisar_modelo)
+
+    def _revisar_modelo(self):
+        # Temporizador mientras hay entregas retenidas: relee la cola del modelo con espera creciente
+        if not self._retenidos:
+            return
+        modelo = ultimo_modelo(self.transporte)
+        if modelo is not None and (self.version is None or modelo['version'] > self.version):
+            self.cargar_modelo(modelo)
+        elif time.monotonic() >= self._limite_retencion:
+            retenidos, self._retenidos = self._retenidos, []
+            print(f"CONSUMER {os.getpid()}: No llego el modelo de {len(retenidos)} escenario(s); regresan a la cola")
+            for mensaje in retenidos:
+                self.transporte.nack(mensaje.tag, requeue=True)
+        else:
+            self._espera_modelo = min(self._espera_modelo * 2, ESPERA_MODELO_MAX)
+            self.transporte.programar(self._espera_modelo, self._revisar_modelo)
+
+    def _liberar(self):
+        # Procesa en orden las entregas retenidas; si alguna sigue adelantada se vuelve a retener
+        retenidos, self._retenidos = self._retenidos, []
+        for mensaje in retenidos:
+            self.callback_escenario(mensaje)
+
+    def metadatos_registro(self, clave):
+        """Metadatos del registro binario para la configuracion `clave` (None: la del modelo)."""
+        metadatos = self._metadatos.get(clave)
+        if metadatos is None:
+            config = self.baraja_config if clave is None else self.configs[clave]
+            metadatos = self._metadatos[clave] = {
+                'modelo': self.version,
+                'clave': (self.hash or clave_config(config)) if clave is None else clave,
+                'config': config,
+                'etiqueta': self.etiquetas.get(clave),
+                'muestreo': self.muestreo,
+                'zapato': self.zapato,
+                'estrategia': next(iter(self.estrategias)) if self.estrategias else None,
+            }
+        return metadatos
+
+    def mazo(self, clave):
+        """Baraja compilada de la configuracion `clave` del barrido (LRU de MAZOS_EN_CACHE)."""
+        mazo = self._mazos.get(clave)
+        if mazo is not None:
+            self._mazos.move_to_end(clave)
+            return mazo
+        mazo = self._mazos[clave] = compilar_baraja(self.configs[clave])
+        if len(self._mazos) > MAZOS_EN_CACHE:
+            self._mazos.popitem(last=False)
+        return mazo
+
+    def callback_escenario(self, mensaje):
+        """Callback que procesa un escenario y lo agrega a la ventana actual."""
+        if self._retenidos:
+            # Se conserva el orden detras de la entrega que espera su modelo
+            self._retenidos.append(mensaje)
+            return
+        content_type = mensaje.content_type or CONTENT_TYPE_JSON
+        if content_type != self._content_type:
+            # Cada ventana se publica en un solo formato
+            self.vaciar()
+            self._content_type = content_type
+
+        try:
+            t0 = time.perf_counter()
+            escenario = decodificar(mensaje.cuerpo, content_type)
+            version = escenario.get('modelo')
+            if version is not None and self.version is not None and version != self.version:
+                if version < self.version:
+                    # Escenario de un modelo reemplazado: se confirma con la ventana, sin resultado
+                    self.descartados += 1
+                    self._ultimo_tag = mensaje.tag
+                    return
+                # Todavia no llega ese modelo: se retiene en vez de devolverlo de inmediato, que lo
+                # haria circular sin pausa, y sin dormir aqui, que detendria el lazo de eventos
+                self._retener(mensaje)
+                return
+            baraja = self.mazo(escenario['clave']) if 'clave' in escenario else self.baraja_config
+            partidas = [] if self.registro is not None else None
+            resultado = ejecutar_escenario(escenario, baraja, self.estrategias, self.muestreo, self.zapato, partidas)
+            if partidas is not None:
+                inicio = resultado['sim_range'][0] if 'sim_range' in resultado else resultado['sim_id']
+                # Las partidas sin cartas suficientes no traen detalle, pero tambien se registran
+                if 'counts' in resultado:
+                    errores = resultado['counts'].get('ERROR_NO_CARTAS', 0)
+                else:
+                    errores = int(resultado['result'] == 'ERROR_NO_CARTAS')
+                self.registro.agregar(self.metadatos_registro(escenario.get('clave')), inicio, partidas, errores)
+            self._latencias.append((time.perf_counter() - t0) * 1000)
+        except Exception as e:
+            print(f"CONSUMER {os.getpid()} Error processing scenario: {e}")
+            # Se cierra la ventana antes del nack para no mezclar confirmaciones
+            self.vaciar()
+            self.transporte.nack(mensaje.tag)
+            return
+
+        sims = sum(resultado['counts'].values()) if 'counts' in resultado else 1
+        self._sims_intervalo += sims
+        self._sims_total += sims
+
+        if mensaje.reentregado:
+            self._sueltos.append(resultado)
+        else:
+            grupo = (resultado.get('semilla'), resultado.get('clave'))
+            parcial = self._parciales.get(grupo)
+            if parcial is None:
+                parcial = self._parciales[grupo] = registro_parcial(resultado)
+            fusionar_parcial(parcial, resultado)
+        self._en_ventana += 1
+        self._ultimo_tag = mensaje.tag
+        if self._en_ventana >= self.ack_cada:
+            self.vaciar()
+
+    def vaciar(self):
+        """Publica los resultados de la ventana y confirma sus entregas."""
+        if self._ultimo_tag is None:
+            return
+
+        for parcial in self._parciales.values():
+            parcial['rangos'] = compactar_rangos(parcial['rangos'])
+        resultados = list(self._parciales.values()) + self._sueltos
+
+        # El registro se escribe antes de confirmar: como la cola, es al menos una vez
+        if self.registro is not None:
+            self.registro.escribir()
 
-def run_consumer():
+        # Publicar resultado (una ventana de puros escenarios descartados solo se confirma)
+        if resultados:
+            data = resultados[0] if len(resultados) == 1 else {'lote': resultados}
+            result_message, content_type = codificar(data, self._content_type)
+            self.transporte.publicar('resultados', result_message, content_type, exchange=EXCHANGE_RESULTADOS)
+        self.transporte.ack(self._ultimo_tag, multiple=True)
+        self._parciales = {}
+        self._sueltos = []
+        self._en_ventana = 0
+        self._ultimo_tag = None
+
+    def latido(self):
+        """Publica la telemetria del intervalo y reinicia sus contadores."""
+        ahora = time.perf_counter()
+        duracion = ahora - self._inicio_intervalo
+        latencias = sorted(self._latencias)
+        telemetria = {
+            'worker': self.worker_id,
+            'host': self.host,
+            'pid': os.getpid(),
+            'sims_s': self._sims_intervalo / duracion if duracion > 0 else 0.0,
+            'p50_ms': percentil(latencias, 50),
+            'p99_ms': percentil(latencias, 99),
+            'en_vuelo': self._en_ventana,
+            'total': self._sims_total,
+            'modelo': self.version,
+            'descartados': self.descartados,
+        }
+        cuerpo, content_type = codificar({'telemetria': telemetria})
+        self.transporte.publicar('', cuerpo, content_type, exchange=EXCHANGE_ESTADISTICAS)
+        self._latencias.clear()
+        self._sims_intervalo = 0
+        self._inicio_intervalo = ahora
+
+    def iniciar_temporizador(self):
+        """Programa el cierre periodico de la ventana cada `ack_ms` milisegundos y los latidos."""
+        programar = self.transporte.programar
+
+        if self.ack_ms > 0:
+            def tick():
+                self.vaciar()
+                programar(self.ack_ms / 1000, tick)
+
+            programar(self.ack_ms / 1000, tick)
+
+        if self.telemetria_s > 0:
+            def tick_telemetria():
+                self.latido()
+                programar(self.telemetria_s, tick_telemetria)
+
+            programar(self.telemetria_s, tick_telemetria)
+
+def run_consumer(force_local=False, workers=1, broker=None, **opciones):
     import os 
     
-    if not _HAS_PIKA:
-        print("error en libreria")
+    if force_local or (broker is None and not _HAS_PIKA):
+        if not _HAS_PIKA:
+            print("error en libreria")
         baraja_default = Baraja()
         baraja_config = baraja_default.config
         demo_count = 20
@@ -58,44 +401,199 @@ def run_consumer():
         return
 
     print(f"Consumidor {os.getpid()}: Iniciando...")
-    connection = pika.BlockingConnection(pika.ConnectionParameters('localhost'))
-    channel = connection.channel()
+    if workers > 1:
+        # Cada worker se suscribe al modelo por su cuenta
+        run_pool(workers, opciones, broker)
+        return
+
+    transporte = _conectar(broker)
+    try:
+        _consumir_escenarios(transporte, **opciones)
+    except KeyboardInterrupt:
+        print(f"\nCONSUMER {os.getpid()}: Detenido por el usuario.")
+        transporte.detener()
+    finally:
+        transporte.cerrar()
+
+def _conectar(broker=None):
+    transporte = conectar(broker)
 
     # 1. Declarar colas
-    channel.queue_declare(queue='baraja', durable=True)
-    channel.queue_declare(queue='escenarios', durable=True)
-    channel.queue_declare(queue='resultados', durable=False)
+    transporte.declarar('escenarios')
+    transporte.declarar('resultados', durable=False)
+    transporte.declarar_fanout(EXCHANGE_RESULTADOS, ['resultados'])
+    transporte.declarar_fanout(EXCHANGE_ESTADISTICAS)
+    return transporte
 
-    # 2. Obtener la Configuración de la Baraja (Modelo)
-    print(f"Consumidor {os.getpid()}: Esperando la configuración de la baraja...")
-    
-    method_frame, header_frame, body = channel.basic_get('baraja', auto_ack=True)
+def _consumir_escenarios(transporte, prefetch=PREFETCH, ack_cada=ACK_CADA, ack_ms=ACK_MS, telemetria_s=INTERVALO_TELEMETRIA,
+                         registro=None):
+    if prefetch > 0:
+        # Con ventanas mas grandes que el prefetch el broker dejaria de enviar
+        ack_cada = min(ack_cada, prefetch)
 
-    while body is None:
-        time.sleep(1)
-        method_frame, header_frame, body = channel.basic_get('baraja', auto_ack=True)
+    if registro is not None:
+        # Archivos propios de cada worker (uno por modelo y configuracion), asi que cada uno
+        # agrega sin coordinarse con los demas
+        prefijo = f"resultados-{socket.gethostname()}-{os.getpid()}"
+        print(f"CONSUMER {os.getpid()}: Registrando partidas en {os.path.join(registro, prefijo)}-*.bin")
+        registro = RegistrosPorConfig(registro, prefijo, os.getpid())
 
-    if isinstance(body, bytes):
-        body = body.decode('utf-8')
+    procesador = ProcesadorEscenarios(transporte, ack_cada=ack_cada, ack_ms=ack_ms, telemetria_s=telemetria_s, registro=registro)
+
+    # 2. Obtener el modelo vigente; los siguientes se cargan en caliente
+    print(f"Consumidor {os.getpid()}: Esperando el modelo...")
+    SuscripcionModelo(transporte, procesador.cargar_modelo).esperar()
 
-    baraja_config = json.loads(body)
-    print(f"Consumidor{os.getpid()}: Baraja cargada. Total de cartas: {sum(baraja_config.values())}")
-    
     # 3. Consumir escenarios y ejecutar el callback
-    channel.basic_qos(prefetch_count=1) 
-    
-    channel.basic_consume(
-        queue='escenarios',
-        on_message_callback=lambda ch, method, properties, body: callback_escenario(ch, method, properties, body, baraja_config)
-    )
+    procesador.iniciar_temporizador()
+    transporte.consumir('escenarios', procesador.callback_escenario, prefetch=prefetch)
+
+    print(f"CONSUMER {os.getpid()}: Esperando escenarios (prefetch={prefetch}, ack cada {ack_cada} msg o {ack_ms} ms)...")
+    try:
+        transporte.iniciar()
+    finally:
+        # Lo que quede en la ventana se publica y confirma antes de cerrar
+        if transporte.abierto:
+            procesador.vaciar()
+        if registro is not None:
+            registro.cerrar()
+
+# --- Pool de procesos ---
+
+def _worker(opciones, broker=None):
+    """Proceso del pool: su propio transporte y su propia suscripcion al modelo."""
+    try:
+        transporte = _conectar(broker)
+    except Exception as e:
+        print(f"CONSUMER {os.getpid()}: No fue posible conectar al broker: {e}")
+        sys.exit(1)
 
-    print(f"CONSUMER {os.getpid()}: Esperando escenarios...")
-    channel.start_consuming()
+    try:
+        _consumir_escenarios(transporte, **opciones)
+    except KeyboardInterrupt:
+        # Ctrl-C llega a todo el grupo de procesos; los no confirmados regresan a la cola
+        transporte.detener()
+    finally:
+        try:
+            transporte.cerrar()
+        except Exception:
+            pass
+
+def lanzar_worker(indice, opciones=None, broker=None):
+    """Inicia un proceso consumidor."""
+    proceso = multiprocessing.Process(target=_worker, args=(opciones or {}, broker), name=f"consumidor-{indice}")
+    proceso.start()
+    return proceso
+
+def espera_reinicio(fallos):
+    """Segundos antes de reiniciar un worker tras `fallos` arranques fallidos seguidos (backoff exponencial)."""
+    return min(REINICIO_MAX, ESPERA_SUPERVISOR * 2 ** max(0, fallos - 1))
+
+def run_pool(workers, opciones=None, broker=None):
+    """Lanza y supervisa `workers` procesos consumidores, reiniciando los que fallen.
+
+    Un worker que termina con codigo 0 salio limpio y no se reinicia. Uno que falla se
+    reinicia con espera exponencial si murio al poco de arrancar (por ejemplo, sin broker),
+    y tras FALLOS_MAX arranques fallidos seguidos se deja de reiniciar. El pool termina
+    cuando ya no le queda ningun worker.
+    """
+    def lanzar(indice):
+        return lanzar_worker(indice, opciones, broker), time.monotonic()
+
+    print(f"Consumidor {os.getpid()}: Iniciando pool de {workers} workers...")
+    procesos = {i: lanzar(i) for i in range(workers)} # indice -> (proceso, inicio)
+    fallos = dict.fromkeys(procesos, 0)
+    pendientes = {} # indice -> instante en que se reinicia
+    try:
+        while procesos or pendientes:
+            time.sleep(ESPERA_SUPERVISOR)
+            ahora = time.monotonic()
+            for i, (proceso, inicio) in list(procesos.items()):
+                if proceso.is_alive():
+                    continue
+                del procesos[i]
+                if proceso.exitcode == 0:
+                    print(f"Worker {proceso.name} (pid {proceso.pid}) terminó limpio; no se reinicia.")
+                    continue
+                fallos[i] = fallos[i] + 1 if ahora - inicio < VIDA_MINIMA else 1
+                if fallos[i] >= FALLOS_MAX:
+                    print(f"Worker {proceso.name} (pid {proceso.pid}) falló {fallos[i]} veces seguidas al arrancar "
+                          f"(código {proceso.exitcode}); no se reinicia.")
+                    continue
+                espera = espera_reinicio(fallos[i])
+                print(f"Worker {proceso.name} (pid {proceso.pid}) terminó con código {proceso.exitcode}. "
+                      f"Reiniciando en {espera:.0f} s...")
+                pendientes[i] = ahora + espera
+            for i, cuando in list(pendientes.items()):
+                if ahora >= cuando:
+                    del pendientes[i]
+                    procesos[i] = lanzar(i)
+        print(f"Consumidor {os.getpid()}: No quedan workers en el pool.")
+    except KeyboardInterrupt:
+        print(f"\nConsumidor {os.getpid()}: Deteniendo el pool...")
+    finally:
+        for proceso, _ in procesos.values():
+            proceso.join(timeout=5)
+        for proceso, _ in procesos.values():
+            if proceso.is_alive():
+                proceso.terminate()
+                proceso.join()
 
 if __name__ == '__main__':
-    run_consumer() = False
-    if len(sys.argv) > 1 and sys.argv[1] in ('local', 'l'):
-        force_local = True
+    parser = argparse.ArgumentParser(description='Consumidor de escenarios de BlackJack')
+    parser.add_argument('modo', nargs='?', choices=('local', 'l', 'replay'),
+                        help="'local' ejecuta simulaciones locales sin RabbitMQ; 'replay' repite un escenario sembrado")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='procesos consumidores en este equipo (por defecto, uno por nucleo)')
+    parser.add_argument('--prefetch', type=int, default=PREFETCH,
+                        help='entregas sin confirmar por worker')
+    parser.add_argument('--ack-cada', type=int, default=ACK_CADA,
+                        help='mensajes por ventana de confirmacion')
+    parser.add_argument('--ack-ms', type=int, default=ACK_MS,
+                        help='duracion maxima de una ventana de confirmacion en ms')
+    parser.add_argument('--telemetria', type=float, default=INTERVALO_TELEMETRIA,
+                        help='segundos entre latidos de telemetria (0 los desactiva)')
+    parser.add_argument('--registro', default=None, metavar='DIR',
+                        help='escribe cada partida en un registro binario por worker dentro de DIR')
+    parser.add_argument('--semilla', type=int, help='replay: semilla de la corrida')
+    parser.add_argument('--rango', type=int, nargs=2, metavar=('INICIO', 'FIN'),
+                        help='replay: sim_id inicial y final del escenario')
+    parser.add_argument('--baraja', default=None,
+                        help='replay: configuracion de la baraja en JSON (por defecto la clasica)')
+    parser.add_argument('--modelo', default=None, metavar='ARCHIVO',
+                        help='replay: mensaje de modelo de la corrida en JSON (baraja, barrido, muestreo, zapato y estrategias)')
+    parser.add_argument('--clave', default=None, help='replay: clave de la configuracion del escenario en un barrido')
+    parser.add_argument('--muestreo', choices=MUESTREOS, default=None, help='replay: muestreo de la corrida')
+    parser.add_argument('--zapato', type=int, default=None, metavar='BARAJAS', help='replay: barajas del zapato')
+    parser.add_argument('--penetracion', type=float, default=PENETRACION, help='replay: penetracion del zapato')
+    parser.add_argument('--estrategias', default=None, metavar='NOMBRES',
+                        help='replay: estrategias de la corrida separadas por comas, la primera es la referencia')
+    parser.add_argument('--perfil', action='store_true', help='replay: perfila con cProfile')
+    args = parser.parse_args()
 
+    if args.modo == 'replay':
+        if args.semilla is None or args.rango is None:
+            parser.error('replay requiere --semilla y --rango')
+        if args.modelo:
+            with open(args.modelo) as f:
+                modelo = json.load(f)
+        else:
+            modelo = {'config': Baraja().config}
+        # Las opciones explicitas reemplazan a las del archivo
+        if args.baraja:
+            modelo['config'] = json.loads(args.baraja)
+        if args.muestreo:
+            modelo['muestreo'] = args.muestreo
+        if args.zapato:
+            modelo['zapato'] = {'mazos': args.zapato, 'penetracion': args.penetracion}
+        if args.estrategias:
+            desconocidas = [nombre for nombre in args.estrategias.split(',') if nombre not in ESTRATEGIAS]
+            if desconocidas:
+                parser.error(f"estrategias desconocidas: {', '.join(desconocidas)}")
+            modelo['estrategias'] = {nombre: ESTRATEGIAS[nombre] for nombre in args.estrategias.split(',')}
+        run_replay(args.semilla, args.rango[0], args.rango[1], modelo, clave=args.clave, perfil=args.perfil)
+        sys.exit(0)
 
-    run_consumer()
+    run_consumer(force_local=args.modo is not None, workers=max(1, args.workers),
+                 prefetch=args.prefetch, ack_cada=args.ack_cada, ack_ms=args.ack_ms,
+                 telemetria_s=args.telemetria, registro=args.registro)
@@ -1,16 +1,35 @@
 import json
+import math
 import time
 import sys
 import threading
 import queue as _queue
+from collections import deque
 
-import pika
-import tqdm
+import argparse
+
+from tqdm import tqdm
 
 # Importar la clase Baraja para mostrar la tabla de configuración
 from deck import Baraja 
+from cache_resultados import CacheResultados
+from estadistica import (es_duplicado, describir_rangos, sumar_por_config, sumar_por_estrategia, intervalo_wilson, intervalo_media,
+                         replicas_vacias, sumar_replicas, intervalo_replicas)
+from protocolo import decodificar
+from transporte import conectar
+from modelo import SuscripcionModelo
+from registro import resumir_registros, agrupar_registros
 
 NUM_SIMULATIONS = 10000
+INTERVALO_REDIBUJO_MS = 33 # Un redibujado por cuadro (~30 fps)
+MAX_LINEAS_LOG = 200       # Lineas que conserva el log del GUI
+PREFETCH_GUI = 500         # Resultados en vuelo hacia el hilo consumidor del GUI
+INTERVALO_LOTE_GUI = 0.05  # Segundos que el hilo junta resultados antes de entregar un lote
+ESPERA_CIERRE_GUI = 2.0    # Segundos que el hilo espera la ultima confirmacion del GUI antes de cerrar
+EXCHANGE_RESULTADOS = 'resultados.fanout'
+EXCHANGE_ESTADISTICAS = 'estadisticas.fanout' # Latidos de telemetria de los consumidores
+CADUCIDAD_WORKER = 6.0     # Segundos sin latido para marcar un worker como caido
+INTERVALO_TABLA_WORKERS = 10.0 # Segundos entre tablas de workers en modo consola
 
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -34,6 +53,71 @@ except Exception:
     FigureCanvasTkAgg = None
     _HAS_GUI = False
 
+def filas_workers(workers, ahora=None):
+    """Filas (worker, sims/s, p50, p99, en vuelo, total, estado) ordenadas de mas lento a mas rapido."""
+    ahora = time.monotonic() if ahora is None else ahora
+    filas = []
+    for worker, (recibido, t) in workers.items():
+        caido = ahora - recibido > CADUCIDAD_WORKER
+        filas.append((worker, t['sims_s'], t['p50_ms'], t['p99_ms'], t['en_vuelo'], t['total'],
+                      'CAIDO' if caido else 'ok'))
+    filas.sort(key=lambda f: (f[6] == 'ok', f[1]))
+    return filas
+
+def filas_barrido(por_config, etiquetas):
+    """Filas (etiqueta, sims, %V, semiancho %) de un barrido, en el orden de las etiquetas del modelo."""
+    filas = []
+    for clave, etiqueta in etiquetas.items():
+        conteos = por_config.get(clave, {})
+        total = sum(conteos.values())
+        victorias = conteos.get('VICTORIA', 0)
+        lo, hi = intervalo_wilson(victorias, total)
+        win = victorias / total * 100 if total else 0.0
+        filas.append((etiqueta, total, win, (hi - lo) / 2 * 100))
+    return filas
+
+def intervalo_victoria(tablero):
+    """Intervalo de P(VICTORIA) del tablero y el estimador usado.
+
+    Con muestreo simple las partidas son independientes y se usa Wilson; con muestreos de
+    reduccion de varianza se usa la varianza entre bloques (estadistica.intervalo_replicas).
+    """
+    if tablero.muestreo != 'simple':
+        return intervalo_replicas(tablero.replicas) + ('replicas',)
+    return intervalo_wilson(tablero.victories, tablero.total_processed) + ('wilson',)
+
+def resumen_jugador(tablero):
+    """Puntaje final medio del jugador y porcentaje de veces que se paso; None si no hay datos."""
+    if not tablero.total_processed or not tablero.suma_jugador:
+        return None
+    return tablero.suma_jugador / tablero.total_processed, tablero.pasados / tablero.total_processed * 100
+
+def cargar_resumen(tablero, resumen):
+    """Carga en un tablero los totales de un resumen de registros binarios (registro.resumir_registros)."""
+    counts = resumen['counts']
+    tablero.victories = counts.get('VICTORIA', 0)
+    tablero.defeats = counts.get('DERROTA', 0)
+    tablero.ties = counts.get('EMPATE', 0)
+    tablero.total_processed = resumen['total']
+    tablero.suma_jugador = resumen['suma_jugador']
+    tablero.pasados = resumen['pasados']
+    tablero.replicas = resumen['replicas']
+
+def filas_estrategias(por_estrategia):
+    """Filas (estrategia, sims, %V, neto medio, diferencia contra la primera, semiancho) por estrategia.
+
+    Todas las estrategias juegan las mismas barajas, asi que la diferencia y su intervalo
+    salen de las diferencias partida a partida (numeros aleatorios comunes).
+    """
+    filas = []
+    for nombre, acumulado in por_estrategia.items():
+        total = acumulado['VICTORIA'] + acumulado['DERROTA'] + acumulado['EMPATE']
+        win = acumulado['VICTORIA'] / total * 100 if total else 0.0
+        neto = (acumulado['VICTORIA'] - acumulado['DERROTA']) / total if total else 0.0
+        diferencia, semiancho = intervalo_media(acumulado['dif'], acumulado['dif2'], total)
+        filas.append((nombre, total, win, neto, diferencia, semiancho))
+    return filas
+
 class GuiDashboard:
 
     def __init__(self, total=NUM_SIMULATIONS):
@@ -56,6 +140,30 @@ class GuiDashboard:
         # Cola de mensajes del consumidor
         self.msg_q = _queue.Queue()
 
+        # Log como buffer circular; se vuelca al widget una vez por cuadro
+        self.log_lines = deque(maxlen=MAX_LINEAS_LOG)
+
+        # Rangos de sim_id sembrados ya contados por grupo (ver estadistica.es_duplicado)
+        self.vistos = {}
+
+        # Ultimo latido de cada consumidor: worker -> (instante de recepcion, telemetria)
+        self.workers = {}
+
+        # Barrido: conteos por hash de configuracion y etiquetas del modelo
+        self.por_config = {}
+        self.etiquetas = {}
+
+        # Estrategias evaluadas con las mismas barajas (ver estadistica.sumar_por_estrategia)
+        self.por_estrategia = {}
+
+        # Muestreo del modelo y sumas por bloque para el estimador por replicas
+        self.muestreo = 'simple'
+        self.replicas = replicas_vacias()
+
+        # Puntajes finales del jugador y veces que se paso (registros parciales y bloques)
+        self.suma_jugador = 0
+        self.pasados = 0
+
         main = ttk.Frame(self.root, padding=8)
         main.pack(fill='both', expand=True)
 
@@ -81,6 +189,18 @@ class GuiDashboard:
         self.stats_label.pack()
         self.prob_label = ttk.Label(stats_frame, text='Probabilidades: V: 0.00%  D: 0.00%  E: 0.00%')
         self.prob_label.pack()
+        self.cache_label = ttk.Label(stats_frame, text='Acumulado previo: sin datos')
+        self.cache_label.pack()
+
+        # Tabla de consumidores
+        ttk.Label(left, text='Consumidores', font=('TkDefaultFont', 12, 'bold')).pack(anchor='w', pady=(8,0))
+        columnas = ('worker', 'sims_s', 'p50', 'p99', 'en_vuelo', 'estado')
+        self.workers_table = ttk.Treeview(left, columns=columnas, show='headings', height=6)
+        for col, titulo, ancho in zip(columnas, ('Worker', 'Sims/s', 'p50 ms', 'p99 ms', 'En vuelo', 'Estado'),
+                                      (140, 70, 60, 60, 60, 60)):
+            self.workers_table.heading(col, text=titulo)
+            self.workers_table.column(col, width=ancho, anchor='center')
+        self.workers_table.pack(fill='x')
 
         # Log area
         log_frame = ttk.Frame(left)
@@ -101,8 +221,28 @@ class GuiDashboard:
         self.canvas = FigureCanvasTkAgg(self.fig, master=right)
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
 
+        # Tabla de barrido (una fila por configuracion)
+        ttk.Label(right, text='Barrido', font=('TkDefaultFont', 12, 'bold')).pack(anchor='w', pady=(8,0))
+        columnas = ('config', 'sims', 'win', 'ic')
+        self.barrido_table = ttk.Treeview(right, columns=columnas, show='headings', height=8)
+        for col, titulo, ancho in zip(columnas, ('Configuracion', 'Sims', 'V %', '+/- %'), (160, 80, 70, 70)):
+            self.barrido_table.heading(col, text=titulo)
+            self.barrido_table.column(col, width=ancho, anchor='center')
+        self.barrido_table.pack(fill='x')
+
+        # Tabla de estrategias (una fila por estrategia; la primera es la referencia)
+        ttk.Label(right, text='Estrategias', font=('TkDefaultFont', 12, 'bold')).pack(anchor='w', pady=(8,0))
+        columnas = ('estrategia', 'sims', 'win', 'neto', 'dif', 'ic')
+        self.estrategias_table = ttk.Treeview(right, columns=columnas, show='headings', height=5)
+        for col, titulo, ancho in zip(columnas, ('Estrategia', 'Sims', 'V %', 'Neto', 'Dif', '+/-'),
+                                      (120, 80, 60, 60, 60, 60)):
+            self.estrategias_table.heading(col, text=titulo)
+            self.estrategias_table.column(col, width=ancho, anchor='center')
+        self.estrategias_table.pack(fill='x')
+
         self.root.protocol('WM_DELETE_WINDOW', self._on_close)
-        self._running = False
+        # Activo desde el inicio para que el hilo consumidor no termine antes de start()
+        self._running = True
 
     def _on_close(self):
         self._running = False
@@ -128,43 +268,132 @@ class GuiDashboard:
         for v in Baraja.CARTAS_VALORES:
             self.table.insert('', 'end', values=(v, d.get(v,0)))
 
+    def set_previo(self, previo):
+        # Totales acumulados en la cache para esta baraja en ejecuciones anteriores
+        total = previo['total']
+        if total == 0:
+            self.cache_label.config(text='Acumulado previo: sin datos')
+            return
+        win_p = previo['VICTORIA'] / total * 100
+        self.cache_label.config(text=f"Acumulado previo: {total} sims  V: {win_p:.2f}%")
+
     def start(self):
         self._running = True
         self._consume_queue()
         self.root.mainloop()
 
     def _consume_queue(self):
-        processed = 0
-        while processed < 50:
+        # Vacia lo que haya en la cola y redibuja una sola vez por cuadro
+        pendientes = self.msg_q.qsize()
+        procesados = 0
+        confirmar = None
+        while procesados < pendientes:
             try:
-                data = self.msg_q.get_nowait()
+                lote, confirmar_lote = self.msg_q.get_nowait()
             except _queue.Empty:
                 break
-            self._apply_result(data)
-            processed += 1
+            for data in lote:
+                self._apply_result(data)
+            confirmar = confirmar_lote or confirmar
+            procesados += 1
+
+        if procesados:
+            self._update_stats_widgets()
+            self._update_log_widget()
+            self._update_workers_widget()
+            self._update_barrido_widget()
+            self._update_estrategias_widget()
+            # El ack (multiple) del ultimo lote confirma todo lo aplicado en este cuadro
+            if confirmar is not None:
+                confirmar()
 
         if self._running:
-            self.root.after(100, self._consume_queue)
+            self.root.after(INTERVALO_REDIBUJO_MS, self._consume_queue)
 
     def _apply_result(self, result_data):
-        res = result_data.get('result')
-        self.total_processed += 1
-        if res == 'VICTORIA':
-            self.victories += 1
-        elif res == 'DERROTA':
-            self.defeats += 1
-        elif res == 'EMPATE':
-            self.ties += 1
+        # Solo acumula contadores y lineas de log; el redibujado lo hace _consume_queue
+        if 'telemetria' in result_data:
+            telemetria = result_data['telemetria']
+            self.workers[telemetria['worker']] = (time.monotonic(), telemetria)
+            return
+
+        if 'objetivo' in result_data:
+            # El productor adaptativo detuvo el despacho: nuevo total esperado
+            self.total = result_data['objetivo']
+            self.log_lines.append(f"Total ajustado por el productor: {self.total}")
+            return
 
-        self._update_stats_widgets()
+        if 'lote' in result_data:
+            # Varios resultados publicados juntos por un consumidor
+            for item in result_data['lote']:
+                self._apply_result(item)
+            return
+
+        if es_duplicado(result_data, self.vistos):
+            # Reentrega de un escenario sembrado que ya se conto
+            return
+
+        sumar_por_config(self.por_config, result_data)
+        sumar_por_estrategia(self.por_estrategia, result_data)
+        self.suma_jugador += result_data.get('suma_jugador', 0)
+        self.pasados += result_data.get('pasados', 0)
+
+        if 'counts' in result_data:
+            # Resultado agregado de un bloque o registro parcial de una ventana de un consumidor
+            counts = result_data['counts']
+            sumar_replicas(self.replicas, result_data)
+            self.victories += counts.get('VICTORIA', 0)
+            self.defeats += counts.get('DERROTA', 0)
+            self.ties += counts.get('EMPATE', 0)
+            self.total_processed += sum(counts.values())
+            linea = f"Sims {describir_rangos(result_data)}: V {counts.get('VICTORIA', 0)} D {counts.get('DERROTA', 0)} E {counts.get('EMPATE', 0)}"
+        else:
+            res = result_data.get('result')
+            sumar_replicas(self.replicas, result_data)
+            self.total_processed += 1
+            if res == 'VICTORIA':
+                self.victories += 1
+            elif res == 'DERROTA':
+                self.defeats += 1
+            elif res == 'EMPATE':
+                self.ties += 1
+            linea = f"Sim {result_data.get('sim_id')}: {res}"
+
+        self.log_lines.append(linea)
+
+    def _update_log_widget(self):
         try:
             self.log_widget.configure(state='normal')
-            self.log_widget.insert('end', f"Sim {result_data.get('sim_id')}: {res}\n")
+            self.log_widget.delete('1.0', 'end')
+            self.log_widget.insert('end', '\n'.join(self.log_lines) + '\n')
             self.log_widget.see('end')
             self.log_widget.configure(state='disabled')
         except Exception:
             pass
 
+    def _update_workers_widget(self):
+        for i in self.workers_table.get_children():
+            self.workers_table.delete(i)
+        for worker, sims_s, p50, p99, en_vuelo, _total, estado in filas_workers(self.workers):
+            self.workers_table.insert('', 'end', values=(worker, f"{sims_s:.0f}", f"{p50:.2f}", f"{p99:.2f}", en_vuelo, estado))
+
+    def _update_barrido_widget(self):
+        if not self.etiquetas:
+            return
+        for i in self.barrido_table.get_children():
+            self.barrido_table.delete(i)
+        for etiqueta, total, win, semiancho in filas_barrido(self.por_config, self.etiquetas):
+            self.barrido_table.insert('', 'end', values=(etiqueta, total, f"{win:.2f}", f"{semiancho:.2f}"))
+
+    def _update_estrategias_widget(self):
+        if not self.por_estrategia:
+            return
+        for i in self.estrategias_table.get_children():
+            self.estrategias_table.delete(i)
+        for nombre, total, win, neto, diferencia, semiancho in filas_estrategias(self.por_estrategia):
+            self.estrategias_table.insert('', 'end', values=(nombre, total, f"{win:.2f}", f"{neto:+.4f}",
+                                                             f"{diferencia:+.4f}", f"{semiancho:.4f}"))
+
     def _update_stats_widgets(self):
         self.stats_label.config(text=f'V: {self.victories}  D: {self.defeats}  E: {self.ties}  Total: {self.total_processed}')
         total = max(1, self.total_processed)
@@ -196,41 +425,86 @@ class GuiDashboard:
         lose_prob = (self.defeats / self.total_processed) * 100
         tie_prob = (self.ties / self.total_processed) * 100
 
+        lo, hi, metodo = intervalo_victoria(self)
         msg = f"Sim total: {self.total_processed}\nVictorias: {self.victories} ({win_prob:.2f}%)\nDerrotas: {self.defeats} ({lose_prob:.2f}%)\nEmpates: {self.ties} ({tie_prob:.2f}%)"
+        msg += f"\nIC 95% de P(VICTORIA): [{lo * 100:.2f}%, {hi * 100:.2f}%] ({metodo}, muestreo {self.muestreo})"
+        jugador = resumen_jugador(self)
+        if jugador is not None:
+            msg += f"\nPuntaje medio del jugador: {jugador[0]:.2f}  Se pasa: {jugador[1]:.2f}%"
         try:
             import tkinter.messagebox as mb
             mb.showinfo('Reporte final', msg)
         except Exception:
             print(msg)
 
-def _start_consumer_thread_for_gui(amqp_host, queue_name, dashboard_widget):
+def _start_consumer_thread_for_gui(queue_name, dashboard_widget, broker=None):
+    """Consume resultados por push y los entrega al GUI en lotes.
+
+    Cada lote va a msg_q junto con una funcion que confirma (ack multiple) hasta su
+    ultima entrega; el GUI la llama despues de aplicar los resultados. Como el canal
+    de pika no es thread-safe, el ack se agenda con ack_threadsafe. Al terminar, la conexion
+    sigue abierta hasta que el GUI confirma el ultimo lote entregado (o se cierra la ventana).
+    """
     def _consumer():
         try:
-            conn = pika.BlockingConnection(pika.ConnectionParameters(amqp_host))
-            ch = conn.channel()
+            transporte = conectar(broker)
         except Exception as e:
-            print(f"GUI consumer: error al conectar a RabbitMQ: {e}")
+            print(f"GUI consumer: error al conectar al broker: {e}")
             return
 
-        while dashboard_widget._running and dashboard_widget.total_processed < dashboard_widget.total:
+        lote = []
+        ultimo_tag = [None]
+        entregado = [None]   # Ultimo tag entregado al GUI
+        confirmado = [None]  # Ultimo tag cuyo ack agendo el GUI
+
+        def on_message(mensaje):
+            ultimo_tag[0] = mensaje.tag
+            try:
+                lote.append(decodificar(mensaje.cuerpo, mensaje.content_type))
+            except Exception:
+                # Mensaje invalido: se descarta, el siguiente ack multiple lo confirma
+                pass
+
+        def confirmador(tag):
+            def confirmar():
+                try:
+                    transporte.ack_threadsafe(tag, multiple=True)
+                except Exception as e:
+                    # Conexion ya cerrada: las entregas sin ack regresan a la cola
+                    print(f"GUI consumer: no se pudo confirmar el lote: {e}")
+                confirmado[0] = tag
+            return confirmar
+
+        def on_telemetria(mensaje):
+            # Los latidos no se confirman ni esperan a un lote de resultados
             try:
-                method_frame, header_frame, body = ch.basic_get(queue_name, auto_ack=False)
-                if body is None:
-                    time.sleep(0.1)
-                    continue
-
-                if isinstance(body, bytes):
-                    body = body.decode('utf-8')
-                data = json.loads(body)
-                dashboard_widget.msg_q.put(data)
-                if method_frame is not None:
-                    ch.basic_ack(delivery_tag=method_frame.delivery_tag)
+                dashboard_widget.msg_q.put(([decodificar(mensaje.cuerpo, mensaje.content_type)], None))
             except Exception:
-                time.sleep(0.5)
-                continue
+                pass
+
+        transporte.consumir(queue_name, on_message, prefetch=PREFETCH_GUI)
+        transporte.consumir(transporte.suscribir(EXCHANGE_ESTADISTICAS), on_telemetria, auto_ack=True)
 
         try:
-            conn.close()
+            while dashboard_widget._running and dashboard_widget.total_processed < dashboard_widget.total:
+                transporte.procesar(INTERVALO_LOTE_GUI)
+                if ultimo_tag[0] is not None:
+                    dashboard_widget.msg_q.put((list(lote), confirmador(ultimo_tag[0])))
+                    entregado[0] = ultimo_tag[0]
+                    lote.clear()
+                    ultimo_tag[0] = None
+            # El GUI confirma en su hilo despues de aplicar: se espera su ultimo ack antes de cerrar
+            limite = time.monotonic() + ESPERA_CIERRE_GUI
+            while (dashboard_widget._running and confirmado[0] != entregado[0]
+                   and time.monotonic() < limite):
+                transporte.procesar(INTERVALO_LOTE_GUI)
+            # Enviar los acks que el GUI haya agendado antes de cerrar
+            transporte.procesar(INTERVALO_LOTE_GUI)
+        except Exception as e:
+            print(f"GUI consumer: error consumiendo resultados: {e}")
+
+        try:
+            transporte.cerrar()
         except Exception:
             pass
 
@@ -247,10 +521,100 @@ class Dashboard:
         self.baraja_config = None
         self.total = total
         self.log_entries = []
+        self.vistos = {}
+        self.workers = {}
+        self.por_config = {}
+        self.etiquetas = {}
+        self.por_estrategia = {}
+        self.muestreo = 'simple'
+        self.replicas = replicas_vacias()
+        self.suma_jugador = 0
+        self.pasados = 0
         self.bar = tqdm(total=total, desc=f"{BLUE}Progreso de Simulación{ENDC}", unit="sim")
 
+    def print_config_table(self, previo=None):
+        if not self.baraja_config:
+            print(f"{RED}Error: Configuración de baraja no cargada.{ENDC}")
+            return
+
+        try:
+            if isinstance(self.baraja_config, str):
+                baraja_obj = Baraja.from_json(self.baraja_config)
+            else:
+                baraja_obj = Baraja()
+                baraja_obj.config = self.baraja_config
+        except Exception:
+            baraja_obj = Baraja()
+
+        print("\n" + "="*60)
+        print(f"{BLUE}CONFIGURACIÓN DE BARAJA ({baraja_obj.obtener_total()} cartas totales){ENDC}")
+        print("-" * 60)
+        print("| " + " | ".join([f"{v:^4}" for v in baraja_obj.CARTAS_VALORES]) + " |")
+        print("-" * 60)
+        print("| " + " | ".join([f"{baraja_obj.config.get(v,0):^4}" for v in baraja_obj.CARTAS_VALORES]) + " |")
+        if previo is not None and previo['total'] > 0:
+            # Totales de ejecuciones anteriores guardados en la cache
+            total = previo['total']
+            print("-" * 60)
+            print(f"Acumulado previo: {total} sims | V: {previo['VICTORIA'] / total * 100:.2f}% | "
+                  f"D: {previo['DERROTA'] / total * 100:.2f}% | E: {previo['EMPATE'] / total * 100:.2f}%")
+        print("="*60 + "\n")
+
+    def update_workers(self, telemetria):
+        self.workers[telemetria['worker']] = (time.monotonic(), telemetria)
+
+    def print_workers_table(self):
+        # tqdm.write no rompe la barra de progreso
+        filas = filas_workers(self.workers)
+        if not filas:
+            return
+        tqdm.write("\n" + f"{'Worker':<28} {'Sims/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'Vuelo':>6} {'Total':>9}  Estado")
+        for worker, sims_s, p50, p99, en_vuelo, total, estado in filas:
+            color = RED if estado != 'ok' else ENDC
+            tqdm.write(f"{color}{worker:<28} {sims_s:>9.0f} {p50:>8.2f} {p99:>8.2f} {en_vuelo:>6} {total:>9}  {estado}{ENDC}")
+
+    def print_barrido_table(self):
+        if not self.etiquetas:
+            return
+        tqdm.write("\n" + f"{'Configuracion':<24} {'Sims':>10} {'V %':>8} {'+/- %':>7}")
+        for etiqueta, total, win, semiancho in filas_barrido(self.por_config, self.etiquetas):
+            tqdm.write(f"{etiqueta:<24} {total:>10} {GREEN}{win:>8.2f}{ENDC} {semiancho:>7.2f}")
+
+    def print_estrategias_table(self):
+        if not self.por_estrategia:
+            return
+        tqdm.write("\n" + f"{'Estrategia':<16} {'Sims':>10} {'V %':>8} {'Neto':>8} {'Dif':>8} {'+/-':>7}")
+        for nombre, total, win, neto, diferencia, semiancho in filas_estrategias(self.por_estrategia):
+            tqdm.write(f"{nombre:<16} {total:>10} {GREEN}{win:>8.2f}{ENDC} {neto:>+8.4f} {diferencia:>+8.4f} {semiancho:>7.4f}")
+
     def update_stats(self, result_data):
+        if 'objetivo' in result_data:
+            # El productor adaptativo detuvo el despacho: nuevo total esperado
+            self.total = result_data['objetivo']
+            if self.bar is not None:
+                self.bar.total = self.total
+                self.bar.refresh()
+            return
+
+        if 'lote' in result_data:
+            for item in result_data['lote']:
+                self.update_stats(item)
+            return
+
+        if es_duplicado(result_data, self.vistos):
+            return
+
+        sumar_por_config(self.por_config, result_data)
+        sumar_por_estrategia(self.por_estrategia, result_data)
+        self.suma_jugador += result_data.get('suma_jugador', 0)
+        self.pasados += result_data.get('pasados', 0)
+
+        if 'counts' in result_data:
+            self._update_stats_bloque(result_data)
+            return
+
         result = result_data['result']
+        sumar_replicas(self.replicas, result_data)
         self.total_processed += 1
 
         color = ENDC
@@ -270,6 +634,22 @@ class Dashboard:
         sys.stdout.write(f"\r{color}[LOG]{ENDC} Sim ID {result_data['sim_id']}: {color}{result}{ENDC} | V: {GREEN}{self.victories}{ENDC} | D: {RED}{self.defeats}{ENDC} | E: {YELLOW}{self.ties}{ENDC} | Total: {self.total_processed}")
         sys.stdout.flush()
 
+    def _update_stats_bloque(self, result_data):
+        # Suma los conteos de un bloque de escenarios (sim_range) o de un registro parcial (rangos)
+        counts = result_data['counts']
+        sumar_replicas(self.replicas, result_data)
+        n = sum(counts.values())
+        self.victories += counts.get('VICTORIA', 0)
+        self.defeats += counts.get('DERROTA', 0)
+        self.ties += counts.get('EMPATE', 0)
+        self.total_processed += n
+
+        if self.bar is not None:
+            self.bar.update(n)
+
+        sys.stdout.write(f"\r{BLUE}[LOG]{ENDC} Sims {describir_rangos(result_data)} | V: {GREEN}{self.victories}{ENDC} | D: {RED}{self.defeats}{ENDC} | E: {YELLOW}{self.ties}{ENDC} | Total: {self.total_processed}")
+        sys.stdout.flush()
+
     def final_report(self):
         if self.bar is not None:
             self.bar.close()
@@ -290,8 +670,16 @@ class Dashboard:
         print(f"Empates:   {YELLOW}{self.ties}{ENDC} ({tie_prob:.2f}%)")
         print("-" * 60)
         print(f"{GREEN}PROBABILIDAD DE GANAR: {win_prob:.2f}%{ENDC}")
+        lo, hi, metodo = intervalo_victoria(self)
+        print(f"IC 95%: [{lo * 100:.2f}%, {hi * 100:.2f}%] ({metodo}, muestreo {self.muestreo})")
+        jugador = resumen_jugador(self)
+        if jugador is not None:
+            print(f"Puntaje medio del jugador: {jugador[0]:.2f} | Se pasa: {jugador[1]:.2f}%")
         print("="*60)
         self.print_chart(win_prob, lose_prob, tie_prob)
+        self.print_barrido_table()
+        self.print_estrategias_table()
+        self.print_workers_table()
 
     def print_chart(self, win, lose, tie):
         print(f"\n{BLUE}Distribución de Resultados:{ENDC}")
@@ -303,77 +691,194 @@ class Dashboard:
         print(f"Derrota:  {RED}{lose_bar}{ENDC} {lose:.2f}%")
         print(f"Empate:   {YELLOW}{tie_bar}{ENDC} {tie:.2f}%")
 
-def run_dashboard():
+def run_dashboard(total=NUM_SIMULATIONS, hasta=None, use_gui=True, broker=None, baraja_config=None, usar_cache=True):
 
     try:
-        connection = pika.BlockingConnection(pika.ConnectionParameters('localhost'))
+        transporte = conectar(broker)
     except Exception as e:
-        print(f"No fue posible conectar a RabbitMQ")
+        print(f"No fue posible conectar al broker")
         return
 
-    channel = connection.channel()
-    channel.queue_declare(queue='baraja', durable=True)
-    channel.queue_declare(queue='resultados', durable=False)
-
-    print("Esperando baraja...")
-    method_frame, header_frame, body = channel.basic_get('baraja', auto_ack=True)
-    while body is None:
-        time.sleep(1)
-        method_frame, header_frame, body = channel.basic_get('baraja', auto_ack=True)
-
-    if isinstance(body, bytes):
-        baraja_payload = body.decode('utf-8')
-    else:
-        baraja_payload = body
-    use_gui = _HAS_GUI and not any(arg in ('--nogui', 'nogui') for arg in sys.argv)
+    transporte.declarar('resultados', durable=False)
+    transporte.declarar_fanout(EXCHANGE_RESULTADOS, ['resultados'])
+
+    modelo = {}
+    if baraja_config is None:
+        # El modelo vigente se lee sin consumirlo; si aun no hay, llega por push
+        print("Esperando baraja...")
+        modelo = SuscripcionModelo(transporte).esperar()
+        baraja_config = modelo['config']
+    baraja_payload = json.dumps(baraja_config)
+    # En un barrido -n es por configuracion
+    configs = modelo.get('configs', {})
+    etiquetas = modelo.get('etiquetas', {})
+    if configs:
+        total *= len(configs)
+    if modelo.get('continuo'):
+        # Corrida sin tamano fijo: el productor avisa el total al terminar ({'objetivo': n})
+        total = math.inf
+    # Las rondas de un zapato no son independientes: el intervalo tambien se estima por bloques
+    muestreo = modelo.get('muestreo', 'zapato' if modelo.get('zapato') else 'simple')
+    use_gui = use_gui and _HAS_GUI
+
+    # Totales previos de esta baraja guardados en la cache en disco; la cache guarda
+    # resultados de la regla fija con una baraja por partida, asi que no se usa cuando se
+    # evaluan estrategias ni en modo zapato
+    cache = CacheResultados() if usar_cache and not modelo.get('estrategias') and not modelo.get('zapato') else None
+    previo = cache.obtener(baraja_config) if cache is not None and not configs else None
+    if hasta is not None and previo is not None:
+        total = max(0, hasta - previo['total'])
+
+    def acumular(tablero):
+        if cache is None:
+            return
+        if configs:
+            # Cada configuracion del barrido se acumula por separado
+            for clave, conteos in tablero.por_config.items():
+                if clave in configs:
+                    cache.acumular(configs[clave], conteos.get('VICTORIA', 0), conteos.get('DERROTA', 0),
+                                   conteos.get('EMPATE', 0), sum(conteos.values()))
+        else:
+            cache.acumular(baraja_config, tablero.victories, tablero.defeats, tablero.ties, tablero.total_processed)
+        cache.close()
     
     if use_gui:
 
         print("Iniciando Dashboard")
-        gui = GuiDashboard(total=NUM_SIMULATIONS)
+        gui = GuiDashboard(total=total)
         gui.set_config(baraja_payload)
+        gui.etiquetas = etiquetas
+        gui.muestreo = muestreo
+        if previo is not None:
+            gui.set_previo(previo)
 
-        consumer_thread = _start_consumer_thread_for_gui('localhost', 'resultados', gui)
+        consumer_thread = _start_consumer_thread_for_gui('resultados', gui, broker)
         gui.start()
         gui.final_report()
+        acumular(gui)
         try:
             consumer_thread.join(timeout=0.1)
         except Exception:
             pass
-        connection.close()
-        return
+        transporte.cerrar()
+        return gui
 
     else:
         print("Iniciando Dashboard en modo Consola...")
-        dashboard = Dashboard(total=NUM_SIMULATIONS)
+        dashboard = Dashboard(total=total)
         dashboard.baraja_config = baraja_payload
-        dashboard.print_config_table()
-        print(f"DASHBOARD: Se realizarán {NUM_SIMULATIONS} pruebas.\n")
-        def callback(ch, method, properties, body):
-            if isinstance(body, bytes):
-                body = body.decode('utf-8')
-            result_data = json.loads(body)
+        dashboard.etiquetas = etiquetas
+        dashboard.muestreo = muestreo
+        dashboard.print_config_table(previo)
+        if math.isinf(total):
+            print("DASHBOARD: Corrida continua, se espera el total del productor.\n")
+        else:
+            print(f"DASHBOARD: Se realizarán {total} pruebas.\n")
+        def callback(mensaje):
+            result_data = decodificar(mensaje.cuerpo, mensaje.content_type)
             dashboard.update_stats(result_data)
-            ch.basic_ack(delivery_tag=method.delivery_tag)
+            transporte.ack(mensaje.tag)
 
-            if dashboard.total_processed >= NUM_SIMULATIONS:
-                ch.stop_consuming()
+            if dashboard.total_processed >= dashboard.total:
+                transporte.detener()
 
-        channel.basic_consume(queue='resultados', on_message_callback=callback, auto_ack=False)
+        def callback_telemetria(mensaje):
+            dashboard.update_workers(decodificar(mensaje.cuerpo, mensaje.content_type)['telemetria'])
+
+        def imprimir_workers():
+            dashboard.print_barrido_table()
+            dashboard.print_estrategias_table()
+            dashboard.print_workers_table()
+            transporte.programar(INTERVALO_TABLA_WORKERS, imprimir_workers)
+
+        transporte.consumir('resultados', callback)
+        transporte.consumir(transporte.suscribir(EXCHANGE_ESTADISTICAS), callback_telemetria, auto_ack=True)
+        transporte.programar(INTERVALO_TABLA_WORKERS, imprimir_workers)
         
         try:
-            channel.start_consuming()
+            transporte.iniciar()
         except KeyboardInterrupt:
             print("\nInterrumpido por el usuario.")
         finally:
             dashboard.final_report()
-            connection.close()
-
+            acumular(dashboard)
+            transporte.cerrar()
+        return dashboard
+
+
+def run_replay(rutas, use_gui=True):
+    """Reconstruye el reporte final y las graficas desde registros binarios de resultados.
+
+    Los archivos se separan por configuracion, muestreo y zapato (registro.agrupar_registros)
+    y cada grupo tiene su propio reporte; con varios grupos el reporte es en consola.
+    Regresa la lista de tableros, uno por grupo.
+    """
+    grupos = agrupar_registros(rutas)
+    if use_gui and len(grupos) > 1:
+        print(f"Los archivos son de {len(grupos)} configuraciones o muestreos distintos: se reporta cada uno en consola.")
+        use_gui = False
+    return [_replay_grupo(metadatos, rutas_grupo, use_gui) for metadatos, rutas_grupo in grupos.values()]
+
+def _replay_grupo(metadatos, rutas, use_gui):
+    inicio = time.perf_counter()
+    resumen = resumir_registros(rutas)
+    duracion = time.perf_counter() - inicio
+    # Igual que en vivo: con muestreo o zapato las partidas de un bloque no son independientes
+    # y el intervalo sale de las replicas por bloque
+    muestreo = 'zapato' if metadatos.get('zapato') else metadatos.get('muestreo', 'simple')
+    nombre = metadatos.get('etiqueta') or metadatos['clave'][:12]
+    lineas = [f"Configuracion {nombre} (modelo {metadatos.get('modelo')}, muestreo {muestreo})"]
+    if metadatos.get('estrategia'):
+        lineas.append(f"Partidas de la estrategia {metadatos['estrategia']}")
+    lineas += [f"Worker {worker}: {n} partidas" for worker, n in sorted(resumen['workers'].items())]
+    lineas.append(f"{resumen['total']} partidas de {len(rutas)} archivo(s) leidas en {duracion:.2f}s")
+
+    if use_gui and _HAS_GUI:
+        gui = GuiDashboard(total=resumen['total'])
+        gui.set_config(json.dumps(metadatos['config']))
+        gui.muestreo = muestreo
+        cargar_resumen(gui, resumen)
+        gui.log_lines.extend(lineas)
+        gui._update_stats_widgets()
+        gui._update_log_widget()
+        gui.start()
+        gui.final_report()
+        return gui
+
+    dashboard = Dashboard(total=resumen['total'])
+    dashboard.baraja_config = json.dumps(metadatos['config'])
+    dashboard.muestreo = muestreo
+    cargar_resumen(dashboard, resumen)
+    if dashboard.bar is not None:
+        dashboard.bar.update(resumen['total'])
+    for linea in lineas:
+        print(linea)
+    dashboard.print_config_table()
+    dashboard.final_report()
+    if resumen['total']:
+        print(f"\n{BLUE}Puntaje final del jugador:{ENDC}")
+        for puntaje, n in sorted(resumen['jugador'].items()):
+            porcentaje = n / resumen['total'] * 100
+            print(f"{puntaje:>3}: {'#' * int(porcentaje)} {porcentaje:.2f}%")
+    return dashboard
 
 if __name__ == '__main__':
-    mode = sys.argv[1] if len(sys.argv) > 1 else 'dashboard'
+    parser = argparse.ArgumentParser(description='Dashboard de la simulacion de BlackJack')
+    parser.add_argument('mode', nargs='?', default='dashboard',
+                        help="'replay' reconstruye el reporte desde registros binarios (consumidor.py --registro)")
+    parser.add_argument('archivos', nargs='*', help='replay: archivos de registro binario')
+    parser.add_argument('--nogui', action='store_true', help='usa el dashboard de consola')
+    parser.add_argument('-n', '--total', type=int, default=NUM_SIMULATIONS,
+                        help='simulaciones que se esperan en esta ejecucion')
+    parser.add_argument('--hasta', type=int, default=None,
+                        help='espera las simulaciones que faltan para llegar a N en la cache (igual que pro.py --hasta)')
+    args = parser.parse_args()
     
-    if mode in ('consumer', 'c'):
+    if args.mode in ('consumer', 'c'):
         sys.exit(1)
+    elif args.mode == 'replay':
+        if not args.archivos:
+            parser.error('replay requiere al menos un archivo de registro')
+        run_replay(args.archivos, use_gui=not args.nogui)
     else:
-        run_dashboard()
+        run_dashboard(total=args.total, hasta=args.hasta, use_gui=not (args.nogui or args.mode == 'nogui'))
@@ -1,5 +1,14 @@
 import json
 import random
+import hashlib
+from functools import lru_cache
+
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    np = None
+    _HAS_NUMPY = False
 
 # Configurar baraja
 # Baraja de base clasica de poker
@@ -46,12 +55,25 @@ class Baraja:
     def to_json(self):
         return json.dumps(self.config)
 
+    def clave(self):
+        """Hash canonico de la configuracion (ver clave_config)."""
+        return clave_config(self.config)
+
+    def compilar(self):
+        """Regresa la baraja como tupla de rangos enteros (ver compilar_baraja)."""
+        return compilar_baraja(self.config)
+
     @classmethod
     def from_json(cls, json_data):
         instance = cls()
         instance.config = json.loads(json_data)
         return instance
 
+def clave_config(baraja_config):
+    """Hash canonico (sha256) de una configuracion, independiente del orden de las cartas."""
+    canonico = json.dumps(baraja_config, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
 # --- Funciones de Lógica de Blackjack ---
 
 def get_valor_carta(carta):
@@ -73,50 +95,565 @@ def calcular_mano(mano):
         
     return value
 
-def simulate_blackjack(baraja_config):
-    #Crear una baraja para la simulación
-    deck = []
-    for card_value, count in baraja_config.items():
-        deck.extend([card_value] * count)
-        
-    random.shuffle(deck)
+# --- Representacion compacta de la baraja ---
+# Cada carta se codifica como su rango (indice en CARTAS_VALORES) y su valor
+# sale de una tabla precalculada; una mano es el par (total, ases_blandos).
+
+RANGO_CARTA = {carta: rango for rango, carta in enumerate(Baraja.CARTAS_VALORES)}
+VALOR_RANGO = tuple(get_valor_carta(carta) for carta in Baraja.CARTAS_VALORES)
+RANGO_AS = RANGO_CARTA['A']
+MANO_VACIA = (0, 0)
+
+def agregar_carta(mano, rango):
+    """Agrega una carta a la mano (total, ases_blandos) en O(1)."""
+    total, blandos = mano
+    total += VALOR_RANGO[rango]
+    if rango == RANGO_AS:
+        blandos += 1
+    # Ajustar el valor de los Ases de 11 a 1 si es necesario
+    while total > 21 and blandos > 0:
+        total -= 10
+        blandos -= 1
+    return total, blandos
+
+@lru_cache(maxsize=64)
+def _plantilla_baraja(items):
+    plantilla = []
+    for carta, count in items:
+        plantilla.extend([RANGO_CARTA[carta]] * count)
+    return tuple(plantilla)
+
+def compilar_baraja(baraja_config):
+    """Convierte una configuracion {carta: cantidad} en una tupla de rangos enteros.
+
+    El resultado se cachea por configuracion, asi que llamadas repetidas no reconstruyen la baraja.
+    Una baraja ya compilada (tupla) se regresa tal cual, de modo que los simuladores aceptan ambas.
+    """
+    if isinstance(baraja_config, tuple):
+        return baraja_config
+    return _plantilla_baraja(tuple(baraja_config.items()))
+
+MAZOS_TRABAJO = 64 # Copias mutables de plantillas que se conservan para simulate_blackjack
+CARTAS_POR_PASO = 8  # Posiciones que se barajan de una vez (alcanzan para una partida tipica)
+BARAJADO_COMPLETO = 156 # Con un numpy Generator, las barajas de hasta este tamano se barajan completas
+_mazos_trabajo = {}  # id(plantilla) -> (plantilla, copia mutable)
+
+def _mazo_trabajo(plantilla):
+    # Copia mutable de la plantilla compilada. simulate_blackjack la desordena solo en las
+    # posiciones que reparte y la restaura al terminar, asi que nunca se vuelve a copiar.
+    # Se indexa por identidad para no recorrer la plantilla al calcular su hash; la entrada
+    # guarda la plantilla, asi que su id no se reutiliza. Cada proceso consumidor simula en
+    # un solo hilo, por lo que la copia no se comparte.
+    entrada = _mazos_trabajo.get(id(plantilla))
+    if entrada is None:
+        if len(_mazos_trabajo) >= MAZOS_TRABAJO:
+            _mazos_trabajo.clear()
+        entrada = _mazos_trabajo[id(plantilla)] = (plantilla, list(plantilla))
+    return entrada[1]
+
+def _barajar_parcial(deck, inicio, aleatorios, intercambios):
+    """Pasos de Fisher-Yates para las posiciones inicio.. (hasta CARTAS_POR_PASO); regresa la nueva frontera.
+
+    Cada intercambio se anota en `intercambios` para poder deshacerlo.
+    """
+    num_cartas = len(deck)
+    fin = min(inicio + CARTAS_POR_PASO, num_cartas)
+    for i, u in zip(range(inicio, fin), aleatorios(fin - inicio)):
+        j = i + int(u * (num_cartas - i))
+        deck[i], deck[j] = deck[j], deck[i]
+        intercambios.append(j)
+    return fin
+
+def anotar_detalle(detalle, suma_jugador, pasados):
+    """Acumula en `detalle` la suma de puntajes finales del jugador y las veces que se paso.
+
+    Si `detalle` trae una lista en 'partidas', los motores le agregan ademas trozos
+    (codigos de resultado, puntajes del jugador, puntajes del crupier) con cada partida
+    en el orden en que se jugo; el codigo es la posicion en RESULTADOS.
+    """
+    detalle['suma_jugador'] = detalle.get('suma_jugador', 0) + suma_jugador
+    detalle['pasados'] = detalle.get('pasados', 0) + pasados
+
+def anotar_partida(detalle, resultado, jugador, crupier):
+    """Anota en `detalle` (si se pasa) una partida jugada una por una y regresa `resultado`."""
+    if detalle is not None:
+        anotar_detalle(detalle, jugador, int(jugador > 21))
+        partidas = detalle.get('partidas')
+        if partidas is not None:
+            partidas.append(((RESULTADOS.index(resultado),), (jugador,), (crupier,)))
+    return resultado
+
+def simulate_blackjack(baraja_config, rng=None, detalle=None):
+    # rng: cualquier objeto con random() (random.Random, numpy Generator); por defecto el modulo random
+    # detalle: diccionario opcional donde se acumulan el puntaje del jugador y si se paso
+    rng = random if rng is None else rng
+    plantilla = compilar_baraja(baraja_config)
+    num_cartas = len(plantilla)
+    if num_cartas < 4:
+        return "ERROR_NO_CARTAS"
+
+    intercambios = []
+    generador = _HAS_NUMPY and isinstance(rng, np.random.Generator)
+    if generador and num_cartas <= BARAJADO_COMPLETO:
+        # Con un Generator, barajar en C una baraja chica completa cuesta menos que los pasos
+        # de Fisher-Yates en Python (es la ruta de los consumidores con semilla)
+        deck = list(plantilla)
+        rng.shuffle(deck)
+        barajadas = num_cartas
+        aleatorios = None # No se pide ningun paso de Fisher-Yates
+    else:
+        if generador:
+            # Una sola llamada a numpy por paso de barajado
+            def aleatorios(k):
+                return rng.random(k).tolist()
+        else:
+            def aleatorios(k):
+                return [rng.random() for _ in range(k)]
+
+        # La baraja no se copia ni se baraja completa: solo se barajan (Fisher-Yates perezoso)
+        # las posiciones que se reparten y al final se deshacen los intercambios
+        deck = _mazo_trabajo(plantilla)
+        barajadas = 0
 
-    #Repartir manos
     try:
-        # Se extraen 4 cartas para jugador y dealer
-        player_hand = [deck.pop(), deck.pop()]
-        dealer_hand = [deck.pop(), deck.pop()]
-    except IndexError:
-        return "ERROR_NO_CARTAS" 
-    
+        if not barajadas:
+            barajadas = _barajar_parcial(deck, 0, aleatorios, intercambios)
+
+        #Repartir manos: cartas 0-1 al jugador, 2-3 al crupier
+        player = agregar_carta(agregar_carta(MANO_VACIA, deck[0]), deck[1])
+        dealer = agregar_carta(agregar_carta(MANO_VACIA, deck[2]), deck[3])
+        siguiente = 4
+
+        #Turno del Jugador (Pide hasta 17 o se pasa)
+        while player[0] < 17 and siguiente < num_cartas:
+            if siguiente == barajadas:
+                barajadas = _barajar_parcial(deck, barajadas, aleatorios, intercambios)
+            player = agregar_carta(player, deck[siguiente])
+            siguiente += 1
+
+        player_score = player[0]
+
+        if player_score > 21:
+            return anotar_partida(detalle, "DERROTA", player_score, dealer[0])
+
+        #Turno del Crupier (Pide hasta 17 o se pasa)
+        while dealer[0] < 17 and siguiente < num_cartas:
+            if siguiente == barajadas:
+                barajadas = _barajar_parcial(deck, barajadas, aleatorios, intercambios)
+            dealer = agregar_carta(dealer, deck[siguiente])
+            siguiente += 1
+
+        dealer_score = dealer[0]
+
+        if dealer_score > 21:
+            return anotar_partida(detalle, "VICTORIA", player_score, dealer_score)
+
+        #Comparar resultados
+        if player_score > dealer_score:
+            return anotar_partida(detalle, "VICTORIA", player_score, dealer_score)
+        elif player_score < dealer_score:
+            return anotar_partida(detalle, "DERROTA", player_score, dealer_score)
+        else:
+            return anotar_partida(detalle, "EMPATE", player_score, dealer_score)
+    finally:
+        # Deshacer los intercambios en orden inverso deja la plantilla intacta
+        for i in range(len(intercambios) - 1, -1, -1) if intercambios else ():
+            j = intercambios[i]
+            deck[i], deck[j] = deck[j], deck[i]
+
+# --- Probabilidades exactas ---
+# Las politicas de jugador y crupier son fijas (piden hasta 17), asi que el
+# resultado para una composicion de baraja se puede calcular exactamente
+# recorriendo todas las extracciones posibles. Las cartas con el mismo valor
+# (10, J, Q, K) son equivalentes, por lo que el estado es el conteo restante
+# por valor.
+
+VALORES_DISTINTOS = tuple(sorted(set(VALOR_RANGO)))
+TAMANO_CACHE_EXACTO = 2 ** 18
+
+def _sumar_valor(total, blandos, valor):
+    total += valor
+    if valor == 11:
+        blandos += 1
+    while total > 21 and blandos > 0:
+        total -= 10
+        blandos -= 1
+    return total, blandos
+
+def _extracciones(conteo):
+    """Genera (probabilidad, valor, conteo_restante) para la siguiente carta."""
+    n = sum(conteo)
+    for i, c in enumerate(conteo):
+        if c:
+            yield c / n, VALORES_DISTINTOS[i], conteo[:i] + (c - 1,) + conteo[i + 1:]
+
+@lru_cache(maxsize=TAMANO_CACHE_EXACTO)
+def _exacto_crupier(conteo, player_score, dealer_total, dealer_blandos):
+    if dealer_total >= 17 or not any(conteo):
+        if dealer_total > 21 or player_score > dealer_total:
+            return (1.0, 0.0, 0.0)
+        if player_score < dealer_total:
+            return (0.0, 1.0, 0.0)
+        return (0.0, 0.0, 1.0)
+
+    v = d = e = 0.0
+    for p, valor, resto in _extracciones(conteo):
+        rv, rd, re = _exacto_crupier(resto, player_score, *_sumar_valor(dealer_total, dealer_blandos, valor))
+        v += p * rv
+        d += p * rd
+        e += p * re
+    return (v, d, e)
+
+@lru_cache(maxsize=TAMANO_CACHE_EXACTO)
+def _exacto_jugador(conteo, player_total, player_blandos, dealer_total, dealer_blandos):
+    if player_total >= 17 or not any(conteo):
+        if player_total > 21:
+            return (0.0, 1.0, 0.0)
+        return _exacto_crupier(conteo, player_total, dealer_total, dealer_blandos)
+
+    v = d = e = 0.0
+    for p, valor, resto in _extracciones(conteo):
+        total, blandos = _sumar_valor(player_total, player_blandos, valor)
+        rv, rd, re = _exacto_jugador(resto, total, blandos, dealer_total, dealer_blandos)
+        v += p * rv
+        d += p * rd
+        e += p * re
+    return (v, d, e)
+
+def _exacto_reparto(conteo, manos):
+    # Reparte las 4 cartas iniciales en el mismo orden que simulate_blackjack:
+    # dos al jugador y luego dos al crupier
+    if len(manos) == 4:
+        player = _sumar_valor(*_sumar_valor(0, 0, manos[0]), manos[1])
+        dealer = _sumar_valor(*_sumar_valor(0, 0, manos[2]), manos[3])
+        return _exacto_jugador(conteo, *player, *dealer)
+
+    v = d = e = 0.0
+    for p, valor, resto in _extracciones(conteo):
+        rv, rd, re = _exacto_reparto(resto, manos + (valor,))
+        v += p * rv
+        d += p * rd
+        e += p * re
+    return (v, d, e)
+
+def probabilidades_exactas(baraja_config):
+    """Probabilidades exactas de VICTORIA, DERROTA y EMPATE para una configuracion.
+
+    Usa las mismas reglas que simulate_blackjack. Las subpartidas se memorizan en
+    caches LRU indexadas por el conteo restante, de modo que configuraciones
+    parecidas reutilizan trabajo.
+    """
+    conteo = [0] * len(VALORES_DISTINTOS)
+    for carta, count in baraja_config.items():
+        conteo[VALORES_DISTINTOS.index(get_valor_carta(carta))] += count
+
+    if sum(conteo) < 4:
+        return {'ERROR_NO_CARTAS': 1.0}
+
+    v, d, e = _exacto_reparto(tuple(conteo), ())
+    return {'VICTORIA': v, 'DERROTA': d, 'EMPATE': e}
+
+# --- Motor vectorizado (NumPy) ---
+
+RESULTADOS = ('VICTORIA', 'DERROTA', 'EMPATE')
+TAMANO_LOTE = 4096
+
+def _sumar_cartas(total, blandos, cartas):
+    # Suma una carta por juego y ajusta Ases de 11 a 1 donde haga falta
+    total += cartas
+    blandos += cartas == 11
+    ajuste = (total > 21) & (blandos > 0)
+    while ajuste.any():
+        total -= 10 * ajuste
+        blandos -= ajuste
+        ajuste = (total > 21) & (blandos > 0)
+
+def _barajar_lote(valores, m, rng, muestreo='simple'):
+    # m copias de la baraja, cada una barajada por separado (ver MUESTREOS)
+    if muestreo == 'estratificado':
+        return _barajar_estratificado(valores, m, rng)
+    mazos = np.tile(valores, (m, 1))
+    rng.permuted(mazos, axis=1, out=mazos)
+    return mazos
+
+def _jugar_mazos(mazos, pedir=None, siguiente=None, detalle=None, activos=None):
+    """Juega una partida por fila de `mazos` y regresa las mascaras (victorias, derrotas, empates).
+
+    `pedir` es una tabla booleana [blanda, total, carta visible del crupier] con la
+    politica del jugador (ver estrategias.py); None es la regla fija de pedir hasta 17.
+    `siguiente` es la posicion de la primera carta de cada fila (por defecto 0) y se
+    avanza en su lugar hasta despues de la ultima carta usada, para jugar rondas seguidas.
+    Si se pasa `detalle` se acumulan en el los puntajes del jugador (ver anotar_detalle),
+    solo de las filas marcadas en `activos` si se indica.
+    """
+    m, num_cartas = mazos.shape
+    filas = np.arange(m)
+
+    # Repartir manos: cartas 0-1 al jugador, 2-3 al crupier (contadas desde `siguiente`)
+    if siguiente is None:
+        iniciales = mazos[:, :4].T
+        siguiente = np.full(m, 4, dtype=np.int64)
+    else:
+        # Las filas que ya no juegan (zapatos pasados del corte) pueden estar cerca del final:
+        # sus indices se acotan y su resultado se ignora
+        iniciales = [mazos[filas, np.minimum(siguiente + i, num_cartas - 1)] for i in range(4)]
+        siguiente += 4
+    player_total = np.zeros(m, dtype=np.int16)
+    player_blandos = np.zeros(m, dtype=np.int16)
+    dealer_total = np.zeros(m, dtype=np.int16)
+    dealer_blandos = np.zeros(m, dtype=np.int16)
+    _sumar_cartas(player_total, player_blandos, iniciales[0])
+    _sumar_cartas(player_total, player_blandos, iniciales[1])
+    _sumar_cartas(dealer_total, dealer_blandos, iniciales[2])
+    _sumar_cartas(dealer_total, dealer_blandos, iniciales[3])
+
+    if pedir is None:
+        def jugador_pide():
+            return player_total < 17
+    else:
+        visible = iniciales[2]
+
+        def jugador_pide():
+            blanda = (player_blandos > 0).astype(np.intp)
+            return pedir[blanda, np.minimum(player_total, 21), visible] & (player_total <= 21)
+
+    def pedir_cartas(total, blandos, activos, sigue):
+        activos &= siguiente < num_cartas
+        while activos.any():
+            cartas = mazos[filas, np.minimum(siguiente, num_cartas - 1)] * activos
+            _sumar_cartas(total, blandos, cartas)
+            np.add(siguiente, activos, out=siguiente)
+            activos &= sigue() & (siguiente < num_cartas)
+
+    #Turno del Jugador (segun su tabla; por defecto pide hasta 17 o se pasa)
+    pedir_cartas(player_total, player_blandos, jugador_pide(), jugador_pide)
+    player_bust = player_total > 21
+
+    #Turno del Crupier, solo en los juegos donde el jugador no se paso
+    pedir_cartas(dealer_total, dealer_blandos, ~player_bust & (dealer_total < 17), lambda: dealer_total < 17)
+    dealer_bust = dealer_total > 21
+
+    en_juego = ~player_bust & ~dealer_bust
+    victorias = ~player_bust & (dealer_bust | (player_total > dealer_total))
+    derrotas = player_bust | (en_juego & (player_total < dealer_total))
+    empates = en_juego & (player_total == dealer_total)
+    if detalle is not None:
+        jugador = player_total if activos is None else player_total[activos]
+        anotar_detalle(detalle, int(jugador.sum()), int((jugador > 21).sum()))
+        partidas = detalle.get('partidas')
+        if partidas is not None:
+            # Codigos en el orden de RESULTADOS: victoria 0, derrota 1, empate 2
+            codigos = (derrotas + 2 * empates).astype(np.uint8)
+            crupier = dealer_total
+            if activos is not None:
+                codigos, crupier = codigos[activos], dealer_total[activos]
+            partidas.append((codigos, jugador, crupier))
+    return victorias, derrotas, empates
+
+def _jugar_lote(valores, m, rng, muestreo='simple', detalle=None):
+    """Juega m partidas a la vez y regresa los conteos (victorias, derrotas, empates)."""
+    victorias, derrotas, empates = _jugar_mazos(_barajar_lote(valores, m, rng, muestreo), detalle=detalle)
+    return int(victorias.sum()), int(derrotas.sum()), int(empates.sum())
+
+def valores_baraja(baraja_config):
+    """Valores de las cartas de la baraja (compilada o configuracion) como arreglo de NumPy."""
+    return np.array(VALOR_RANGO, dtype=np.int16)[np.array(compilar_baraja(baraja_config), dtype=np.int64)]
+
+def simulate_blackjack_batch(baraja_config, n, rng=None, muestreo='simple', detalle=None):
+    """Juega n partidas con las mismas reglas que simulate_blackjack usando NumPy.
+
+    Regresa un diccionario con los conteos de VICTORIA, DERROTA y EMPATE.
+    rng puede ser una semilla o un numpy.random.Generator; `muestreo` es uno de MUESTREOS.
+    `detalle` acumula el puntaje del jugador y los pasados (ver anotar_detalle).
+    """
+    if not _HAS_NUMPY:
+        raise RuntimeError('simulate_blackjack_batch requiere numpy')
+
+    rng = np.random.default_rng(rng)
+    conteos = dict.fromkeys(RESULTADOS, 0)
+
+    valores = valores_baraja(baraja_config)
+    if valores.size < 4:
+        conteos['ERROR_NO_CARTAS'] = n
+        return conteos
+
+    restantes = n
+    while restantes > 0:
+        m = min(restantes, TAMANO_LOTE)
+        v, d, e = _jugar_lote(valores, m, rng, muestreo, detalle)
+        conteos['VICTORIA'] += v
+        conteos['DERROTA'] += d
+        conteos['EMPATE'] += e
+        restantes -= m
+    return conteos
+
+def simular_conteos(baraja_config, n, rng=None, muestreo='simple', detalle=None):
+    """Juega n partidas y regresa los conteos por resultado.
+
+    Usa el motor vectorizado si numpy esta disponible y si no, repite simulate_blackjack
+    (con muestreo simple: los otros muestreos solo cambian la varianza, no la media).
+    """
+    if _HAS_NUMPY:
+        return simulate_blackjack_batch(baraja_config, n, rng, muestreo, detalle)
+
+    conteos = dict.fromkeys(RESULTADOS, 0)
+    for _ in range(n):
+        resultado = simulate_blackjack(baraja_config, rng, detalle)
+        conteos[resultado] = conteos.get(resultado, 0) + 1
+    return conteos
+
+# --- Modo zapato ---
+# Un zapato son `mazos` copias de la baraja barajadas juntas; se juegan rondas seguidas
+# desde el mismo zapato hasta pasar la marca de penetracion (fraccion del zapato repartida)
+# y entonces se baraja otro. El costo de construir y barajar se reparte entre todas las
+# rondas del zapato, como en una mesa de casino.
+
+ZAPATO_MAZOS = 6
+PENETRACION = 0.75
+CARTAS_POR_RONDA = 6 # Estimacion para decidir cuantos zapatos barajar por lote
+
+def _corte_zapato(num_cartas, penetracion):
+    # Posicion a partir de la cual no se empieza otra ronda; siempre quedan 4 cartas para repartir
+    return max(1, min(int(num_cartas * penetracion), num_cartas - 4))
+
+def jugar_ronda(zapato, inicio=0, detalle=None):
+    """Juega una ronda (regla fija) desde la posicion `inicio`; regresa (resultado, siguiente posicion)."""
+    num_cartas = len(zapato)
+    player = agregar_carta(agregar_carta(MANO_VACIA, zapato[inicio]), zapato[inicio + 1])
+    dealer = agregar_carta(agregar_carta(MANO_VACIA, zapato[inicio + 2]), zapato[inicio + 3])
+    siguiente = inicio + 4
+
     #Turno del Jugador (Pide hasta 17 o se pasa)
-    while calcular_mano(player_hand) < 17:
-        try:
-            player_hand.append(deck.pop())
-        except IndexError:
-            break
-            
-    player_score = calcular_mano(player_hand)
-    
-    if player_score > 21:
-        return "DERROTA"
+    while player[0] < 17 and siguiente < num_cartas:
+        player = agregar_carta(player, zapato[siguiente])
+        siguiente += 1
+    if player[0] > 21:
+        return anotar_partida(detalle, 'DERROTA', player[0], dealer[0]), siguiente
 
     #Turno del Crupier (Pide hasta 17 o se pasa)
-    dealer_score = calcular_mano(dealer_hand)
-    while dealer_score < 17:
-        try:
-            dealer_hand.append(deck.pop())
-            dealer_score = calcular_mano(dealer_hand)
-        except IndexError:
-            break
-
-    if dealer_score > 21:
-        return "VICTORIA"
-
-    #Comparar resultados
-    if player_score > dealer_score:
-        return "VICTORIA"
-    elif player_score < dealer_score:
-        return "DERROTA"
-    else:
-        return "EMPATE"
+    while dealer[0] < 17 and siguiente < num_cartas:
+        dealer = agregar_carta(dealer, zapato[siguiente])
+        siguiente += 1
+
+    if dealer[0] > 21 or player[0] > dealer[0]:
+        return anotar_partida(detalle, 'VICTORIA', player[0], dealer[0]), siguiente
+    if player[0] < dealer[0]:
+        return anotar_partida(detalle, 'DERROTA', player[0], dealer[0]), siguiente
+    return anotar_partida(detalle, 'EMPATE', player[0], dealer[0]), siguiente
+
+def simular_zapato(baraja_config, n, rng=None, mazos=ZAPATO_MAZOS, penetracion=PENETRACION, detalle=None):
+    """Juega n rondas seguidas desde zapatos de `mazos` barajas y regresa los conteos por resultado.
+
+    Con numpy se juegan varios zapatos en paralelo, una ronda de cada uno por paso.
+    """
+    conteos = dict.fromkeys(RESULTADOS, 0)
+    zapato = list(compilar_baraja(baraja_config)) * mazos
+    if len(zapato) < 4:
+        conteos['ERROR_NO_CARTAS'] = n
+        return conteos
+    corte = _corte_zapato(len(zapato), penetracion)
+
+    if not _HAS_NUMPY:
+        rng = random if rng is None else rng
+        posicion = corte
+        for _ in range(n):
+            if posicion >= corte:
+                rng.shuffle(zapato)
+                posicion = 0
+            resultado, posicion = jugar_ronda(zapato, posicion, detalle)
+            conteos[resultado] += 1
+        return conteos
+
+    rng = np.random.default_rng(rng)
+    valores = np.array(VALOR_RANGO, dtype=np.int16)[np.array(zapato, dtype=np.int64)]
+    rondas_por_zapato = max(1, corte // CARTAS_POR_RONDA)
+    restantes = n
+    while restantes > 0:
+        m = min(TAMANO_LOTE, -(-restantes // rondas_por_zapato))
+        zapatos = _barajar_lote(valores, m, rng)
+        siguiente = np.zeros(m, dtype=np.int64)
+        activos = np.ones(m, dtype=bool)
+        while restantes > 0:
+            # Los zapatos que pasaron la marca de penetracion ya no juegan
+            activos &= siguiente < corte
+            if activos.sum() > restantes:
+                activos[np.flatnonzero(activos)[restantes:]] = False
+            if not activos.any():
+                break
+            previo = siguiente.copy()
+            victorias, derrotas, empates = _jugar_mazos(zapatos, None, siguiente, detalle, activos)
+            np.copyto(siguiente, previo, where=~activos)
+            conteos['VICTORIA'] += int((victorias & activos).sum())
+            conteos['DERROTA'] += int((derrotas & activos).sum())
+            conteos['EMPATE'] += int((empates & activos).sum())
+            restantes -= int(activos.sum())
+    return conteos
+
+# --- Muestreo con reduccion de varianza ---
+# Todos los muestreos dan a cada baraja del lote la distribucion de un barajado uniforme,
+# asi que la proporcion de victorias de un bloque sigue siendo un estimador insesgado; lo
+# que cambia es la correlacion entre las barajas del lote, que reduce la varianza del bloque.
+#   estratificado: estratos (cartas del jugador, carta visible del crupier) con su
+#                  probabilidad exacta y asignacion sistematica (proporcional) dentro del lote.
+# Variables antiteticas (la baraja en orden inverso) o claves de hipercubo latino no reducen
+# la varianza aqui: la baraja invertida reparte cartas que la otra partida nunca usa y el
+# orden de las claves no controla las primeras cartas repartidas, que deciden la partida.
+
+MUESTREOS = ('simple', 'estratificado')
+POSICIONES_ESTRATOS = (0, 1, 2) # Cartas del jugador y carta visible del crupier
+
+def pesos_estratos(valores):
+    """Valores distintos de la baraja y probabilidades exactas de los estratos.
+
+    pesos[i, j, k] es la probabilidad de que las dos cartas del jugador valgan distintos[i]
+    y distintos[j] y la carta visible del crupier distintos[k].
+    """
+    distintos, cuentas = np.unique(valores, return_counts=True)
+    total = valores.size
+    identidad = np.eye(distintos.size, dtype=np.int64)
+    primera = cuentas[:, None, None]
+    segunda = (cuentas[None, :] - identidad)[:, :, None]
+    tercera = cuentas[None, None, :] - identidad[:, None, :] - identidad[None, :, :]
+    pesos = primera * segunda * np.maximum(tercera, 0)
+    return distintos, pesos / (total * (total - 1) * (total - 2))
+
+def _barajar_estratificado(valores, m, rng):
+    distintos, pesos = pesos_estratos(valores)
+    # Asignacion sistematica: cada partida cae en un estrato con su probabilidad exacta y
+    # cada estrato recibe m * peso partidas con error de a lo mas una
+    acumulados = np.cumsum(pesos.ravel())
+    puntos = (rng.random() + np.arange(m)) / m
+    estratos = np.searchsorted(acumulados / acumulados[-1], puntos, side='right')
+    objetivo = distintos[np.stack(np.unravel_index(estratos, pesos.shape), axis=1)]
+
+    # Sobre un barajado uniforme, cada posicion estratificada se intercambia con una carta
+    # del valor pedido elegida al azar entre las posiciones libres; el resto de la baraja
+    # queda barajado de forma uniforme
+    mazos = np.tile(valores, (m, 1))
+    rng.permuted(mazos, axis=1, out=mazos)
+    filas = np.arange(m)
+    libres = np.ones(valores.size, dtype=bool)
+    for i, posicion in enumerate(POSICIONES_ESTRATOS):
+        candidatas = (mazos == objetivo[:, i, None]) & libres
+        elegida = (rng.random(m) * candidatas.sum(axis=1)).astype(np.int64)
+        indice = np.argmax(np.cumsum(candidatas, axis=1) > elegida[:, None], axis=1)
+        carta = mazos[filas, posicion]
+        mazos[filas, posicion] = mazos[filas, indice]
+        mazos[filas, indice] = carta
+        libres[posicion] = False
+    return mazos
+
+# --- Flujos aleatorios reproducibles ---
+
+def rng_escenario(semilla, clave):
+    """Generador independiente y reproducible para el escenario `clave` de la corrida `semilla`.
+
+    Con numpy equivale al hijo `clave` de SeedSequence(semilla).spawn(...), asi que no
+    depende del orden en que se procesan los escenarios. Sin numpy se usa un
+    random.Random sembrado con un hash de (semilla, clave).
+    """
+    if _HAS_NUMPY:
+        return np.random.default_rng(np.random.SeedSequence(semilla, spawn_key=(clave,)))
+
+    digest = hashlib.sha256(f"{semilla}:{clave}".encode('utf-8')).digest()
+    return random.Random(int.from_bytes(digest[:16], 'big'))
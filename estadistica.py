@@ -0,0 +1,269 @@
+import math
+from bisect import bisect_right
+
+# Funciones estadisticas compartidas por el productor y los dashboards
+
+Z_95 = 1.959963984540054
+
+def intervalo_wilson(exitos, n, z=Z_95):
+    """Intervalo de confianza de Wilson para una proporcion."""
+    if n <= 0:
+        return 0.0, 1.0
+    p = exitos / n
+    z2 = z * z
+    denominador = 1 + z2 / n
+    centro = (p + z2 / (2 * n)) / denominador
+    margen = z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / denominador
+    return max(0.0, centro - margen), min(1.0, centro + margen)
+
+def intervalo_normal(exitos, n, z=Z_95):
+    """Intervalo de confianza normal (Wald) para una proporcion."""
+    if n <= 0:
+        return 0.0, 1.0
+    p = exitos / n
+    margen = z * math.sqrt(p * (1 - p) / n)
+    return max(0.0, p - margen), min(1.0, p + margen)
+
+INTERVALOS = {'wilson': intervalo_wilson, 'normal': intervalo_normal}
+
+# Estimador por replicas: cada bloque de escenarios es una replica independiente (con
+# muestreo estratificado o en modo zapato las partidas de un bloque estan
+# correlacionadas, pero los bloques no). La proporcion es el estimador de razon
+# sum(x_b) / sum(n_b) y su varianza sale de la dispersion entre bloques, asi que refleja
+# la reduccion de varianza del muestreo. Las sumas se pueden acumular mensaje por mensaje.
+
+def replicas_vacias():
+    return {'bloques': 0, 'n': 0, 'n2': 0, 'x': 0, 'x2': 0, 'xn': 0}
+
+def sumar_replica(replicas, conteos, resultado='VICTORIA'):
+    """Agrega los conteos de un bloque a las sumas de replicas de `resultado`."""
+    n = sum(conteos.values())
+    if n <= 0:
+        return
+    x = conteos.get(resultado, 0)
+    replicas['bloques'] += 1
+    replicas['n'] += n
+    replicas['n2'] += n * n
+    replicas['x'] += x
+    replicas['x2'] += x * x
+    replicas['xn'] += x * n
+
+def sumar_replicas(replicas, result_data, resultado='VICTORIA'):
+    """Agrega las replicas de un resultado a `replicas`.
+
+    Un registro parcial junta varios bloques independientes y trae sus sumas por bloque
+    en 'replicas'; un bloque o un escenario simple cuenta como una sola replica.
+    """
+    if 'replicas' in result_data:
+        for campo, valor in result_data['replicas'].items():
+            replicas[campo] += valor
+    elif 'counts' in result_data:
+        sumar_replica(replicas, result_data['counts'], resultado)
+    elif 'result' in result_data:
+        sumar_replica(replicas, {result_data['result']: 1}, resultado)
+
+def intervalo_replicas(replicas, z=Z_95):
+    """Intervalo de confianza de la proporcion a partir de la varianza entre replicas."""
+    bloques, n = replicas['bloques'], replicas['n']
+    if bloques < 2 or n <= 0:
+        return 0.0, 1.0
+    r = replicas['x'] / n
+    residuos = replicas['x2'] - 2 * r * replicas['xn'] + r * r * replicas['n2']
+    margen = z * math.sqrt(max(0.0, residuos) / (bloques - 1) * bloques) / n
+    return max(0.0, r - margen), min(1.0, r + margen)
+
+def intervalo_media(suma, suma_cuadrados, n, z=Z_95):
+    """Media y semiancho del intervalo normal a partir de la suma y la suma de cuadrados."""
+    if n <= 0:
+        return 0.0, 0.0
+    media = suma / n
+    varianza = max(0.0, suma_cuadrados / n - media * media) * n / (n - 1) if n > 1 else 0.0
+    return media, z * math.sqrt(varianza / n)
+
+def percentil(ordenados, q):
+    """Percentil q (0-100) por rango mas cercano de una lista ya ordenada; 0.0 si esta vacia."""
+    if not ordenados:
+        return 0.0
+    indice = max(0, math.ceil(q / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+def clave_resultado(result_data):
+    """Grupo de un resultado sembrado: (semilla, clave), o None si no trae semilla.
+
+    Los escenarios sembrados son deterministas, asi que dentro de un grupo cada sim_id
+    es siempre la misma simulacion: un sim_id que ya se conto es una reentrega.
+    """
+    if 'semilla' not in result_data:
+        return None
+    # En un barrido los sim_id se repiten entre configuraciones
+    return result_data['semilla'], result_data.get('clave')
+
+def rangos_resultado(result_data):
+    """Rangos [inicio, fin] de sim_id que cubre un resultado (simple, bloque o parcial)."""
+    if 'rangos' in result_data:
+        return result_data['rangos']
+    if 'sim_range' in result_data:
+        return [result_data['sim_range']]
+    if 'sim_id' in result_data:
+        return [[result_data['sim_id'], result_data['sim_id']]]
+    return []
+
+def compactar_rangos(rangos):
+    """Ordena y une los rangos [inicio, fin] que se tocan o se traslapan."""
+    compactos = []
+    for inicio, fin in sorted(rangos):
+        if compactos and inicio <= compactos[-1][1] + 1:
+            compactos[-1][1] = max(compactos[-1][1], fin)
+        else:
+            compactos.append([inicio, fin])
+    return compactos
+
+def _cubierto(cobertura, inicio, fin):
+    # True si [inicio, fin] toca algun intervalo ya registrado
+    inicios, fines = cobertura
+    i = bisect_right(inicios, fin) - 1
+    return i >= 0 and fines[i] >= inicio
+
+def _registrar(cobertura, inicio, fin):
+    # Agrega [inicio, fin] (sin traslape con lo registrado) uniendolo con sus vecinos contiguos
+    inicios, fines = cobertura
+    i = bisect_right(inicios, inicio)
+    izquierda = i > 0 and fines[i - 1] + 1 == inicio
+    derecha = i < len(inicios) and inicios[i] == fin + 1
+    if izquierda and derecha:
+        fines[i - 1] = fines[i]
+        del inicios[i], fines[i]
+    elif izquierda:
+        fines[i - 1] = fin
+    elif derecha:
+        inicios[i] = inicio
+    else:
+        inicios.insert(i, inicio)
+        fines.insert(i, fin)
+
+def es_duplicado(result_data, vistos):
+    """Registra los sim_id del resultado en `vistos` y regresa True si alguno ya se habia visto.
+
+    `vistos` es un diccionario {grupo: cobertura} con los intervalos de sim_id ya contados
+    de cada grupo (ver clave_resultado), unidos cuando son contiguos; asi cuesta lo mismo
+    un escenario simple, un bloque o un registro parcial con varios rangos.
+    """
+    clave = clave_resultado(result_data)
+    if clave is None:
+        return False
+    cobertura = vistos.get(clave)
+    if cobertura is None:
+        cobertura = vistos[clave] = ([], [])
+    rangos = rangos_resultado(result_data)
+    for inicio, fin in rangos:
+        if _cubierto(cobertura, inicio, fin):
+            return True
+    for inicio, fin in rangos:
+        _registrar(cobertura, inicio, fin)
+    return False
+
+def describir_rangos(result_data):
+    """Texto corto con los sim_id de un resultado para las lineas de log."""
+    if 'sim_range' in result_data:
+        return '{}-{}'.format(*result_data['sim_range'])
+    rangos = rangos_resultado(result_data)
+    if not rangos:
+        return '-'
+    texto = ', '.join(f"{inicio}-{fin}" for inicio, fin in rangos[:2])
+    return texto if len(rangos) <= 2 else f"{texto} (+{len(rangos) - 2})"
+
+# Registros parciales: un consumidor junta los resultados de una ventana de tiempo en un
+# registro por grupo (semilla, clave) con los conteos, la suma de puntajes del jugador, las
+# veces que se paso, los rangos de sim_id cubiertos, las sumas por bloque del estimador por
+# replicas y, si hay estrategias, sus conteos y diferencias. Todos los campos son sumas, asi
+# que dos registros se fusionan campo a campo y el dashboard procesa un mensaje por worker y
+# ventana en lugar de uno por resultado sin perder la varianza entre bloques.
+
+def registro_parcial(result_data):
+    """Registro parcial vacio del mismo grupo (semilla, clave) que `result_data`."""
+    parcial = {'rangos': [], 'counts': {}, 'suma_jugador': 0, 'pasados': 0, 'replicas': replicas_vacias()}
+    for campo in ('semilla', 'clave'):
+        if campo in result_data:
+            parcial[campo] = result_data[campo]
+    return parcial
+
+def fusionar_parcial(parcial, result_data):
+    """Suma un resultado (simple, bloque u otro registro parcial) al registro `parcial`.
+
+    Los rangos solo se concatenan; compactar_rangos los ordena y une antes de publicar.
+    """
+    parcial['rangos'].extend(list(rango) for rango in rangos_resultado(result_data))
+    sumar_replicas(parcial['replicas'], result_data)
+    conteos = parcial['counts']
+    if 'counts' in result_data:
+        for resultado, n in result_data['counts'].items():
+            conteos[resultado] = conteos.get(resultado, 0) + n
+    elif 'result' in result_data:
+        conteos[result_data['result']] = conteos.get(result_data['result'], 0) + 1
+    parcial['suma_jugador'] += result_data.get('suma_jugador', 0)
+    parcial['pasados'] += result_data.get('pasados', 0)
+    for nombre, conteos_estrategia in result_data.get('estrategias', {}).items():
+        acumulado = parcial.setdefault('estrategias', {}).setdefault(nombre, {})
+        for resultado, n in conteos_estrategia.items():
+            acumulado[resultado] = acumulado.get(resultado, 0) + n
+    for nombre, (suma, suma_cuadrados) in result_data.get('diferencias', {}).items():
+        acumulado = parcial.setdefault('diferencias', {}).setdefault(nombre, [0, 0])
+        acumulado[0] += suma
+        acumulado[1] += suma_cuadrados
+    return parcial
+
+def conteos_mensaje(result_data, vistos=None):
+    """Conteos por resultado de un mensaje de resultados (simple, bloque, parcial o lote).
+
+    Si se pasa `vistos`, los resultados duplicados no se cuentan.
+    """
+    if 'lote' in result_data:
+        conteos = {}
+        for item in result_data['lote']:
+            for resultado, n in conteos_mensaje(item, vistos).items():
+                conteos[resultado] = conteos.get(resultado, 0) + n
+        return conteos
+    if vistos is not None and es_duplicado(result_data, vistos):
+        return {}
+    if 'counts' in result_data:
+        return dict(result_data['counts'])
+    if 'result' in result_data:
+        return {result_data['result']: 1}
+    return {}
+
+def bloques_mensaje(result_data, vistos=None):
+    """Genera cada bloque, registro parcial o escenario simple de un mensaje de resultados.
+
+    Si se pasa `vistos`, los resultados duplicados se omiten.
+    """
+    if 'lote' in result_data:
+        for item in result_data['lote']:
+            yield from bloques_mensaje(item, vistos)
+        return
+    if vistos is not None and es_duplicado(result_data, vistos):
+        return
+    if 'counts' in result_data or 'result' in result_data:
+        yield result_data
+
+def sumar_por_config(por_config, result_data):
+    """Suma los conteos de un resultado de barrido en por_config[clave] ({resultado: n})."""
+    clave = result_data.get('clave')
+    if clave is None:
+        return
+    conteos = por_config.setdefault(clave, {'VICTORIA': 0, 'DERROTA': 0, 'EMPATE': 0})
+    for resultado, n in conteos_mensaje(result_data).items():
+        conteos[resultado] = conteos.get(resultado, 0) + n
+
+def sumar_por_estrategia(por_estrategia, result_data):
+    """Suma los conteos por estrategia de un resultado y sus diferencias contra la referencia.
+
+    por_estrategia[nombre] es {resultado: n, 'dif': suma, 'dif2': suma de cuadrados}.
+    """
+    for nombre, conteos_estrategia in result_data.get('estrategias', {}).items():
+        acumulado = por_estrategia.setdefault(nombre, {'VICTORIA': 0, 'DERROTA': 0, 'EMPATE': 0, 'dif': 0, 'dif2': 0})
+        for resultado, n in conteos_estrategia.items():
+            acumulado[resultado] = acumulado.get(resultado, 0) + n
+    for nombre, (suma, suma_cuadrados) in result_data.get('diferencias', {}).items():
+        acumulado = por_estrategia[nombre]
+        acumulado['dif'] += suma
+        acumulado['dif2'] += suma_cuadrados
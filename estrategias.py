@@ -0,0 +1,150 @@
+import random
+
+from deck import (_HAS_NUMPY, np, RESULTADOS, TAMANO_LOTE, VALOR_RANGO, MANO_VACIA, agregar_carta,
+                  anotar_partida, compilar_baraja, valores_baraja, _barajar_lote, _jugar_mazos)
+
+# Estrategias del jugador como tablas de consulta: total (duro o blando) x carta visible
+# del crupier -> P (pedir) o Q (quedarse).
+#
+# Definicion compacta: {'duras': {total: fila}, 'blandas': {total: fila}}, donde cada fila
+# tiene una accion por carta visible en el orden 2, 3, ..., 10, A. Los totales que no
+# aparecen siguen la regla fija del juego (pedir hasta 17). Los totales son cadenas para
+# que la definicion viaje igual dentro del modelo JSON.
+#
+# Varias estrategias se evaluan sobre las mismas barajas barajadas (numeros aleatorios
+# comunes): la diferencia entre dos estrategias se mide partida por partida, con mucha
+# menos varianza que comparando dos corridas independientes.
+
+CARTAS_VISIBLES = '23456789TA'
+TOTAL_MAXIMO = 21
+NETO = {'VICTORIA': 1, 'DERROTA': -1, 'EMPATE': 0} # Resultado neto de una partida para el jugador
+
+ESTRATEGIAS = {
+    'hasta17': {},
+    'basica': {
+        'duras': {
+            '12': 'PPQQQPPPPP',
+            '13': 'QQQQQPPPPP',
+            '14': 'QQQQQPPPPP',
+            '15': 'QQQQQPPPPP',
+            '16': 'QQQQQPPPPP',
+        },
+        'blandas': {
+            '17': 'PPPPPPPPPP',
+            '18': 'QQQQQQQPPP',
+        },
+    },
+    'conservadora': {
+        'duras': {str(total): 'QQQQQQQQQQ' for total in range(12, 17)},
+    },
+    'blanda18': {
+        'blandas': {'17': 'PPPPPPPPPP', '18': 'PPPPPPPPPP'},
+    },
+}
+
+def compilar_estrategia(definicion):
+    """Tabla [blanda][total][valor visible] -> pedir, con totales 0-21 y valores visibles 0-11.
+
+    Con numpy la tabla es un arreglo booleano que el motor vectorizado indexa directamente.
+    """
+    tabla = [[[total < 17 for _ in range(12)] for total in range(TOTAL_MAXIMO + 1)] for _ in range(2)]
+    for blanda, tipo in enumerate(('duras', 'blandas')):
+        for total, fila in definicion.get(tipo, {}).items():
+            total = int(total)
+            if not 2 <= total <= TOTAL_MAXIMO or len(fila) != len(CARTAS_VISIBLES) or set(fila) - set('PQ'):
+                raise ValueError(f"Fila invalida en {tipo} {total}: '{fila}'")
+            for columna, accion in enumerate(fila):
+                tabla[blanda][total][columna + 2] = accion == 'P'
+        # Con 21 nunca se pide
+        tabla[blanda][TOTAL_MAXIMO] = [False] * 12
+
+    if _HAS_NUMPY:
+        return np.array(tabla, dtype=bool)
+    return tuple(tuple(tuple(fila) for fila in filas) for filas in tabla)
+
+def compilar_estrategias(definiciones):
+    """Compila {nombre: definicion} conservando el orden; la primera es la referencia."""
+    return {nombre: compilar_estrategia(definicion) for nombre, definicion in definiciones.items()}
+
+def jugar_mazo(mazo, tabla, detalle=None):
+    """Juega una partida sobre una baraja ya barajada (lista de rangos) sin modificarla."""
+    num_cartas = len(mazo)
+    player = agregar_carta(agregar_carta(MANO_VACIA, mazo[0]), mazo[1])
+    dealer = agregar_carta(agregar_carta(MANO_VACIA, mazo[2]), mazo[3])
+    visible = VALOR_RANGO[mazo[2]]
+    siguiente = 4
+
+    #Turno del Jugador (segun la tabla)
+    while siguiente < num_cartas and tabla[player[1] > 0][min(player[0], TOTAL_MAXIMO)][visible]:
+        player = agregar_carta(player, mazo[siguiente])
+        siguiente += 1
+
+    if player[0] > 21:
+        return anotar_partida(detalle, 'DERROTA', player[0], dealer[0])
+
+    #Turno del Crupier (Pide hasta 17 o se pasa)
+    while dealer[0] < 17 and siguiente < num_cartas:
+        dealer = agregar_carta(dealer, mazo[siguiente])
+        siguiente += 1
+
+    if dealer[0] > 21 or player[0] > dealer[0]:
+        return anotar_partida(detalle, 'VICTORIA', player[0], dealer[0])
+    if player[0] < dealer[0]:
+        return anotar_partida(detalle, 'DERROTA', player[0], dealer[0])
+    return anotar_partida(detalle, 'EMPATE', player[0], dealer[0])
+
+def simular_estrategias(baraja_config, n, tablas, rng=None, muestreo='simple', detalle=None):
+    """Juega n barajas y evalua cada estrategia de `tablas` sobre las mismas barajas.
+
+    Regresa (conteos, diferencias): conteos es {nombre: {resultado: n}} y diferencias es
+    {nombre: [suma, suma_cuadrados]} de la diferencia partida a partida del resultado neto
+    (+1 victoria, -1 derrota, 0 empate) contra la primera estrategia. `muestreo` es uno de
+    deck.MUESTREOS (sin numpy siempre es simple). `detalle` acumula los puntajes del
+    jugador con la estrategia de referencia (ver deck.anotar_detalle).
+    """
+    conteos = {nombre: dict.fromkeys(RESULTADOS, 0) for nombre in tablas}
+    diferencias = {nombre: [0, 0] for nombre in list(tablas)[1:]}
+    mazo = list(compilar_baraja(baraja_config))
+    if len(mazo) < 4:
+        for nombre in tablas:
+            conteos[nombre]['ERROR_NO_CARTAS'] = n
+        return conteos, diferencias
+
+    if not _HAS_NUMPY:
+        rng = random if rng is None else rng
+        for _ in range(n):
+            rng.shuffle(mazo)
+            referencia = None
+            for nombre, tabla in tablas.items():
+                resultado = jugar_mazo(mazo, tabla, detalle if referencia is None else None)
+                conteos[nombre][resultado] += 1
+                if referencia is None:
+                    referencia = NETO[resultado]
+                    continue
+                diferencia = NETO[resultado] - referencia
+                diferencias[nombre][0] += diferencia
+                diferencias[nombre][1] += diferencia * diferencia
+        return conteos, diferencias
+
+    rng = np.random.default_rng(rng)
+    valores = valores_baraja(baraja_config)
+    restantes = n
+    while restantes > 0:
+        m = min(restantes, TAMANO_LOTE)
+        mazos = _barajar_lote(valores, m, rng, muestreo)
+        referencia = None
+        for nombre, tabla in tablas.items():
+            victorias, derrotas, empates = _jugar_mazos(mazos, tabla, detalle=detalle if referencia is None else None)
+            conteo = conteos[nombre]
+            conteo['VICTORIA'] += int(victorias.sum())
+            conteo['DERROTA'] += int(derrotas.sum())
+            conteo['EMPATE'] += int(empates.sum())
+            neto = victorias.astype(np.int8) - derrotas
+            if referencia is None:
+                referencia = neto
+                continue
+            diferencia = neto - referencia
+            diferencias[nombre][0] += int(diferencia.sum())
+            diferencias[nombre][1] += int((diferencia * diferencia).sum())
+        restantes -= m
+    return conteos, diferencias
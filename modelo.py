@@ -0,0 +1,128 @@
+import json
+import time
+
+from deck import clave_config
+from protocolo import CONTENT_TYPE_JSON, decodificar
+
+# Distribucion del modelo (configuracion de la baraja).
+#
+# El productor publica {'version', 'hash', 'config'} en el exchange fanout EXCHANGE_MODELO.
+# La cola COLA_MODELO esta ligada a ese exchange con x-max-length=1, asi que guarda solo el
+# ultimo modelo: quien se conecta tarde lo lee con get + requeue sin consumirlo, y los modelos
+# posteriores le llegan por push a su propia cola de suscripcion. Cada escenario lleva la
+# version del modelo con el que se genero (campo 'modelo').
+#
+# Un modelo de barrido agrega 'configs' ({hash: config}) y 'etiquetas' ({hash: texto});
+# sus escenarios indican en 'clave' el hash de la configuracion que deben jugar.
+# Un modelo con 'estrategias' ({nombre: definicion}, ver estrategias.py) pide a los
+# consumidores evaluar todas esas estrategias del jugador sobre las mismas barajas y uno
+# con 'muestreo' (ver deck.MUESTREOS) indica como se barajan las partidas de cada bloque.
+# Con 'zapato' ({'mazos', 'penetracion'}) cada bloque juega rondas seguidas de un zapato.
+# 'continuo' indica una corrida sin tamano fijo: el total llega al final como {'objetivo': n}.
+
+COLA_MODELO = 'modelo'
+EXCHANGE_MODELO = 'modelo.fanout'
+ESPERA_MODELO = 0.05 # Segundos por vuelta mientras se espera el primer modelo
+ESPERA_MODELO_MAX = 1.0 # Espera maxima entre reintentos de lectura del ultimo modelo
+ESPERA_VERSION = 5.0 # Segundos que se espera un modelo mas nuevo que el cargado antes de devolver el escenario
+
+def declarar_modelo(transporte):
+    transporte.declarar(COLA_MODELO, **{'x-max-length': 1})
+    transporte.declarar_fanout(EXCHANGE_MODELO, [COLA_MODELO])
+
+def mensaje_modelo(baraja_config, version=None, barrido=None, estrategias=None, muestreo='simple', zapato=None, continuo=False):
+    """Mensaje de modelo; por defecto la version es el instante de publicacion en ms.
+
+    `barrido` es una lista [(etiqueta, config)] de las configuraciones de un barrido y
+    `estrategias` un diccionario {nombre: definicion} cuya primera entrada es la referencia.
+    """
+    if version is None:
+        version = time.time_ns() // 1_000_000
+    modelo = {'version': version, 'hash': clave_config(baraja_config), 'config': baraja_config}
+    if barrido:
+        modelo['configs'] = {clave_config(config): config for _, config in barrido}
+        modelo['etiquetas'] = {clave_config(config): etiqueta for etiqueta, config in barrido}
+    if estrategias:
+        modelo['estrategias'] = estrategias
+    if muestreo != 'simple':
+        modelo['muestreo'] = muestreo
+    if zapato:
+        modelo['zapato'] = zapato
+    if continuo:
+        modelo['continuo'] = True
+    return modelo
+
+def publicar_modelo(transporte, baraja_config, version=None, barrido=None, estrategias=None, muestreo='simple', zapato=None,
+                    continuo=False):
+    """Publica la configuracion (o el barrido) como nuevo modelo y regresa el mensaje publicado."""
+    modelo = mensaje_modelo(baraja_config, version, barrido, estrategias, muestreo, zapato, continuo)
+    declarar_modelo(transporte)
+    transporte.publicar(COLA_MODELO, json.dumps(modelo).encode('utf-8'), CONTENT_TYPE_JSON, exchange=EXCHANGE_MODELO)
+    return modelo
+
+def leer_modelo(mensaje):
+    """Decodifica un mensaje de modelo y verifica que el hash corresponda a la configuracion."""
+    modelo = decodificar(mensaje.cuerpo, mensaje.content_type)
+    if clave_config(modelo['config']) != modelo['hash']:
+        raise ValueError(f"Hash del modelo {modelo['version']} no corresponde a su configuracion")
+    for clave, config in modelo.get('configs', {}).items():
+        if clave_config(config) != clave:
+            raise ValueError(f"Hash de una configuracion del barrido {modelo['version']} no corresponde")
+    return modelo
+
+def ultimo_modelo(transporte):
+    """Ultimo modelo publicado, sin consumirlo (get + requeue); None si todavia no hay."""
+    mensaje = transporte.obtener(COLA_MODELO, auto_ack=False)
+    if mensaje is None:
+        return None
+    transporte.nack(mensaje.tag, requeue=True)
+    return leer_modelo(mensaje)
+
+class SuscripcionModelo:
+    """Sigue el modelo vigente: el ultimo publicado al suscribirse y cada uno nuevo por push.
+
+    `on_modelo(modelo)` se llama cada vez que llega una version mas nueva que la actual;
+    las versiones repetidas o viejas se ignoran. Los mensajes llegan mientras el transporte
+    procesa eventos (consumir, procesar o iniciar).
+    """
+
+    def __init__(self, transporte, on_modelo=None):
+        self.transporte = transporte
+        self.on_modelo = on_modelo
+        self.modelo = None
+
+        declarar_modelo(transporte)
+        # Primero la suscripcion, para no perder un modelo publicado entre la lectura y el consumo
+        transporte.consumir(transporte.suscribir(EXCHANGE_MODELO), self._on_mensaje, auto_ack=True)
+        self._entregar(ultimo_modelo(transporte))
+
+    @property
+    def version(self):
+        return None if self.modelo is None else self.modelo['version']
+
+    def _on_mensaje(self, mensaje):
+        try:
+            self._entregar(leer_modelo(mensaje))
+        except (ValueError, KeyError) as e:
+            print(f"Modelo invalido descartado: {e}")
+
+    def _entregar(self, modelo):
+        if modelo is None or (self.modelo is not None and modelo['version'] <= self.modelo['version']):
+            return
+        self.modelo = modelo
+        if self.on_modelo is not None:
+            self.on_modelo(modelo)
+
+    def esperar(self):
+        """Procesa eventos hasta tener un modelo y lo regresa.
+
+        Si al suscribirse otro worker tenia tomado (sin confirmar) el ultimo modelo, la lectura
+        inicial regreso None y puede no llegar otro por push: se vuelve a leer con espera creciente.
+        """
+        espera = ESPERA_MODELO
+        while self.modelo is None:
+            self.transporte.procesar(espera)
+            if self.modelo is None:
+                self._entregar(ultimo_modelo(self.transporte))
+                espera = min(espera * 2, ESPERA_MODELO_MAX)
+        return self.modelo
@@ -1,18 +1,393 @@
 import time
-import json
-import pika
 import sys
-from deck import Baraja
-
-try:
-    import pika
-    _HAS_PIKA = True
-except Exception:
-    _HAS_PIKA = False
+import argparse
+import secrets
+import io
+import itertools
+import contextlib
+from collections import deque
+from deck import Baraja, probabilidades_exactas, MUESTREOS, PENETRACION
+from cache_resultados import CacheResultados
+from estadistica import INTERVALOS, bloques_mensaje, conteos_mensaje, replicas_vacias, sumar_replicas, intervalo_replicas
+from protocolo import FORMATOS, CONTENT_TYPE_JSON, codificar, decodificar
+from transporte import conectar, pika, _HAS_PIKA # pika es None sin la libreria; el transporte local no la usa
+from modelo import publicar_modelo
+from estrategias import ESTRATEGIAS
 
 SIMULACIONES = 10000
+TAMANO_BLOQUE = 100 # Simulaciones por mensaje (1 = un mensaje por juego)
+VENTANA_CONFIRMACION = 1000 # Mensajes sin confirmar en vuelo en modo rapido
+UMBRAL_EXACTO = 20 # Barajas de hasta este tamaño se resuelven sin despachar escenarios
+EXCHANGE_RESULTADOS = 'resultados.fanout' # Los consumidores publican aqui; la cola 'resultados' esta ligada
+MINIMO_ADAPTATIVO = 1000 # Simulaciones antes de evaluar el criterio de paro
+BLOQUES_EN_VUELO = 20 # Mensajes despachados sin resultado en modo adaptativo
+MARCA_BAJA = 1000 # Mensajes en 'escenarios' por debajo de los cuales se rellena la cola
+MARCA_ALTA = 5000 # Mensajes en 'escenarios' hasta los que se rellena
+ESPERA_MARCAS = 0.1 # Segundos entre mediciones de la cola
+
+def rangos_escenarios(simulaciones, bloque, primero=1):
+    """Genera los rangos [inicio, fin] de cada mensaje, numerados desde `primero`; sin fin si `simulaciones` es None."""
+    bloque = max(1, bloque)
+    if simulaciones is None:
+        for inicio in itertools.count(primero, bloque):
+            yield inicio, inicio + bloque - 1
+        return
+    ultimo = primero + simulaciones - 1
+    for inicio in range(primero, ultimo + 1, bloque):
+        yield inicio, min(inicio + bloque - 1, ultimo)
+
+_PROPIEDADES = {}
+
+def propiedades_mensaje(content_type):
+    """BasicProperties transitorias por content_type, construidas una sola vez."""
+    if content_type not in _PROPIEDADES:
+        _PROPIEDADES[content_type] = pika.BasicProperties(delivery_mode=pika.DeliveryMode.Transient, content_type=content_type)
+    return _PROPIEDADES[content_type]
+
+def mensaje_escenario(inicio, fin, bloque, semilla=None, formato=CONTENT_TYPE_JSON, modelo=None, clave=None):
+    """Regresa (cuerpo, content_type) del escenario [inicio, fin] generado con la version `modelo`.
+
+    En un barrido, `clave` es el hash de la configuracion del escenario.
+    """
+    if bloque > 1:
+        # Un mensaje cubre el rango [inicio, fin] de simulaciones
+        escenario = {'sim_range': [inicio, fin]}
+    else:
+        escenario = {'sim_id': inicio}
+    if semilla is not None:
+        # El consumidor deriva el flujo aleatorio de (semilla, inicio): ver deck.rng_escenario
+        escenario['semilla'] = semilla
+    if modelo is not None:
+        # Los consumidores descartan escenarios de modelos reemplazados
+        escenario['modelo'] = modelo
+    if clave is not None:
+        escenario['clave'] = clave
+    return codificar(escenario, formato)
+
+def generar_escenarios(simulaciones, bloque, primero=1, semilla=None, formato=CONTENT_TYPE_JSON, modelo=None):
+    """Genera los mensajes (cuerpo, content_type) de forma perezosa, numerados desde `primero`."""
+    for inicio, fin in rangos_escenarios(simulaciones, bloque, primero):
+        yield mensaje_escenario(inicio, fin, bloque, semilla, formato, modelo)
+
+# --- Barridos de parametros ---
+
+def parsear_eje(texto):
+    """Convierte 'A=0-12' o 'A=0,4,8' en ('A', [valores])."""
+    carta, _, valores = texto.partition('=')
+    if carta not in Baraja.CARTAS_VALORES or not valores:
+        raise ValueError(f"Eje de barrido invalido: '{texto}' (se espera CARTA=A-B o CARTA=X,Y,Z)")
+    if '-' in valores:
+        inicio, fin = (int(v) for v in valores.split('-', 1))
+        return carta, list(range(inicio, fin + 1))
+    return carta, [int(v) for v in valores.split(',')]
+
+def expandir_barrido(ejes, base=None):
+    """Aplica con modificar_cantidad cada combinacion de los ejes [(carta, valores)].
+
+    Regresa [(etiqueta, config)]; las combinaciones que modificar_cantidad rechaza se omiten.
+    """
+    configs = []
+    cartas = [carta for carta, _ in ejes]
+    for combinacion in itertools.product(*(valores for _, valores in ejes)):
+        baraja = Baraja(enforce_max=False)
+        if base is not None:
+            baraja.config = dict(base)
+        salida = io.StringIO()
+        with contextlib.redirect_stdout(salida):
+            validos = [baraja.modificar_cantidad(carta, cantidad) for carta, cantidad in zip(cartas, combinacion)]
+        etiqueta = ' '.join(f"{carta}={cantidad}" for carta, cantidad in zip(cartas, combinacion))
+        if not all(validos):
+            print(f"Barrido: se omite {etiqueta}: {salida.getvalue().strip()}")
+            continue
+        configs.append((etiqueta, baraja.config))
+    return configs
+
+def generar_escenarios_barrido(simulaciones, bloque, claves, semilla=None, formato=CONTENT_TYPE_JSON, modelo=None):
+    """Intercala los bloques de todas las configuraciones: el primero de cada una, luego el segundo...
+
+    Asi todos los consumidores avanzan sobre la malla completa en lugar de agotar una
+    configuracion a la vez. Los sim_id se numeran por configuracion.
+    """
+    for inicio, fin in rangos_escenarios(simulaciones, bloque):
+        for clave in claves:
+            yield mensaje_escenario(inicio, fin, bloque, semilla, formato, modelo, clave)
+
+def relleno(pendientes, baja, alta):
+    """Mensajes por publicar con `pendientes` en la cola: solo al bajar de `baja` se rellena hasta `alta`."""
+    return alta - pendientes if pendientes <= baja else 0
+
+def publicar_con_marcas(transporte, mensajes, baja=MARCA_BAJA, alta=MARCA_ALTA, duracion=None):
+    """Publica los mensajes (generador perezoso) manteniendo la cola de escenarios entre las marcas.
+
+    Mide la profundidad de la cola cada ESPERA_MARCAS segundos y la rellena hasta `alta`
+    cada vez que baja de `baja`, asi que el broker nunca guarda mas de `alta` mensajes.
+    Termina al agotarse los mensajes, al pasar `duracion` segundos o con Ctrl-C; regresa
+    cuantos mensajes publico.
+    """
+    mensajes = iter(mensajes)
+    limite = None if duracion is None else time.monotonic() + duracion
+    enviados = 0
+    try:
+        while limite is None or time.monotonic() < limite:
+            profundidad = transporte.profundidad('escenarios')
+            faltan = relleno(profundidad, baja, alta)
+            publicados = 0
+            for cuerpo, content_type in itertools.islice(mensajes, faltan):
+                transporte.publicar('escenarios', cuerpo, content_type)
+                publicados += 1
+            enviados += publicados
+            sys.stdout.write(f"\rPublicados: {enviados} mensajes  En cola: {profundidad + publicados}")
+            sys.stdout.flush()
+            if publicados < faltan:
+                break
+            transporte.procesar(ESPERA_MARCAS)
+    except KeyboardInterrupt:
+        print("\nInterrumpido por el usuario: se deja de publicar.")
+    print()
+    return enviados
+
+class PublicadorConfirmado:
+    """Publica mensajes (cuerpo, content_type) en una cola con publisher confirms asincronos.
+
+    Usa una SelectConnection para no esperar cada publicacion: mantiene hasta
+    `ventana` mensajes sin confirmar en vuelo y rellena la ventana conforme el
+    broker confirma (acks individuales o con multiple=True). Los mensajes
+    rechazados (nack) se vuelven a publicar.
+
+    Con `marcas` (baja, alta) ademas mide la cola cada ESPERA_MARCAS segundos (queue_declare
+    pasivo) y solo publica mientras lo encolado mas lo que falta por confirmar no pase de la
+    marca alta, rellenando cuando baja de la marca baja; asi los mensajes pueden venir de un
+    generador sin fin. Con `duracion` deja de tomar mensajes nuevos a los `duracion` segundos.
+    """
+
+    def __init__(self, mensajes, host='localhost', cola='escenarios', ventana=VENTANA_CONFIRMACION, marcas=None, duracion=None):
+        self.mensajes = iter(mensajes)
+        self.host = host
+        self.cola = cola
+        self.ventana = max(1, ventana)
+        self.marcas = marcas
+        self.duracion_maxima = duracion
+
+        self.publicados = 0
+        self.confirmados = 0
+        self.rechazados = 0
+        self.duracion = 0.0
+        self.error = None
+
+        self._pendientes = {}      # delivery_tag -> (cuerpo, content_type), en orden de tag
+        self._credito = None if marcas is None else 0 # Mensajes que se pueden publicar antes de volver a medir
+        self._reintentos = deque()
+        self._tag = 0
+        self._agotado = False
+        self._cerrando = False
+        self._inicio = None
+        self._conexion = None
+        self._canal = None
+
+    def run(self):
+        self._conexion = pika.SelectConnection(
+            pika.ConnectionParameters(self.host),
+            on_open_callback=self._on_conexion_abierta,
+            on_open_error_callback=self._on_error_conexion,
+            on_close_callback=self._on_conexion_cerrada,
+        )
+        try:
+            self._conexion.ioloop.start()
+        except KeyboardInterrupt:
+            # Se dejan de tomar mensajes nuevos y se esperan las confirmaciones pendientes
+            print("\nInterrumpido por el usuario: se deja de publicar.")
+            self._detener()
+            self._conexion.ioloop.start()
+        return self
+
+    @property
+    def tasa(self):
+        return self.confirmados / self.duracion if self.duracion > 0 else 0.0
+
+    def _on_conexion_abierta(self, conexion):
+        conexion.channel(on_open_callback=self._on_canal_abierto)
+
+    def _on_error_conexion(self, conexion, error):
+        self.error = error
+        conexion.ioloop.stop()
+
+    def _on_conexion_cerrada(self, conexion, razon):
+        if not self._cerrando:
+            self.error = razon
+        conexion.ioloop.stop()
+
+    def _on_canal_abierto(self, canal):
+        self._canal = canal
+        canal.queue_declare(queue=self.cola, durable=True, callback=self._on_cola_declarada)
+
+    def _on_cola_declarada(self, _frame):
+        self._canal.confirm_delivery(ack_nack_callback=self._on_confirmacion, callback=self._on_confirm_activado)
+
+    def _on_confirm_activado(self, _frame):
+        self._inicio = time.perf_counter()
+        if self.duracion_maxima is not None:
+            self._conexion.ioloop.call_later(self.duracion_maxima, self._detener)
+        if self.marcas is not None:
+            self._medir()
+            return
+        self._publicar_ventana()
+
+    def _medir(self):
+        if not self._cerrando:
+            self._canal.queue_declare(queue=self.cola, passive=True, callback=self._on_profundidad)
+
+    def _on_profundidad(self, frame):
+        # Lo publicado sin confirmar quiza aun no aparece en la cola: se cuenta como encolado
+        self._credito = relleno(frame.method.message_count + len(self._pendientes), *self.marcas)
+        self._publicar_ventana()
+        if not self._cerrando:
+            self._conexion.ioloop.call_later(ESPERA_MARCAS, self._medir)
+
+    def _detener(self):
+        self._agotado = True
+        if self._canal is not None and self._inicio is not None:
+            self._publicar_ventana()
 
-def run_productor(publish=True):
+    def _siguiente_mensaje(self):
+        if self._reintentos:
+            return self._reintentos.popleft()
+        if self._agotado:
+            return None
+        try:
+            return next(self.mensajes)
+        except StopIteration:
+            self._agotado = True
+            return None
+
+    def _publicar_ventana(self):
+        while len(self._pendientes) < self.ventana and self._credito != 0:
+            mensaje = self._siguiente_mensaje()
+            if mensaje is None:
+                break
+            cuerpo, content_type = mensaje
+            self._canal.basic_publish(exchange='', routing_key=self.cola, body=cuerpo, properties=propiedades_mensaje(content_type))
+            self._tag += 1
+            self._pendientes[self._tag] = mensaje
+            self.publicados += 1
+            if self._credito is not None:
+                self._credito -= 1
+
+        if self._agotado and not self._pendientes and not self._reintentos:
+            self._terminar()
+
+    def _on_confirmacion(self, frame):
+        metodo = frame.method
+        if metodo.multiple:
+            # Confirma todos los tags hasta delivery_tag; como los tags se agregan en orden
+            # creciente, basta recorrer el inicio del diccionario
+            tags = []
+            for tag in self._pendientes:
+                if tag > metodo.delivery_tag:
+                    break
+                tags.append(tag)
+            cuerpos = [self._pendientes.pop(tag) for tag in tags]
+        else:
+            cuerpo = self._pendientes.pop(metodo.delivery_tag, None)
+            cuerpos = [] if cuerpo is None else [cuerpo]
+
+        if isinstance(metodo, pika.spec.Basic.Nack):
+            self.rechazados += len(cuerpos)
+            self._reintentos.extend(cuerpos)
+        else:
+            self.confirmados += len(cuerpos)
+        self._publicar_ventana()
+
+    def _terminar(self):
+        if self._cerrando:
+            return
+        self._cerrando = True
+        self.duracion = time.perf_counter() - self._inicio
+        self._conexion.close()
+
+def publicar_objetivo(transporte, objetivo):
+    """Avisa al dashboard el total de simulaciones que debe esperar."""
+    cuerpo, content_type = codificar({'objetivo': objetivo})
+    transporte.publicar('resultados', cuerpo, content_type, exchange=EXCHANGE_RESULTADOS)
+
+def run_adaptativo(transporte, simulaciones, bloque, primero, tolerancia, intervalo='wilson', en_vuelo=BLOQUES_EN_VUELO, semilla=None, formato=CONTENT_TYPE_JSON, modelo=None, muestreo='simple'):
+    """Despacha escenarios en lazo cerrado hasta que el intervalo de P(VICTORIA) sea mas angosto que `tolerancia`.
+
+    Observa los resultados con una cola exclusiva ligada al exchange de resultados,
+    mantiene como maximo `en_vuelo` mensajes sin resultado y, al cumplirse el criterio,
+    deja de despachar, purga la cola de escenarios y avisa al dashboard el total efectivo.
+    Con un muestreo de reduccion de varianza (o en modo zapato) el intervalo es el de replicas por bloque.
+    """
+    if muestreo != 'simple':
+        intervalo = 'replicas'
+    calcular_intervalo = INTERVALOS.get(intervalo)
+    bloque = max(1, bloque)
+
+    cola_monitor = transporte.suscribir(EXCHANGE_RESULTADOS)
+
+    estado = {'victorias': 0, 'completadas': 0}
+    replicas = replicas_vacias()
+    vistos = {}
+
+    def on_resultado(mensaje):
+        data = decodificar(mensaje.cuerpo, mensaje.content_type)
+        for resultado in bloques_mensaje(data, vistos):
+            conteos = conteos_mensaje(resultado)
+            estado['victorias'] += conteos.get('VICTORIA', 0)
+            estado['completadas'] += sum(conteos.values())
+            # Un registro parcial trae las sumas de cada bloque que junto
+            sumar_replicas(replicas, resultado)
+
+    transporte.consumir(cola_monitor, on_resultado, auto_ack=True)
+
+    rangos = rangos_escenarios(simulaciones, bloque, primero)
+    despachadas = 0
+    tamanos = [] # Simulaciones de cada mensaje despachado, en orden de publicacion
+    agotado = False
+    lo, hi = 0.0, 1.0
+    print(f"Modo adaptativo: hasta {simulaciones} simulaciones, paro con intervalo {intervalo} de ancho <= {tolerancia}")
+    try:
+        while True:
+            # Mantener la cola alimentada sin adelantarse demasiado a los resultados
+            while not agotado and despachadas - estado['completadas'] < en_vuelo * bloque:
+                try:
+                    inicio, fin = next(rangos)
+                except StopIteration:
+                    agotado = True
+                    break
+                cuerpo, content_type = mensaje_escenario(inicio, fin, bloque, semilla, formato, modelo)
+                transporte.publicar('escenarios', cuerpo, content_type)
+                despachadas += fin - inicio + 1
+                tamanos.append(fin - inicio + 1)
+
+            transporte.procesar(0.2)
+
+            completadas = estado['completadas']
+            if calcular_intervalo is None:
+                lo, hi = intervalo_replicas(replicas)
+            else:
+                lo, hi = calcular_intervalo(estado['victorias'], completadas)
+            sys.stdout.write(f"\rCompletadas: {completadas}/{despachadas}  P(V) en [{lo * 100:.2f}%, {hi * 100:.2f}%]")
+            sys.stdout.flush()
+            if completadas >= MINIMO_ADAPTATIVO and hi - lo <= tolerancia:
+                print("\nIntervalo dentro de la tolerancia: se detiene el despacho.")
+                break
+            if agotado and completadas >= despachadas:
+                print("\nSe alcanzó el máximo de simulaciones sin llegar a la tolerancia.")
+                break
+    except KeyboardInterrupt:
+        print("\nInterrumpido por el usuario.")
+
+    # Descartar lo que quede en la cola; lo ya entregado a consumidores sí se completa
+    # La cola es FIFO: lo purgado son los ultimos mensajes despachados, que pueden incluir el
+    # ultimo bloque, mas corto
+    purgados = transporte.purgar('escenarios')
+    objetivo = max(estado['completadas'], despachadas - sum(tamanos[max(0, len(tamanos) - purgados):]))
+    publicar_objetivo(transporte, objetivo)
+    print(f"{purgados} mensajes purgados de 'escenarios'. Total efectivo: {objetivo} simulaciones. "
+          f"P(VICTORIA) en [{lo * 100:.2f}%, {hi * 100:.2f}%]")
+    transporte.cerrar()
+
+def run_productor(publish=True, simulaciones=SIMULACIONES, bloque=TAMANO_BLOQUE, rapido=False, ventana=VENTANA_CONFIRMACION, exacto=False, hasta=None, tolerancia=None, intervalo='wilson', semilla=None, formato=CONTENT_TYPE_JSON, broker=None, barrido=None, estrategias=None, muestreo='simple', zapato=None, penetracion=PENETRACION, marcas=None, continuo=False, duracion=None):
     print("Iniciando la configuración de la simulación...")
     
     # 1. Configurar la Baraja
@@ -23,59 +398,221 @@ def run_productor(publish=True):
     # baraja.modificar_cantidad('10', 0)
     # -----------------------------------------
 
-    baraja_json = baraja.to_json()
+    configs_barrido = None
+    if barrido:
+        if exacto or hasta is not None or tolerancia is not None:
+            print("El barrido no se combina con --exacto, --hasta ni --tolerancia.")
+            return
+        configs_barrido = expandir_barrido(barrido, baraja.config)
+        if not configs_barrido:
+            print("El barrido no tiene configuraciones validas.")
+            return
+        print(f"Barrido de {len(configs_barrido)} configuraciones, {simulaciones} simulaciones cada una.")
+
+    definiciones = None
+    if estrategias:
+        desconocidas = [nombre for nombre in estrategias if nombre not in ESTRATEGIAS]
+        if desconocidas:
+            print(f"Estrategias desconocidas: {', '.join(desconocidas)} (disponibles: {', '.join(ESTRATEGIAS)}).")
+            return
+        if hasta is not None:
+            print("Las estrategias no se combinan con --hasta (la cache guarda solo la regla fija).")
+            return
+        definiciones = {nombre: ESTRATEGIAS[nombre] for nombre in estrategias}
+        print(f"Estrategias sobre las mismas barajas: {', '.join(definiciones)} (referencia: {estrategias[0]}).")
+
+    parametros_zapato = None
+    if zapato:
+        if exacto or hasta is not None or estrategias or muestreo != 'simple':
+            print("El modo zapato no se combina con --exacto, --hasta, --estrategias ni --muestreo.")
+            return
+        if not 0 < penetracion <= 1:
+            print("La penetracion debe estar entre 0 y 1.")
+            return
+        parametros_zapato = {'mazos': zapato, 'penetracion': penetracion}
+        print(f"Modo zapato: {zapato} barajas, se baraja al repartir el {penetracion:.0%} del zapato.")
+
+    if continuo:
+        if exacto or hasta is not None or tolerancia is not None:
+            print("La corrida continua no se combina con --exacto, --hasta ni --tolerancia.")
+            return
+        # Sin tamano fijo: -n no aplica y la cola siempre se alimenta por marcas de agua
+        simulaciones = None
+        marcas = marcas or (MARCA_BAJA, MARCA_ALTA)
+    if marcas is not None:
+        if tolerancia is not None:
+            print("Las marcas de agua no se combinan con --tolerancia (el modo adaptativo ya limita lo despachado).")
+            return
+        if not 0 <= marcas[0] < marcas[1]:
+            print("Las marcas deben cumplir 0 <= BAJA < ALTA.")
+            return
+        limite = 'sin limite' if continuo else f"{simulaciones} simulaciones"
+        if duracion is not None:
+            limite += f", hasta {duracion:g}s"
+        print(f"Publicacion con marcas de agua: la cola se rellena hasta {marcas[1]} mensajes al bajar de {marcas[0]} ({limite}).")
+    elif duracion is not None:
+        print("--duracion requiere --marcas o --continuo.")
+        return
+
+    if muestreo != 'simple':
+        if bloque <= 1:
+            # Los escenarios de una sola partida se juegan con simulate_blackjack, que no estratifica
+            print("El muestreo requiere bloques de mas de una partida (-b).")
+            return
+        print(f"Muestreo {muestreo}: cada bloque de {max(1, bloque)} partidas es una replica independiente.")
+
+    if exacto:
+        # Probabilidades exactas para validar la simulación Monte Carlo
+        probs = probabilidades_exactas(baraja.config)
+        print("Probabilidades exactas: " + "  ".join(f"{k}: {v * 100:.4f}%" for k, v in probs.items()))
+        if baraja.obtener_total() <= UMBRAL_EXACTO:
+            print(f"Baraja de {baraja.obtener_total()} cartas: resultado exacto, no se despachan escenarios.")
+            return
+
+    primero = 1
+    if hasta is not None:
+        # Completar la configuracion hasta `hasta` simulaciones usando la cache en disco
+        cache = CacheResultados()
+        previas = cache.obtener(baraja.config)['total']
+        cache.close()
+        simulaciones = max(0, hasta - previas)
+        primero = previas + 1
+        print(f"Cache {cache.ruta}: {previas} simulaciones previas para esta baraja, faltan {simulaciones} para llegar a {hasta}.")
+        if simulaciones == 0:
+            return
     
-    canal = None
-    conexion = None
+    transporte = None
     if publish:
-        if not _HAS_PIKA:
+        if broker is None and not _HAS_PIKA:
             print("pika no disponible — publicación deshabilitada")
             publish = False
         else:
             try:
-                conexion = pika.BlockingConnection(pika.ConnectionParameters('localhost'))
-                canal = conexion.channel()
+                transporte = conectar(broker)
             except Exception as e:
-                print(f"No fue posible conectar con RabbitMQ: {e}. Publicación deshabilitada.")
+                print(f"No fue posible conectar con el broker: {e}. Publicación deshabilitada.")
                 publish = False
 
     # Declarar colas (Asegura que existen)
-    if publish and canal is not None:
-        canal.queue_declare(queue='baraja', durable=True) 
-        canal.queue_declare(queue='escenarios', durable=True)
+    if publish and transporte is not None:
+        transporte.declarar('escenarios')
     
     #Publicar la Configuración de la Baraja (Modelo)
     print(f"Publicando la configuración de la baraja. Total de cartas: {baraja.obtener_total()}")
+    version = None
     if publish:
-        canal.basic_publish(
-        exchange='',
-        routing_key='baraja',
-        body=baraja_json,
-        properties=pika.BasicProperties(
-            delivery_mode=pika.DeliveryMode.Transient,
-            expiration='30000' # Expira en 30 segundos (time-out delivery)
-        )
-        )
+        modelo = publicar_modelo(transporte, baraja.config, barrido=configs_barrido, estrategias=definiciones, muestreo=muestreo,
+                                 zapato=parametros_zapato, continuo=continuo)
+        version = modelo['version']
+        print(f"Modelo {version} publicado ({baraja.clave()[:12]}).")
 
     #Publicar Escenarios
-    print(f"Generando y publicando {SIMULACIONES} escenarios...")
-    for i in range(1, SIMULACIONES + 1):
-        message = json.dumps({'sim_id': i})
-        if publish:
-            canal.basic_publish(
-            exchange='',
-            routing_key='escenarios',
-            body=message,
-            properties=pika.BasicProperties(
-                delivery_mode=pika.DeliveryMode.Transient
-            )
-            )
+    if semilla is None:
+        semilla = secrets.randbits(63)
+    print(f"Semilla de la corrida: {semilla}")
+
+    if publish and tolerancia is not None:
+        run_adaptativo(transporte, simulaciones, bloque, primero, tolerancia, intervalo, semilla=semilla, formato=formato, modelo=version,
+                       muestreo='zapato' if parametros_zapato else muestreo)
+        return
+
+    if continuo:
+        print(f"Generando escenarios sin limite en bloques de {max(1, bloque)}...")
+    else:
+        print(f"Generando y publicando {simulaciones} escenarios en bloques de {max(1, bloque)}...")
+    if configs_barrido and publish:
+        escenarios = generar_escenarios_barrido(simulaciones, bloque, list(modelo['configs']), semilla, formato, version)
+        if not continuo:
+            simulaciones *= len(configs_barrido)
+    else:
+        escenarios = generar_escenarios(simulaciones, bloque, primero, semilla, formato, version)
+
+    if publish and rapido and broker is not None:
+        print("El modo rapido requiere RabbitMQ (publisher confirms); se publica en modo normal.")
+        rapido = False
+
+    if publish and rapido:
+        # Modo rapido: conexion asincrona con confirmaciones por ventana
+        transporte.cerrar()
+        publicador = PublicadorConfirmado(escenarios, host='localhost', cola='escenarios', ventana=ventana,
+                                          marcas=marcas, duracion=duracion).run()
+        if publicador.error is not None:
+            print(f"Error publicando escenarios: {publicador.error}")
+        print(f"{publicador.confirmados} mensajes confirmados por el broker "
+              f"({publicador.rechazados} reintentos) en {publicador.duracion:.2f}s "
+              f"-> {publicador.tasa:.0f} msg/s")
+        if continuo:
+            transporte = conectar(broker)
+            publicar_objetivo(transporte, publicador.confirmados * max(1, bloque))
+            transporte.cerrar()
+        return
+
+    inicio = time.perf_counter()
+    enviados = 0
+    if publish and marcas is not None:
+        enviados = publicar_con_marcas(transporte, escenarios, *marcas, duracion=duracion)
+    else:
+        for message, content_type in escenarios:
+            if publish:
+                transporte.publicar('escenarios', message, content_type)
+                enviados += 1
     
-    if publish and conexion is not None:
-        print(f"{SIMULACIONES} escenarios publicados.")
-        conexion.close()
+    if publish and transporte is not None:
+        tiempo = time.perf_counter() - inicio
+        tasa = enviados / tiempo if tiempo > 0 else 0.0
+        if continuo:
+            # Todos los bloques de una corrida continua estan completos
+            simulaciones = enviados * max(1, bloque)
+            publicar_objetivo(transporte, simulaciones)
+        print(f"{simulaciones} escenarios publicados ({enviados} mensajes en {tiempo:.2f}s -> {tasa:.0f} msg/s).")
+        transporte.cerrar()
     else:
         print("error en modo.")
 
 if __name__ == '__main__':
-    run_productor(publish=True)
+    parser = argparse.ArgumentParser(description='Productor de escenarios de BlackJack')
+    parser.add_argument('-n', '--simulaciones', type=int, default=SIMULACIONES)
+    parser.add_argument('-b', '--bloque', type=int, default=TAMANO_BLOQUE,
+                        help='simulaciones por mensaje de escenario')
+    parser.add_argument('--rapido', action='store_true',
+                        help='publicacion asincrona con confirmaciones del broker')
+    parser.add_argument('--ventana', type=int, default=VENTANA_CONFIRMACION,
+                        help='mensajes sin confirmar permitidos en modo rapido')
+    parser.add_argument('--exacto', action='store_true',
+                        help=f'calcula las probabilidades exactas (barajas de hasta {UMBRAL_EXACTO} cartas no se simulan)')
+    parser.add_argument('--hasta', type=int, default=None,
+                        help='completa la baraja hasta N simulaciones en total usando la cache de resultados (BLACKJACK_CACHE)')
+    parser.add_argument('--tolerancia', type=float, default=None,
+                        help='modo adaptativo: se detiene cuando el intervalo de P(VICTORIA) es mas angosto que este valor (p. ej. 0.01)')
+    parser.add_argument('--intervalo', choices=sorted(INTERVALOS), default='wilson',
+                        help='intervalo de confianza usado en modo adaptativo')
+    parser.add_argument('--semilla', type=int, default=None,
+                        help='semilla de la corrida; cada escenario deriva su propio flujo aleatorio (por defecto, aleatoria)')
+    parser.add_argument('--formato', choices=sorted(FORMATOS), default='json',
+                        help='codificacion de los escenarios (los consumidores responden en el mismo formato)')
+    parser.add_argument('--barrido', action='append', default=None, metavar='CARTA=VALORES',
+                        help='barre la cantidad de una carta (p. ej. A=0-12 o A=0,4,8); repetido, barre el producto; -n es por configuracion')
+    parser.add_argument('--muestreo', choices=MUESTREOS, default='simple',
+                        help='muestreo con reduccion de varianza dentro de cada bloque (el intervalo se estima por bloques)')
+    parser.add_argument('--zapato', type=int, default=None, metavar='BARAJAS',
+                        help='modo zapato: cada bloque juega rondas seguidas de un zapato con este numero de barajas')
+    parser.add_argument('--penetracion', type=float, default=PENETRACION,
+                        help='modo zapato: fraccion del zapato que se reparte antes de barajar de nuevo')
+    parser.add_argument('--estrategias', default=None, metavar='NOMBRES',
+                        help=f"estrategias del jugador separadas por comas, evaluadas sobre las mismas barajas; la primera es la referencia ({', '.join(ESTRATEGIAS)})")
+    parser.add_argument('--marcas', type=int, nargs=2, default=None, metavar=('BAJA', 'ALTA'),
+                        help='mantiene la cola de escenarios entre BAJA y ALTA mensajes en lugar de publicar todo de una vez')
+    parser.add_argument('--continuo', action='store_true',
+                        help=f'corrida sin tamano fijo (ignora -n): publica hasta --duracion o Ctrl-C con marcas de agua '
+                             f'(por defecto {MARCA_BAJA} {MARCA_ALTA})')
+    parser.add_argument('--duracion', type=float, default=None, metavar='SEGUNDOS',
+                        help='con --marcas o --continuo, deja de publicar despues de estos segundos')
+    args = parser.parse_args()
+    run_productor(publish=True, simulaciones=args.simulaciones, bloque=args.bloque,
+                  rapido=args.rapido, ventana=args.ventana, exacto=args.exacto, hasta=args.hasta,
+                  tolerancia=args.tolerancia, intervalo=args.intervalo, semilla=args.semilla,
+                  formato=FORMATOS[args.formato],
+                  barrido=[parsear_eje(eje) for eje in args.barrido] if args.barrido else None,
+                  estrategias=args.estrategias.split(',') if args.estrategias else None,
+                  muestreo=args.muestreo, zapato=args.zapato, penetracion=args.penetracion,
+                  marcas=tuple(args.marcas) if args.marcas else None, continuo=args.continuo, duracion=args.duracion)
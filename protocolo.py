@@ -0,0 +1,174 @@
+import json
+import struct
+
+# Formato de los mensajes de escenarios y resultados.
+#
+# JSON sigue siendo el formato por defecto y el de respaldo. El formato binario
+# (version 1) empaqueta con struct un encabezado (version, tipo, banderas), los
+# sim_id como enteros de 64 bits, el resultado como codigo entero y los conteos
+# de un bloque como un vector fijo de 4 enteros; los resultados llevan ademas la
+# suma de puntajes del jugador y las veces que se paso. Un registro parcial (ver
+# estadistica.fusionar_parcial) lleva ademas sus sumas, las sumas por bloque del
+# estimador por replicas y la lista de rangos. El formato de cada mensaje viaja
+# en la propiedad content_type de AMQP, asi que ambos pueden convivir en una cola.
+
+VERSION = 1
+CONTENT_TYPE_JSON = 'application/json'
+CONTENT_TYPE_BINARIO = 'application/x-blackjack-v1'
+FORMATOS = {'json': CONTENT_TYPE_JSON, 'binario': CONTENT_TYPE_BINARIO}
+
+# Codigos enteros de resultado; su orden es el del vector de conteos
+RESULTADOS_CODIGO = ('VICTORIA', 'DERROTA', 'EMPATE', 'ERROR_NO_CARTAS')
+CODIGO_RESULTADO = {resultado: codigo for codigo, resultado in enumerate(RESULTADOS_CODIGO)}
+
+TIPO_ESCENARIO = 1
+TIPO_BLOQUE = 2
+TIPO_RESULTADO = 3
+TIPO_RESULTADO_BLOQUE = 4
+TIPO_LOTE = 5
+TIPO_PARCIAL = 6
+
+BANDERA_SEMILLA = 0x01
+BANDERA_MODELO = 0x02
+
+_ENCABEZADO = struct.Struct('!BBB')      # version, tipo, banderas
+_OPCIONAL = struct.Struct('!Q')          # semilla o version de modelo, segun la bandera
+# Campos opcionales que van al final del mensaje, en este orden, si su bandera esta activa
+_OPCIONALES = (('semilla', BANDERA_SEMILLA), ('modelo', BANDERA_MODELO))
+_ESCENARIO = struct.Struct('!Q')         # sim_id
+_BLOQUE = struct.Struct('!QQ')           # inicio, fin
+_RESULTADO = struct.Struct('!QBHB')      # sim_id, codigo, puntaje del jugador, se paso
+_RESULTADO_BLOQUE = struct.Struct('!QQ4IQQ')  # inicio, fin, conteos, suma_jugador, pasados
+_PARCIAL = struct.Struct('!4IQQI')      # conteos, suma_jugador, pasados, numero de rangos
+_REPLICAS = struct.Struct('!I5Q')        # bloques, n, n2, x, x2, xn (estadistica.replicas_vacias)
+_CAMPOS_REPLICAS = ('bloques', 'n', 'n2', 'x', 'x2', 'xn')
+_LONGITUD = struct.Struct('!I')
+
+def _empaquetar(data):
+    """Empaqueta un mensaje en binario; regresa None si su forma no tiene representacion."""
+    claves = set(data) - {clave for clave, _ in _OPCIONALES}
+    banderas = 0
+    for clave, bandera in _OPCIONALES:
+        if data.get(clave) is not None:
+            banderas |= bandera
+
+    try:
+        if claves == {'sim_id'}:
+            tipo, cuerpo = TIPO_ESCENARIO, _ESCENARIO.pack(data['sim_id'])
+        elif claves == {'sim_range'}:
+            tipo, cuerpo = TIPO_BLOQUE, _BLOQUE.pack(*data['sim_range'])
+        elif claves == {'sim_id', 'result', 'suma_jugador', 'pasados'}:
+            if data['result'] not in CODIGO_RESULTADO:
+                return None
+            tipo, cuerpo = TIPO_RESULTADO, _RESULTADO.pack(data['sim_id'], CODIGO_RESULTADO[data['result']],
+                                                            data['suma_jugador'], data['pasados'])
+        elif claves == {'sim_range', 'counts', 'suma_jugador', 'pasados'}:
+            counts = data['counts']
+            if not set(counts) <= set(CODIGO_RESULTADO):
+                return None
+            conteos = [counts.get(resultado, 0) for resultado in RESULTADOS_CODIGO]
+            tipo, cuerpo = TIPO_RESULTADO_BLOQUE, _RESULTADO_BLOQUE.pack(*data['sim_range'], *conteos,
+                                                                          data['suma_jugador'], data['pasados'])
+        elif claves == {'rangos', 'counts', 'suma_jugador', 'pasados', 'replicas'}:
+            counts = data['counts']
+            if not set(counts) <= set(CODIGO_RESULTADO) or set(data['replicas']) != set(_CAMPOS_REPLICAS):
+                return None
+            conteos = [counts.get(resultado, 0) for resultado in RESULTADOS_CODIGO]
+            partes = [_PARCIAL.pack(*conteos, data['suma_jugador'], data['pasados'], len(data['rangos'])),
+                      _REPLICAS.pack(*(data['replicas'][campo] for campo in _CAMPOS_REPLICAS))]
+            partes.extend(_BLOQUE.pack(*rango) for rango in data['rangos'])
+            tipo, cuerpo = TIPO_PARCIAL, b''.join(partes)
+        elif claves == {'lote'} and not banderas:
+            partes = [_LONGITUD.pack(len(data['lote']))]
+            for item in data['lote']:
+                empaquetado = _empaquetar(item)
+                if empaquetado is None:
+                    return None
+                partes.append(_LONGITUD.pack(len(empaquetado)))
+                partes.append(empaquetado)
+            tipo, cuerpo = TIPO_LOTE, b''.join(partes)
+        else:
+            return None
+
+        for clave, bandera in _OPCIONALES:
+            if banderas & bandera:
+                cuerpo += _OPCIONAL.pack(data[clave])
+    except (struct.error, TypeError, ValueError):
+        return None
+
+    return _ENCABEZADO.pack(VERSION, tipo, banderas) + cuerpo
+
+def _desempaquetar(buf):
+    version, tipo, banderas = _ENCABEZADO.unpack_from(buf, 0)
+    if version != VERSION:
+        raise ValueError(f"Version de mensaje binario no soportada: {version}")
+    pos = _ENCABEZADO.size
+
+    if tipo == TIPO_ESCENARIO:
+        (sim_id,) = _ESCENARIO.unpack_from(buf, pos)
+        data, pos = {'sim_id': sim_id}, pos + _ESCENARIO.size
+    elif tipo == TIPO_BLOQUE:
+        inicio, fin = _BLOQUE.unpack_from(buf, pos)
+        data, pos = {'sim_range': [inicio, fin]}, pos + _BLOQUE.size
+    elif tipo == TIPO_RESULTADO:
+        sim_id, codigo, suma_jugador, pasados = _RESULTADO.unpack_from(buf, pos)
+        data = {'sim_id': sim_id, 'result': RESULTADOS_CODIGO[codigo], 'suma_jugador': suma_jugador, 'pasados': pasados}
+        pos += _RESULTADO.size
+    elif tipo == TIPO_RESULTADO_BLOQUE:
+        inicio, fin, *conteos, suma_jugador, pasados = _RESULTADO_BLOQUE.unpack_from(buf, pos)
+        counts = dict(zip(RESULTADOS_CODIGO[:3], conteos[:3]))
+        if conteos[3]:
+            counts['ERROR_NO_CARTAS'] = conteos[3]
+        data = {'sim_range': [inicio, fin], 'counts': counts, 'suma_jugador': suma_jugador, 'pasados': pasados}
+        pos += _RESULTADO_BLOQUE.size
+    elif tipo == TIPO_PARCIAL:
+        *conteos, suma_jugador, pasados, n = _PARCIAL.unpack_from(buf, pos)
+        pos += _PARCIAL.size
+        replicas = dict(zip(_CAMPOS_REPLICAS, _REPLICAS.unpack_from(buf, pos)))
+        pos += _REPLICAS.size
+        counts = dict(zip(RESULTADOS_CODIGO[:3], conteos[:3]))
+        if conteos[3]:
+            counts['ERROR_NO_CARTAS'] = conteos[3]
+        rangos = []
+        for _ in range(n):
+            rangos.append(list(_BLOQUE.unpack_from(buf, pos)))
+            pos += _BLOQUE.size
+        data = {'rangos': rangos, 'counts': counts, 'suma_jugador': suma_jugador, 'pasados': pasados, 'replicas': replicas}
+    elif tipo == TIPO_LOTE:
+        (n,) = _LONGITUD.unpack_from(buf, pos)
+        pos += _LONGITUD.size
+        lote = []
+        for _ in range(n):
+            (longitud,) = _LONGITUD.unpack_from(buf, pos)
+            pos += _LONGITUD.size
+            lote.append(_desempaquetar(buf[pos:pos + longitud]))
+            pos += longitud
+        data = {'lote': lote}
+    else:
+        raise ValueError(f"Tipo de mensaje binario desconocido: {tipo}")
+
+    for clave, bandera in _OPCIONALES:
+        if banderas & bandera:
+            (data[clave],) = _OPCIONAL.unpack_from(buf, pos)
+            pos += _OPCIONAL.size
+    return data
+
+def codificar(data, content_type=CONTENT_TYPE_JSON):
+    """Codifica un mensaje y regresa (cuerpo, content_type).
+
+    Si se pide binario pero el mensaje no tiene representacion binaria
+    (por ejemplo {'objetivo': n}), se usa JSON.
+    """
+    if content_type == CONTENT_TYPE_BINARIO:
+        cuerpo = _empaquetar(data)
+        if cuerpo is not None:
+            return cuerpo, CONTENT_TYPE_BINARIO
+    return json.dumps(data).encode('utf-8'), CONTENT_TYPE_JSON
+
+def decodificar(body, content_type=None):
+    """Decodifica un mensaje segun su content_type (JSON si no viene indicado)."""
+    if content_type == CONTENT_TYPE_BINARIO:
+        return _desempaquetar(memoryview(body))
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    return json.loads(body)
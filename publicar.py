@@ -1,7 +1,9 @@
 import pika
-import json
 import sys
 
+from transporte import conectar
+from modelo import publicar_modelo
+
 # Configuración de la baraja
 # La suma total de los valores no debe exceder 52 para ser una baraja estándar.
 config = {
@@ -12,7 +14,6 @@ config = {
 
 
 TOTAL_CARTAS = sum(config.values())
-TTL_EXPIRATION_MS = '30000' # 30 segundos de caducidad (Time-out Delivery)
 
 if TOTAL_CARTAS > 52:
     print(f"ADVERTENCIA: La configuracion excede las 52 cartas ({TOTAL_CARTAS}).")
@@ -22,25 +23,13 @@ elif TOTAL_CARTAS == 0:
 
 try:
     # Conexión con RabbitMQ
-    conn = pika.BlockingConnection(pika.ConnectionParameters('localhost'))
-    ch = conn.channel()
-    
-    # Declarar la cola
-    ch.queue_declare(queue='baraja', durable=True)
+    transporte = conectar()
     
-    # Publicar el mensaje
-    ch.basic_publish(
-        exchange='', 
-        routing_key='baraja', 
-        body=json.dumps(config),
-        properties=pika.BasicProperties(
-            delivery_mode=pika.DeliveryMode.Transient,
-            expiration=TTL_EXPIRATION_MS         
-        )
-    )
+    # Publicar como nuevo modelo; los consumidores lo cargan sin reiniciar
+    modelo = publicar_modelo(transporte, config)
     
-    print(f"Publicado configuración de baraja (Total: {TOTAL_CARTAS})")
-    conn.close()
+    print(f"Publicado modelo {modelo['version']} (Total: {TOTAL_CARTAS})")
+    transporte.cerrar()
 
 except pika.exceptions.AMQPConnectionError as e:
     print(f"\nNo se pudo conectar a RabbitMQ.")
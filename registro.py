@@ -0,0 +1,253 @@
+import os
+import json
+import struct
+from itertools import chain
+
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    np = None
+    _HAS_NUMPY = False
+
+from protocolo import RESULTADOS_CODIGO, CODIGO_RESULTADO
+from estadistica import replicas_vacias
+
+# Registro binario de resultados: archivo de solo agregado con una cabecera y un registro de
+# ancho fijo (16 bytes, little-endian) por partida, que se lee directamente con numpy.memmap.
+#
+# La cabecera es '<4sHHI' (magia b'BJRG', version, reservado, bytes de metadatos) seguida de
+# los metadatos en JSON, rellenada con espacios hasta un multiplo de 16 bytes. Los metadatos
+# describen la corrida: worker, version del modelo, 'clave' (hash de la configuracion),
+# 'config', 'etiqueta' en un barrido, 'muestreo', 'zapato' y la estrategia registrada. Cada
+# archivo tiene una sola configuracion y un solo modelo (ver RegistrosPorConfig).
+#
+# Cada registro:
+#   sim_id     uint64  offset 0
+#   worker     uint32  offset 8   pid del consumidor que jugo la partida
+#   resultado  uint8   offset 12  codigo de protocolo.RESULTADOS_CODIGO (incluye ERROR_NO_CARTAS)
+#   jugador    uint8   offset 13  puntaje final del jugador
+#   crupier    uint8   offset 14  puntaje final del crupier
+#   bloque     uint8   offset 15  1 en la primera partida de cada escenario (bloque), si no 0
+# Los bloques son replicas independientes aunque sus partidas no lo sean (muestreo o zapato).
+# Los consumidores escriben una ventana completa de una vez, asi que un archivo crece por
+# bloques; un registro incompleto al final (escritura cortada) se ignora.
+
+MAGIA = b'BJRG'
+VERSION_REGISTRO = 1
+_CABECERA = struct.Struct('<4sHHI')
+_REGISTRO = struct.Struct('<QIBBBB')
+TAMANO_REGISTRO = _REGISTRO.size
+TROZO_LECTURA = 1 << 22 # Registros que se resumen por paso al leer (64 MB)
+
+if _HAS_NUMPY:
+    DTYPE_REGISTRO = np.dtype({
+        'names': ['sim_id', 'worker', 'resultado', 'jugador', 'crupier', 'bloque'],
+        'formats': ['<u8', '<u4', 'u1', 'u1', 'u1', 'u1'],
+        'offsets': [0, 8, 12, 13, 14, 15],
+        'itemsize': TAMANO_REGISTRO,
+    })
+else:
+    DTYPE_REGISTRO = None
+
+def cabecera(metadatos):
+    """Bytes de la cabecera de un archivo con `metadatos`, rellenados a un multiplo de TAMANO_REGISTRO."""
+    texto = json.dumps(metadatos, sort_keys=True).encode('utf-8')
+    relleno = -(_CABECERA.size + len(texto)) % TAMANO_REGISTRO
+    texto += b' ' * relleno
+    return _CABECERA.pack(MAGIA, VERSION_REGISTRO, 0, len(texto)) + texto
+
+def leer_cabecera(ruta):
+    """Regresa (metadatos, offset del primer registro) de un archivo de registro."""
+    with open(ruta, 'rb') as f:
+        magia, version, _, largo = _CABECERA.unpack(f.read(_CABECERA.size))
+        if magia != MAGIA:
+            raise ValueError(f"{ruta} no es un registro de resultados")
+        if version != VERSION_REGISTRO:
+            raise ValueError(f"{ruta}: version de registro {version} no soportada")
+        return json.loads(f.read(largo)), _CABECERA.size + largo
+
+class RegistroResultados:
+    """Agrega partidas al final de `ruta`; se acumulan en memoria y se escriben juntas con escribir().
+
+    Un archivo nuevo empieza con la cabecera de `metadatos`; uno existente debe tener los mismos.
+    """
+
+    def __init__(self, ruta, worker, metadatos=None):
+        self.ruta = ruta
+        self.worker = worker
+        self.metadatos = dict(metadatos or {}, worker=worker)
+        if os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+            previos, _ = leer_cabecera(ruta)
+            if previos != json.loads(json.dumps(self.metadatos)):
+                raise ValueError(f"{ruta} ya tiene otros metadatos")
+            self.archivo = open(ruta, 'ab')
+        else:
+            self.archivo = open(ruta, 'ab')
+            self.archivo.write(cabecera(self.metadatos))
+        self._pendientes = []
+
+    def agregar(self, inicio, partidas, errores=0):
+        """Agrega las partidas de un escenario (un bloque) cuyo primer sim_id es `inicio`.
+
+        `partidas` son los trozos (codigos, jugador, crupier) que dejan los motores en
+        detalle['partidas'] (ver deck.anotar_detalle). `errores` cuenta las partidas que
+        terminaron en ERROR_NO_CARTAS, que los motores no detallan; se registran con puntajes 0.
+        """
+        if errores:
+            partidas = [((CODIGO_RESULTADO['ERROR_NO_CARTAS'],) * errores, (0,) * errores, (0,) * errores)]
+        if not partidas:
+            return
+        if _HAS_NUMPY:
+            codigos = np.concatenate([np.asarray(trozo[0], dtype=np.uint8) for trozo in partidas])
+            bloque = np.zeros(len(codigos), dtype=DTYPE_REGISTRO)
+            bloque['sim_id'] = np.arange(inicio, inicio + len(codigos))
+            bloque['worker'] = self.worker
+            bloque['resultado'] = codigos
+            bloque['jugador'] = np.concatenate([trozo[1] for trozo in partidas])
+            bloque['crupier'] = np.concatenate([trozo[2] for trozo in partidas])
+            bloque['bloque'][0] = 1
+            self._pendientes.append(bloque.tobytes())
+            return
+        codigos = chain.from_iterable(trozo[0] for trozo in partidas)
+        jugador = chain.from_iterable(trozo[1] for trozo in partidas)
+        crupier = chain.from_iterable(trozo[2] for trozo in partidas)
+        self._pendientes.extend(_REGISTRO.pack(inicio + i, self.worker, codigo, puntaje, puntaje_crupier, int(i == 0))
+                                for i, (codigo, puntaje, puntaje_crupier) in enumerate(zip(codigos, jugador, crupier)))
+
+    def escribir(self):
+        """Escribe lo acumulado en una sola operacion."""
+        if not self._pendientes:
+            return
+        self.archivo.write(b''.join(self._pendientes))
+        self.archivo.flush()
+        self._pendientes = []
+
+    def cerrar(self):
+        self.escribir()
+        self.archivo.close()
+
+class RegistrosPorConfig:
+    """Un RegistroResultados por (version del modelo, configuracion) dentro de `directorio`.
+
+    Los archivos se llaman `<prefijo>-m<version>-<clave>.bin`, asi que un barrido o un cambio
+    de modelo nunca mezclan configuraciones ni muestreos en el mismo archivo.
+    """
+
+    def __init__(self, directorio, prefijo, worker):
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.worker = worker
+        self._registros = {}
+        os.makedirs(directorio, exist_ok=True)
+
+    def registro(self, metadatos):
+        """RegistroResultados de los `metadatos` de un escenario ('modelo' y 'clave' lo identifican)."""
+        llave = (metadatos['modelo'], metadatos['clave'])
+        registro = self._registros.get(llave)
+        if registro is None:
+            nombre = f"{self.prefijo}-m{metadatos['modelo']}-{metadatos['clave'][:16]}.bin"
+            registro = RegistroResultados(os.path.join(self.directorio, nombre), self.worker, metadatos)
+            self._registros[llave] = registro
+        return registro
+
+    def agregar(self, metadatos, inicio, partidas, errores=0):
+        self.registro(metadatos).agregar(inicio, partidas, errores)
+
+    def escribir(self):
+        for registro in self._registros.values():
+            registro.escribir()
+
+    def cerrar(self):
+        for registro in self._registros.values():
+            registro.cerrar()
+        self._registros.clear()
+
+def leer_registro(ruta):
+    """Registros completos del archivo como arreglo estructurado de solo lectura (numpy.memmap)."""
+    if not _HAS_NUMPY:
+        raise RuntimeError('leer_registro requiere numpy')
+    _, offset = leer_cabecera(ruta)
+    n = (os.path.getsize(ruta) - offset) // TAMANO_REGISTRO
+    if n == 0:
+        return np.zeros(0, dtype=DTYPE_REGISTRO)
+    return np.memmap(ruta, dtype=DTYPE_REGISTRO, mode='r', offset=offset, shape=(n,))
+
+def grupo_registro(metadatos):
+    """Llave con la que se separan los archivos que no se deben sumar: configuracion, muestreo y zapato."""
+    return (metadatos.get('clave'), metadatos.get('muestreo', 'simple'), json.dumps(metadatos.get('zapato'), sort_keys=True))
+
+def agrupar_registros(rutas):
+    """Agrupa archivos por grupo_registro; regresa {grupo: (metadatos del primero, [rutas])}."""
+    grupos = {}
+    for ruta in rutas:
+        metadatos, _ = leer_cabecera(ruta)
+        grupo = grupos.setdefault(grupo_registro(metadatos), (metadatos, []))
+        grupo[1].append(ruta)
+    return grupos
+
+def _sumar_bloques(replicas, n, x):
+    # Sumas del estimador por replicas (estadistica.sumar_replica) para varios bloques a la vez
+    n = n.astype(np.int64)
+    x = x.astype(np.int64)
+    replicas['bloques'] += int(n.size)
+    replicas['n'] += int(n.sum())
+    replicas['n2'] += int((n * n).sum())
+    replicas['x'] += int(x.sum())
+    replicas['x2'] += int((x * x).sum())
+    replicas['xn'] += int((x * n).sum())
+
+def resumir_registros(rutas, trozo=TROZO_LECTURA):
+    """Totales de uno o varios archivos de registro, leidos por trozos sin cargarlos completos.
+
+    Regresa {'total', 'counts', 'suma_jugador', 'pasados', 'jugador', 'workers', 'replicas'},
+    donde 'jugador' es el histograma de puntajes finales del jugador, 'workers' {pid: partidas}
+    y 'replicas' las sumas por bloque de las victorias (ver estadistica.intervalo_replicas).
+    Los archivos deben ser del mismo grupo (ver agrupar_registros).
+    """
+    conteos = np.zeros(len(RESULTADOS_CODIGO), dtype=np.int64)
+    histograma = np.zeros(256, dtype=np.int64)
+    workers = {}
+    replicas = replicas_vacias()
+    victoria = CODIGO_RESULTADO['VICTORIA']
+    for ruta in rutas:
+        registros = leer_registro(ruta)
+        abierto = None # (n, x) del bloque que sigue en el trozo siguiente
+        for inicio in range(0, len(registros), trozo):
+            parte = registros[inicio:inicio + trozo]
+            conteos += np.bincount(parte['resultado'], minlength=len(conteos))[:len(conteos)]
+            histograma += np.bincount(parte['jugador'], minlength=256)
+            # Cada ventana de un worker es un tramo contiguo: se cuentan tramos, no partidas
+            worker = parte['worker']
+            limites = np.concatenate(([0], np.flatnonzero(worker[1:] != worker[:-1]) + 1, [len(worker)]))
+            for a, b in zip(limites[:-1].tolist(), limites[1:].tolist()):
+                workers[int(worker[a])] = workers.get(int(worker[a]), 0) + b - a
+
+            # Victorias y partidas por bloque; el ultimo bloque del trozo puede seguir en el siguiente
+            victorias = (parte['resultado'] == victoria).astype(np.int64)
+            marcas = np.flatnonzero(parte['bloque'])
+            if abierto is None and (not marcas.size or marcas[0] != 0):
+                marcas = np.concatenate(([0], marcas))
+            if abierto is not None:
+                corte = int(marcas[0]) if marcas.size else len(parte)
+                abierto = (abierto[0] + corte, abierto[1] + int(victorias[:corte].sum()))
+                if not marcas.size:
+                    continue
+                _sumar_bloques(replicas, np.array([abierto[0]]), np.array([abierto[1]]))
+            n = np.diff(np.append(marcas, len(parte)))
+            x = np.add.reduceat(victorias, marcas)
+            _sumar_bloques(replicas, n[:-1], x[:-1])
+            abierto = (int(n[-1]), int(x[-1]))
+        if abierto is not None:
+            _sumar_bloques(replicas, np.array([abierto[0]]), np.array([abierto[1]]))
+
+    puntajes = np.arange(256)
+    return {
+        'total': int(conteos.sum()),
+        'counts': {resultado: int(n) for resultado, n in zip(RESULTADOS_CODIGO, conteos) if n or resultado != 'ERROR_NO_CARTAS'},
+        'suma_jugador': int((histograma * puntajes).sum()),
+        'pasados': int(histograma[22:].sum()),
+        'jugador': {int(p): int(n) for p, n in zip(puntajes, histograma) if n},
+        'workers': workers,
+        'replicas': replicas,
+    }
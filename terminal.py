@@ -1,16 +1,22 @@
 import json
+import math
 import time
 import sys
 import os
 
 import pika
-import tqdm
+from tqdm import tqdm
 
 
 # Importar la clase Baraja para mostrar la tabla de configuración
 from deck import Baraja 
+from estadistica import es_duplicado, describir_rangos
+from protocolo import decodificar
+from modelo import COLA_MODELO, EXCHANGE_MODELO
 
 NUM_SIMULATIONS = 10000
+ESPERA_FIN_CONTINUO = 30.0 # Segundos sin resultados tras los que una corrida continua sin total se da por terminada
+INTERVALO_VIGILANCIA = 1.0 # Segundos entre revisiones del fin de la corrida
 
 # Códigos de color ANSI
 GREEN = '\033[92m'
@@ -29,6 +35,7 @@ class Dashboard:
         self.total_processed = 0
         self.baraja_config = None
         self.total = total
+        self.vistos = {}
         
         self.bar = tqdm(total=total, desc=f"{BLUE}Progreso de Simulación{ENDC}", unit="sim", file=sys.stdout)
         self.bar = None
@@ -61,6 +68,26 @@ class Dashboard:
 
     def update_stats(self, result_data):
         """Actualiza los contadores y el log en tiempo real."""
+        if 'objetivo' in result_data:
+            # El productor adaptativo o continuo termino: nuevo total esperado, que ya puede estar cumplido
+            self.total = result_data['objetivo']
+            print(f"\nDASHBOARD: Total ajustado por el productor: {self.total}")
+            return
+
+        if 'lote' in result_data:
+            # Varios resultados publicados juntos por un consumidor
+            for item in result_data['lote']:
+                self.update_stats(item)
+            return
+
+        if es_duplicado(result_data, self.vistos):
+            # Reentrega de un escenario sembrado que ya se conto
+            return
+
+        if 'counts' in result_data:
+            self._update_stats_bloque(result_data)
+            return
+
         result = result_data['result']
         self.total_processed += 1
 
@@ -89,6 +116,32 @@ class Dashboard:
         )
         sys.stdout.flush()
 
+    def terminado(self):
+        """True cuando ya se procesaron todas las simulaciones esperadas."""
+        return self.total_processed >= self.total
+
+    def _update_stats_bloque(self, result_data):
+        """Suma los conteos de un bloque (sim_range) o de un registro parcial (rangos)."""
+        counts = result_data['counts']
+        n = sum(counts.values())
+        self.victories += counts.get('VICTORIA', 0)
+        self.defeats += counts.get('DERROTA', 0)
+        self.ties += counts.get('EMPATE', 0)
+        self.total_processed += n
+
+        if self.bar is not None:
+            self.bar.update(n)
+
+        rangos = describir_rangos(result_data)
+        sys.stdout.write(
+            f"\r{BLUE}[LOG]{ENDC} Sims {rangos} | "
+            f"V: {GREEN}{self.victories}{ENDC} | "
+            f"D: {RED}{self.defeats}{ENDC} | "
+            f"E: {YELLOW}{self.ties}{ENDC} | "
+            f"Total: {self.total_processed}"
+        )
+        sys.stdout.flush()
+
     def final_report(self):
         """Muestra el reporte final, incluyendo probabilidades y gráfico."""
         if self.bar is not None:
@@ -137,38 +190,64 @@ def run_dashboard():
         return
 
     channel = connection.channel()
-    channel.queue_declare(queue='baraja', durable=True)
+    channel.queue_declare(queue=COLA_MODELO, durable=True, arguments={'x-max-length': 1})
+    channel.exchange_declare(exchange=EXCHANGE_MODELO, exchange_type='fanout', durable=True)
+    channel.queue_bind(exchange=EXCHANGE_MODELO, queue=COLA_MODELO)
     channel.queue_declare(queue='resultados', durable=False)
 
     print("DASHBOARD: Esperando la configuración de la baraja...")
     
-    # 1. Obtener la Configuración Inicial
-    method_frame, header_frame, body = channel.basic_get('baraja', auto_ack=True)
+    # 1. Obtener el modelo vigente sin consumirlo (get + requeue)
+    method_frame, header_frame, body = channel.basic_get(COLA_MODELO, auto_ack=False)
     while body is None:
-        time.sleep(1)
-        method_frame, header_frame, body = channel.basic_get('baraja', auto_ack=True)
+        time.sleep(0.1)
+        method_frame, header_frame, body = channel.basic_get(COLA_MODELO, auto_ack=False)
+    channel.basic_nack(delivery_tag=method_frame.delivery_tag, requeue=True)
 
-    if isinstance(body, bytes):
-        baraja_payload = body.decode('utf-8')
-    else:
-        baraja_payload = body
+    modelo = decodificar(body, header_frame.content_type)
+    baraja_payload = json.dumps(modelo['config'])
+    if modelo.get('configs'):
+        # En un barrido el total es por configuracion
+        dashboard.total *= len(modelo['configs'])
+    if modelo.get('continuo'):
+        # Corrida sin tamano fijo: el productor avisa el total al terminar ({'objetivo': n})
+        dashboard.total = math.inf
 
     dashboard.baraja_config = baraja_payload
     dashboard.print_config_table()
-    print(f"DASHBOARD: Se realizarán {NUM_SIMULATIONS} pruebas.\n")
+    if dashboard.total == math.inf:
+        print("DASHBOARD: Corrida continua; el total llega cuando el productor termine.\n")
+    else:
+        print(f"DASHBOARD: Se realizarán {dashboard.total} pruebas.\n")
     
     # 2. Consumir Resultados
+    ultimo = [time.monotonic()] # Llegada del ultimo resultado
+
     def callback(ch, method, properties, body):
-        if isinstance(body, bytes):
-            body = body.decode('utf-8')
-        result_data = json.loads(body)
+        result_data = decodificar(body, properties.content_type)
         dashboard.update_stats(result_data)
         ch.basic_ack(delivery_tag=method.delivery_tag)
+        ultimo[0] = time.monotonic()
 
-        if dashboard.total_processed >= NUM_SIMULATIONS:
+        # Tambien tras un {'objetivo': n}, que puede llegar cuando ya se alcanzaron las n
+        if dashboard.terminado():
             ch.stop_consuming()
 
+    def vigilar():
+        # Si el productor de una corrida continua se detuvo sin avisar el total, ya no llegara
+        # ningun mensaje que dispare la revision del callback
+        if dashboard.terminado():
+            channel.stop_consuming()
+            return
+        inactivo = time.monotonic() - ultimo[0]
+        if dashboard.total == math.inf and dashboard.total_processed and inactivo > ESPERA_FIN_CONTINUO:
+            print(f"\nDASHBOARD: {ESPERA_FIN_CONTINUO:.0f} s sin resultados ni total del productor; fin de la corrida.")
+            channel.stop_consuming()
+            return
+        connection.call_later(INTERVALO_VIGILANCIA, vigilar)
+
     channel.basic_consume(queue='resultados', on_message_callback=callback, auto_ack=False)
+    connection.call_later(INTERVALO_VIGILANCIA, vigilar)
 
     try:
         channel.start_consuming()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los modulos del proyecto estan en la raiz del repositorio, sin paquete
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
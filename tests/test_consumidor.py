@@ -0,0 +1,241 @@
+import json
+
+import pytest
+
+from consumidor import ProcesadorEscenarios, ejecutar_escenario, run_replay
+from dashboard import Dashboard, intervalo_victoria
+from deck import Baraja
+from estadistica import bloques_mensaje, intervalo_replicas, replicas_vacias, sumar_replica, sumar_replicas
+from estrategias import ESTRATEGIAS
+from modelo import mensaje_modelo
+from protocolo import CONTENT_TYPE_BINARIO, CONTENT_TYPE_JSON, codificar, decodificar
+from transporte import Mensaje
+
+class TransporteMemoria:
+    """Transporte minimo que guarda lo publicado y las confirmaciones."""
+
+    def __init__(self):
+        self.publicados = []
+        self.confirmados = []
+        self.devueltos = []
+        self.programados = []
+        self.modelo = None # Mensaje de la cola 'modelo'
+
+    def publicar(self, cola, cuerpo, content_type=None, exchange='', expiracion_ms=None):
+        self.publicados.append((cuerpo, content_type))
+
+    def ack(self, tag, multiple=False):
+        self.confirmados.append(tag)
+
+    def nack(self, tag, multiple=False, requeue=True):
+        self.devueltos.append(tag)
+
+    def obtener(self, cola, auto_ack=True):
+        return self.modelo
+
+    def programar(self, segundos, funcion):
+        self.programados.append((segundos, funcion))
+
+    def vencer(self):
+        # Corre los temporizadores pendientes (y los que estos programen) como el lazo de eventos
+        while self.programados:
+            _, funcion = self.programados.pop(0)
+            funcion()
+
+ZAPATO = {'mazos': 1, 'penetracion': 0.75}
+
+def procesar(escenarios, formato, zapato=None, muestreo='simple', ack_cada=50):
+    transporte = TransporteMemoria()
+    procesador = ProcesadorEscenarios(transporte, Baraja().config, ack_cada=ack_cada, ack_ms=10 ** 9)
+    procesador.zapato = zapato
+    procesador.muestreo = muestreo
+    for tag, escenario in enumerate(escenarios, 1):
+        cuerpo, content_type = codificar(escenario, formato)
+        procesador.callback_escenario(Mensaje(tag, cuerpo, content_type))
+    procesador.vaciar()
+    return [decodificar(cuerpo, content_type) for cuerpo, content_type in transporte.publicados]
+
+@pytest.mark.parametrize('formato', [CONTENT_TYPE_JSON, CONTENT_TYPE_BINARIO])
+@pytest.mark.parametrize('zapato, muestreo', [(ZAPATO, 'simple'), (None, 'estratificado')])
+def test_parciales_conservan_las_replicas_por_bloque(formato, zapato, muestreo):
+    escenarios = [{'sim_range': [1 + b * 500, (b + 1) * 500], 'semilla': 7} for b in range(40)]
+    esperadas = replicas_vacias()
+    for escenario in escenarios:
+        resultado = ejecutar_escenario(escenario, Baraja().config, None, muestreo, zapato)
+        sumar_replica(esperadas, resultado['counts'])
+
+    # Ventanas de 15 escenarios: 40 bloques llegan en 3 registros parciales
+    mensajes = procesar(escenarios, formato, zapato, muestreo, ack_cada=15)
+    assert len(mensajes) == 3
+    assert sum(m['replicas']['bloques'] for m in mensajes) == 40
+
+    # Lo que acumula el productor adaptativo
+    replicas = replicas_vacias()
+    vistos = {}
+    for mensaje in mensajes:
+        for resultado in bloques_mensaje(mensaje, vistos):
+            sumar_replicas(replicas, resultado)
+    assert replicas == esperadas
+
+    # Y el dashboard
+    tablero = Dashboard(total=20000)
+    tablero.muestreo = 'zapato' if zapato else muestreo
+    for mensaje in mensajes:
+        tablero.update_stats(mensaje)
+    assert tablero.replicas == esperadas
+    lo, hi, estimador = intervalo_victoria(tablero)
+    assert estimador == 'replicas'
+    assert (lo, hi) == intervalo_replicas(esperadas)
+
+@pytest.mark.parametrize('escenario, reentregado', [
+    ({'sim_id': 5, 'semilla': 3}, False),
+    ({'sim_id': 5, 'semilla': 3}, True),
+    ({'sim_range': [1, 100], 'semilla': 3}, True),
+])
+def test_resultados_reales_viajan_en_binario(escenario, reentregado):
+    # Lo que publica el consumidor (registros parciales, resultados y bloques reentregados)
+    # tiene forma binaria; si no, se publicaria en JSON aunque se negocio binario
+    transporte = TransporteMemoria()
+    procesador = ProcesadorEscenarios(transporte, Baraja().config, ack_ms=10 ** 9)
+    cuerpo, content_type = codificar(escenario, CONTENT_TYPE_BINARIO)
+    procesador.callback_escenario(Mensaje(1, cuerpo, content_type, reentregado))
+    procesador.vaciar()
+    (cuerpo, content_type), = transporte.publicados
+    assert content_type == CONTENT_TYPE_BINARIO
+    assert set(decodificar(cuerpo, content_type)) >= {'suma_jugador', 'pasados', 'semilla'}
+
+def test_reentregas_cuentan_como_un_bloque():
+    escenarios = [{'sim_range': [1 + b * 100, (b + 1) * 100], 'semilla': 3} for b in range(4)]
+    transporte = TransporteMemoria()
+    procesador = ProcesadorEscenarios(transporte, Baraja().config, ack_cada=10, ack_ms=10 ** 9)
+    for tag, escenario in enumerate(escenarios, 1):
+        cuerpo, content_type = codificar(escenario)
+        procesador.callback_escenario(Mensaje(tag, cuerpo, content_type, reentregado=tag > 2))
+    procesador.vaciar()
+    (cuerpo, content_type), = transporte.publicados
+    replicas = replicas_vacias()
+    for resultado in bloques_mensaje(decodificar(cuerpo, content_type)):
+        sumar_replicas(replicas, resultado)
+    assert replicas['bloques'] == 4 and replicas['n'] == 400
+
+SIN_ASES = dict(Baraja().config, A=0)
+MODELOS = {
+    'simple': mensaje_modelo(Baraja().config, 1),
+    'estratificado': mensaje_modelo(Baraja().config, 1, muestreo='estratificado'),
+    'zapato': mensaje_modelo(Baraja().config, 1, zapato=ZAPATO),
+    'estrategias': mensaje_modelo(Baraja().config, 1, estrategias={n: ESTRATEGIAS[n] for n in ('basica', 'hasta17')}),
+    'barrido': mensaje_modelo(Baraja().config, 1, barrido=[('clasica', Baraja().config), ('sin ases', SIN_ASES)]),
+}
+
+@pytest.mark.parametrize('nombre', MODELOS)
+@pytest.mark.parametrize('inicio, fin', [(301, 600), (42, 42)])
+def test_replay_reproduce_lo_publicado(nombre, inicio, fin, capsys):
+    modelo = MODELOS[nombre]
+    clave = next(reversed(modelo['configs'])) if 'configs' in modelo else None
+    escenario = {'sim_id': inicio} if inicio == fin else {'sim_range': [inicio, fin]}
+    escenario.update(semilla=9, modelo=modelo['version'])
+    if clave is not None:
+        escenario['clave'] = clave
+
+    transporte = TransporteMemoria()
+    procesador = ProcesadorEscenarios(transporte, ack_ms=10 ** 9)
+    procesador.cargar_modelo(modelo)
+    cuerpo, content_type = codificar(escenario)
+    procesador.callback_escenario(Mensaje(1, cuerpo, content_type))
+    procesador.vaciar()
+    (cuerpo, content_type), = transporte.publicados
+    publicado = decodificar(cuerpo, content_type)
+
+    repetido = run_replay(9, inicio, fin, modelo, clave=clave)
+    conteos = repetido['counts'] if 'counts' in repetido else {repetido['result']: 1}
+    assert {r: n for r, n in publicado['counts'].items() if n} == {r: n for r, n in conteos.items() if n}
+    assert publicado['suma_jugador'] == repetido['suma_jugador']
+    assert publicado['pasados'] == repetido['pasados']
+    assert publicado.get('estrategias') == repetido.get('estrategias')
+    assert repetido.get('clave') == clave
+
+class ProcesoFalso:
+    def __init__(self, indice, codigo):
+        self.name, self.pid, self.exitcode = f"consumidor-{indice}", 1000 + indice, codigo
+
+    def is_alive(self):
+        return False
+
+    def join(self, timeout=None):
+        pass
+
+def test_pool_con_backoff_y_sin_reiniciar_salidas_limpias(monkeypatch, capsys):
+    import consumidor
+    reloj = [0.0]
+    lanzados = []
+
+    def lanzar_worker(indice, opciones=None, broker=None):
+        # El worker 0 no alcanza el broker y muere al arrancar; el 1 termina limpio
+        lanzados.append((indice, reloj[0]))
+        return ProcesoFalso(indice, 1 if indice == 0 else 0)
+
+    def dormir(segundos):
+        reloj[0] += segundos
+
+    monkeypatch.setattr(consumidor, 'lanzar_worker', lanzar_worker)
+    monkeypatch.setattr(consumidor.time, 'sleep', dormir)
+    monkeypatch.setattr(consumidor.time, 'monotonic', lambda: reloj[0])
+    consumidor.run_pool(2)
+
+    assert [i for i, _ in lanzados].count(1) == 1
+    arranques = [t for i, t in lanzados if i == 0]
+    assert len(arranques) == consumidor.FALLOS_MAX
+    esperas = [b - a for a, b in zip(arranques, arranques[1:])]
+    assert esperas == sorted(esperas) and esperas[-1] > esperas[0]
+
+def mensajes_con_version(version, n, primero=1):
+    mensajes = []
+    for tag in range(primero, primero + n):
+        escenario = {'sim_range': [tag * 100, tag * 100 + 99], 'semilla': 5, 'modelo': version}
+        cuerpo, content_type = codificar(escenario)
+        mensajes.append(Mensaje(tag, cuerpo, content_type))
+    return mensajes
+
+def test_escenario_adelantado_se_retiene_sin_bloquear():
+    transporte = TransporteMemoria()
+    procesador = ProcesadorEscenarios(transporte, ack_cada=100, ack_ms=10 ** 9)
+    procesador.cargar_modelo(MODELOS['simple'])
+    for mensaje in mensajes_con_version(1, 2):
+        procesador.callback_escenario(mensaje)
+    nuevo = mensaje_modelo(SIN_ASES, 2)
+    for mensaje in mensajes_con_version(2, 3, primero=3):
+        procesador.callback_escenario(mensaje)
+
+    # La ventana anterior se confirmo y nada retenido se confirma ni se publica
+    assert transporte.confirmados == [2]
+    assert len(transporte.publicados) == 1
+    assert transporte.programados
+
+    # El modelo aparece en su cola: el temporizador lo carga y procesa lo retenido en orden
+    transporte.modelo = Mensaje(99, json.dumps(nuevo).encode('utf-8'), CONTENT_TYPE_JSON)
+    transporte.vencer()
+    procesador.vaciar()
+    assert procesador.version == 2
+    assert transporte.confirmados == [2, 5]
+    rangos = decodificar(*transporte.publicados[-1])['rangos']
+    assert rangos == [[300, 599]]
+
+def test_retenidos_regresan_a_la_cola_si_no_llega_el_modelo(monkeypatch):
+    import consumidor
+    reloj = [0.0]
+    monkeypatch.setattr(consumidor.time, 'monotonic', lambda: reloj[0])
+    transporte = TransporteMemoria()
+    procesador = ProcesadorEscenarios(transporte, ack_ms=10 ** 9)
+    procesador.cargar_modelo(MODELOS['simple'])
+    for mensaje in mensajes_con_version(2, 3):
+        procesador.callback_escenario(mensaje)
+
+    esperas = []
+    while transporte.programados:
+        segundos, funcion = transporte.programados.pop(0)
+        esperas.append(segundos)
+        reloj[0] += segundos
+        funcion()
+    assert transporte.devueltos == [1, 2, 3]
+    assert transporte.confirmados == [] and transporte.publicados == []
+    assert esperas == sorted(esperas) and sum(esperas) >= consumidor.ESPERA_VERSION
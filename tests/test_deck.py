@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+import pytest
+
+from deck import Baraja, probabilidades_exactas, simulate_blackjack, simulate_blackjack_batch, RESULTADOS
+
+CONFIGS = {
+    'clasica': Baraja().config,
+    'sin_ases': dict(Baraja().config, A=0),
+    'altas': dict(Baraja().config, **{'10': 12, 'J': 12, '2': 1, '3': 1}),
+    'cuatro_mazos': Baraja(VALORES_BASE=16, max_total=208).config,
+}
+N = 40000
+
+def partidas_una_por_una(config, n, rng):
+    detalle = {'partidas': []}
+    for _ in range(n):
+        simulate_blackjack(config, rng, detalle)
+    return detalle
+
+def partidas_lote(config, n, semilla):
+    detalle = {'partidas': []}
+    simulate_blackjack_batch(config, n, semilla, detalle=detalle)
+    return detalle
+
+def histograma(detalle):
+    """Frecuencias conjuntas de (resultado, puntaje final del jugador)."""
+    codigos = np.concatenate([np.asarray(c) for c, _, _ in detalle['partidas']])
+    jugador = np.concatenate([np.asarray(j) for _, j, _ in detalle['partidas']])
+    jugador = np.minimum(jugador, 22)
+    conteos = np.zeros((len(RESULTADOS), 23))
+    np.add.at(conteos, (codigos, jugador), 1)
+    return conteos
+
+def dentro(p, exacta, n, sigmas=5):
+    return abs(p - exacta) < sigmas * np.sqrt(max(exacta * (1 - exacta), 1e-12) / n)
+
+@pytest.mark.parametrize('nombre', CONFIGS)
+def test_lote_y_una_por_una_tienen_la_misma_distribucion(nombre):
+    config = CONFIGS[nombre]
+    # random.Random recorre el barajado perezoso; un Generator baraja completa la baraja chica
+    # y usa el perezoso con numpy en la de cuatro mazos
+    for rng in (random.Random(11), np.random.default_rng(11)):
+        a = histograma(partidas_una_por_una(config, N, rng))
+        b = histograma(partidas_lote(config, N, 12))
+        assert a.sum() == b.sum() == N
+        # Prueba de dos muestras por celda; las celdas raras no tienen poder y se omiten
+        pa, pb = a / N, b / N
+        comun = (a + b) / (2 * N)
+        celdas = (a + b) >= 20
+        z = np.abs(pa - pb)[celdas] / np.sqrt(2 * comun[celdas] * (1 - comun[celdas]) / N)
+        assert z.max() < 5, (nombre, type(rng).__name__)
+
+# El calculo exacto de cuatro mazos tarda demasiado para la suite; una baraja chica ejercita
+# los casos en que se acaban los valores
+EXACTAS = {nombre: CONFIGS[nombre] for nombre in ('clasica', 'sin_ases', 'altas')}
+EXACTAS['chica'] = {'A': 2, '5': 3, '6': 3, '10': 4}
+
+@pytest.mark.parametrize('nombre', EXACTAS)
+def test_probabilidades_exactas_coinciden_con_monte_carlo(nombre):
+    config = EXACTAS[nombre]
+    exactas = probabilidades_exactas(config)
+    assert sum(exactas.values()) == pytest.approx(1.0)
+    n = 200000
+    conteos = simulate_blackjack_batch(config, n, 21)
+    for resultado in RESULTADOS:
+        assert dentro(conteos[resultado] / n, exactas[resultado], n), resultado
+
+def test_probabilidades_exactas_una_por_una():
+    config = CONFIGS['altas']
+    exactas = probabilidades_exactas(config)
+    n = N
+    conteos = dict.fromkeys(RESULTADOS, 0)
+    rng = random.Random(3)
+    for _ in range(n):
+        conteos[simulate_blackjack(config, rng)] += 1
+    for resultado in RESULTADOS:
+        assert dentro(conteos[resultado] / n, exactas[resultado], n), resultado
+
+def test_baraja_sin_cartas_suficientes():
+    config = {'A': 2, 'K': 1}
+    assert probabilidades_exactas(config) == {'ERROR_NO_CARTAS': 1.0}
+    assert simulate_blackjack(config, random.Random(1)) == 'ERROR_NO_CARTAS'
+    assert simulate_blackjack_batch(config, 5, 1)['ERROR_NO_CARTAS'] == 5
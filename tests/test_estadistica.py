@@ -0,0 +1,50 @@
+from estadistica import compactar_rangos, es_duplicado, fusionar_parcial, registro_parcial
+
+def test_compactar_rangos():
+    assert compactar_rangos([[5, 6], [1, 2], [3, 4], [10, 12], [11, 11]]) == [[1, 6], [10, 12]]
+    assert compactar_rangos([]) == []
+
+def test_es_duplicado_une_intervalos_contiguos():
+    vistos = {}
+    assert not es_duplicado({'sim_range': [1, 10], 'semilla': 1}, vistos)
+    assert not es_duplicado({'sim_range': [21, 30], 'semilla': 1}, vistos)
+    assert vistos[(1, None)] == ([1, 21], [10, 30])
+    # Un hueco que toca ambos lados deja un solo intervalo
+    assert not es_duplicado({'sim_range': [11, 20], 'semilla': 1}, vistos)
+    assert vistos[(1, None)] == ([1], [30])
+    assert not es_duplicado({'sim_id': 31, 'semilla': 1}, vistos)
+    assert not es_duplicado({'sim_id': 0, 'semilla': 1}, vistos)
+    assert vistos[(1, None)] == ([0], [31])
+
+def test_es_duplicado_detecta_traslapes():
+    vistos = {}
+    assert not es_duplicado({'rangos': [[1, 10], [41, 50]], 'semilla': 1}, vistos)
+    assert es_duplicado({'sim_id': 5, 'semilla': 1}, vistos)
+    assert es_duplicado({'sim_range': [30, 41], 'semilla': 1}, vistos)
+    assert es_duplicado({'rangos': [[20, 25], [10, 12]], 'semilla': 1}, vistos)
+    # Un duplicado no registra ninguno de sus rangos
+    assert vistos[(1, None)] == ([1, 41], [10, 50])
+    assert not es_duplicado({'sim_range': [11, 40], 'semilla': 1}, vistos)
+    assert vistos[(1, None)] == ([1], [50])
+
+def test_es_duplicado_por_grupo():
+    vistos = {}
+    assert not es_duplicado({'sim_id': 1, 'semilla': 1}, vistos)
+    assert not es_duplicado({'sim_id': 1, 'semilla': 2}, vistos)
+    assert not es_duplicado({'sim_id': 1, 'semilla': 1, 'clave': 'b'}, vistos)
+    assert es_duplicado({'sim_id': 1, 'semilla': 1}, vistos)
+    # Sin semilla no hay forma de reconocer una reentrega
+    assert not es_duplicado({'sim_id': 1}, vistos)
+    assert not es_duplicado({'sim_id': 1}, vistos)
+
+def test_fusionar_parcial():
+    parcial = registro_parcial({'sim_id': 1, 'semilla': 3, 'clave': 'k'})
+    fusionar_parcial(parcial, {'sim_id': 1, 'result': 'VICTORIA', 'suma_jugador': 20})
+    fusionar_parcial(parcial, {'sim_range': [2, 5], 'counts': {'DERROTA': 3, 'EMPATE': 1}, 'pasados': 2})
+    otro = registro_parcial({'semilla': 3})
+    fusionar_parcial(otro, {'sim_range': [10, 11], 'counts': {'VICTORIA': 2}})
+    fusionar_parcial(parcial, otro)
+    assert parcial['semilla'] == 3 and parcial['clave'] == 'k'
+    assert compactar_rangos(parcial['rangos']) == [[1, 5], [10, 11]]
+    assert parcial['counts'] == {'VICTORIA': 3, 'DERROTA': 3, 'EMPATE': 1}
+    assert parcial['suma_jugador'] == 20 and parcial['pasados'] == 2
@@ -0,0 +1,28 @@
+import numpy as np
+
+from deck import Baraja, MUESTREOS, probabilidades_exactas, simulate_blackjack_batch, valores_baraja, pesos_estratos
+from deck import _barajar_lote
+
+def test_muestreos_insesgados():
+    exacto = probabilidades_exactas(Baraja().config)['VICTORIA']
+    n = 100000
+    for muestreo in MUESTREOS:
+        conteos = simulate_blackjack_batch(Baraja().config, n, 3, muestreo)
+        p = conteos['VICTORIA'] / n
+        assert abs(p - exacto) < 5 * np.sqrt(exacto * (1 - exacto) / n), muestreo
+
+def test_estratificado_respeta_los_pesos():
+    valores = valores_baraja(Baraja().config)
+    distintos, pesos = pesos_estratos(valores)
+    mazos = _barajar_lote(valores, 20000, np.random.default_rng(5), 'estratificado')
+    indices = np.searchsorted(distintos, mazos[:, :3])
+    frecuencias = np.zeros(pesos.shape)
+    np.add.at(frecuencias, tuple(indices.T), 1)
+    # Asignacion sistematica: cada estrato recibe m * peso partidas con error de a lo mas una
+    assert np.abs(frecuencias - 20000 * pesos).max() <= 1
+
+def test_cada_baraja_es_una_permutacion():
+    valores = valores_baraja(Baraja().config)
+    for muestreo in MUESTREOS:
+        mazos = _barajar_lote(valores, 500, np.random.default_rng(2), muestreo)
+        assert (np.sort(mazos, axis=1) == np.sort(valores)).all(), muestreo
@@ -0,0 +1,56 @@
+import pytest
+
+from estadistica import replicas_vacias
+from protocolo import CONTENT_TYPE_BINARIO, CONTENT_TYPE_JSON, TIPO_PARCIAL, codificar, decodificar
+
+REPLICAS = {'bloques': 2, 'n': 200, 'n2': 20000, 'x': 80, 'x2': 3250, 'xn': 8000}
+
+MENSAJES = [
+    {'sim_id': 7},
+    {'sim_id': 7, 'semilla': 2 ** 63, 'modelo': 1760000000000},
+    {'sim_range': [1, 1000], 'semilla': 5},
+    {'sim_id': 3, 'result': 'EMPATE', 'suma_jugador': 19, 'pasados': 0},
+    {'sim_range': [1, 1000], 'counts': {'VICTORIA': 400, 'DERROTA': 500, 'EMPATE': 100},
+     'suma_jugador': 19500, 'pasados': 280},
+    {'sim_range': [1, 10], 'counts': {'VICTORIA': 4, 'DERROTA': 5, 'EMPATE': 0, 'ERROR_NO_CARTAS': 1},
+     'suma_jugador': 180, 'pasados': 3, 'semilla': 9},
+    {'rangos': [[1, 100], [201, 300]], 'counts': {'VICTORIA': 80, 'DERROTA': 100, 'EMPATE': 20},
+     'suma_jugador': 3900, 'pasados': 55, 'replicas': REPLICAS, 'semilla': 4},
+    {'rangos': [], 'counts': {'VICTORIA': 0, 'DERROTA': 0, 'EMPATE': 0}, 'suma_jugador': 0, 'pasados': 0,
+     'replicas': replicas_vacias()},
+    {'lote': [{'sim_id': 1, 'result': 'VICTORIA', 'suma_jugador': 20, 'pasados': 0, 'semilla': 1},
+              {'rangos': [[5, 6]], 'counts': {'VICTORIA': 1, 'DERROTA': 1, 'EMPATE': 0},
+               'suma_jugador': 40, 'pasados': 0, 'replicas': dict(REPLICAS, bloques=1), 'semilla': 1}]},
+]
+
+@pytest.mark.parametrize('mensaje', MENSAJES)
+@pytest.mark.parametrize('formato', [CONTENT_TYPE_JSON, CONTENT_TYPE_BINARIO])
+def test_ida_y_vuelta(mensaje, formato):
+    cuerpo, content_type = codificar(mensaje, formato)
+    assert content_type == formato
+    assert decodificar(cuerpo, content_type) == mensaje
+
+def test_parcial_binario():
+    mensaje = MENSAJES[6]
+    assert 'rangos' in mensaje
+    cuerpo, content_type = codificar(mensaje, CONTENT_TYPE_BINARIO)
+    assert cuerpo[1] == TIPO_PARCIAL
+    assert len(cuerpo) < len(codificar(mensaje)[0])
+
+@pytest.mark.parametrize('mensaje', [
+    {'objetivo': 5000},
+    {'sim_id': 1, 'result': 'VICTORIA', 'clave': 'abc'},
+    {'rangos': [[1, 2]], 'counts': {'VICTORIA': 2}, 'suma_jugador': 30, 'pasados': 0,
+     'estrategias': {'basica': {'VICTORIA': 2}}},
+    {'lote': [{'sim_id': 1, 'result': 'VICTORIA'}, {'objetivo': 3}]},
+    {'sim_id': -1},
+])
+def test_sin_forma_binaria_usa_json(mensaje):
+    cuerpo, content_type = codificar(mensaje, CONTENT_TYPE_BINARIO)
+    assert content_type == CONTENT_TYPE_JSON
+    assert decodificar(cuerpo, content_type) == mensaje
+
+def test_version_desconocida():
+    cuerpo, _ = codificar({'sim_id': 1}, CONTENT_TYPE_BINARIO)
+    with pytest.raises(ValueError):
+        decodificar(b'\x09' + cuerpo[1:], CONTENT_TYPE_BINARIO)
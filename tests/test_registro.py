@@ -0,0 +1,75 @@
+import numpy as np
+
+from deck import Baraja, clave_config, simular_conteos, simular_zapato
+from estadistica import replicas_vacias, sumar_replica
+from registro import RegistrosPorConfig, agrupar_registros, leer_cabecera, leer_registro, resumir_registros
+
+def metadatos(config, muestreo='simple', zapato=None, modelo=1):
+    return {'modelo': modelo, 'clave': clave_config(config), 'config': config, 'etiqueta': None,
+            'muestreo': muestreo, 'zapato': zapato, 'estrategia': None}
+
+def escribir_bloques(registros, meta, bloques, tamano, zapato=None):
+    """Juega `bloques` escenarios de `tamano` partidas y regresa sus conteos."""
+    conteos = []
+    for b in range(bloques):
+        partidas = []
+        detalle = {'partidas': partidas}
+        if zapato:
+            c = simular_zapato(meta['config'], tamano, b, **zapato, detalle=detalle)
+        else:
+            c = simular_conteos(meta['config'], tamano, b, detalle=detalle)
+        registros.agregar(meta, 1 + b * tamano, partidas)
+        conteos.append(c)
+    registros.escribir()
+    return conteos
+
+def test_resumen_coincide_con_los_conteos(tmp_path):
+    config = Baraja().config
+    meta = metadatos(config)
+    registros = RegistrosPorConfig(str(tmp_path), 'prueba', 7)
+    conteos = escribir_bloques(registros, meta, 20, 250)
+    registros.cerrar()
+
+    rutas = [str(p) for p in tmp_path.iterdir()]
+    assert len(rutas) == 1
+    cabecera, offset = leer_cabecera(rutas[0])
+    assert cabecera['clave'] == meta['clave'] and cabecera['worker'] == 7
+    assert offset % 16 == 0
+    registros_leidos = leer_registro(rutas[0])
+    assert registros_leidos['sim_id'].tolist() == list(range(1, 5001))
+    assert registros_leidos['bloque'].sum() == 20
+
+    esperadas = replicas_vacias()
+    for c in conteos:
+        sumar_replica(esperadas, c)
+    # Un trozo de lectura que no coincide con los bloques obliga a unir bloques entre trozos
+    for trozo in (97, 250, 1 << 22):
+        resumen = resumir_registros(rutas, trozo=trozo)
+        assert resumen['total'] == 5000
+        assert resumen['counts']['VICTORIA'] == sum(c['VICTORIA'] for c in conteos)
+        assert resumen['replicas'] == esperadas
+
+def test_errores_se_registran(tmp_path):
+    config = {'A': 3}
+    meta = metadatos(config)
+    registros = RegistrosPorConfig(str(tmp_path), 'prueba', 1)
+    registros.agregar(meta, 1, [], errores=10)
+    registros.cerrar()
+    resumen = resumir_registros([str(p) for p in tmp_path.iterdir()])
+    assert resumen['counts']['ERROR_NO_CARTAS'] == 10
+
+def test_configuraciones_y_muestreos_no_se_mezclan(tmp_path):
+    clasica = Baraja().config
+    sin_ases = dict(clasica, A=0)
+    registros = RegistrosPorConfig(str(tmp_path), 'prueba', 1)
+    escribir_bloques(registros, metadatos(clasica), 2, 100)
+    escribir_bloques(registros, metadatos(sin_ases), 2, 100)
+    zapato = {'mazos': 1, 'penetracion': 1.0}
+    escribir_bloques(registros, metadatos(clasica, zapato=zapato, modelo=2), 3, 100, zapato)
+    registros.cerrar()
+
+    grupos = agrupar_registros(sorted(str(p) for p in tmp_path.iterdir()))
+    assert len(grupos) == 3
+    totales = sorted(resumir_registros(rutas)['total'] for _, rutas in grupos.values())
+    assert totales == [200, 200, 300]
+    assert np.all([len(rutas) == 1 for _, rutas in grupos.values()])
@@ -0,0 +1,81 @@
+import json
+from types import SimpleNamespace
+
+import terminal
+from deck import Baraja
+from modelo import mensaje_modelo
+
+class ConexionFalsa:
+    """BlockingConnection minima: entrega los resultados en orden y corre los call_later con un reloj falso."""
+
+    def __init__(self, modelo, resultados, reloj):
+        self.modelo, self.resultados, self.reloj = modelo, list(resultados), reloj
+        self.temporizadores = []
+        self.detenido = False
+        self.callback = None
+
+    def channel(self):
+        return self
+
+    def queue_declare(self, *args, **kwargs):
+        pass
+
+    exchange_declare = queue_bind = basic_nack = basic_ack = queue_declare
+
+    def basic_get(self, cola, auto_ack=False):
+        return SimpleNamespace(delivery_tag=1), SimpleNamespace(content_type='application/json'), self.modelo
+
+    def basic_consume(self, queue, on_message_callback, auto_ack=False):
+        self.callback = on_message_callback
+
+    def call_later(self, segundos, funcion):
+        self.temporizadores.append((self.reloj[0] + segundos, funcion))
+
+    def stop_consuming(self):
+        self.detenido = True
+
+    def start_consuming(self):
+        while not self.detenido:
+            if self.resultados:
+                cuerpo = json.dumps(self.resultados.pop(0)).encode('utf-8')
+                self.callback(self, SimpleNamespace(delivery_tag=2), SimpleNamespace(content_type='application/json'), cuerpo)
+                continue
+            if not self.temporizadores:
+                raise AssertionError('el dashboard se quedaria esperando para siempre')
+            self.temporizadores.sort(key=lambda t: t[0])
+            cuando, funcion = self.temporizadores.pop(0)
+            self.reloj[0] = max(self.reloj[0], cuando)
+            funcion()
+
+    def close(self):
+        pass
+
+def correr(monkeypatch, resultados):
+    reloj = [0.0]
+    modelo = json.dumps(mensaje_modelo(Baraja().config, 1, continuo=True)).encode('utf-8')
+    conexion = ConexionFalsa(modelo, resultados, reloj)
+    monkeypatch.setattr(terminal.pika, 'BlockingConnection', lambda parametros: conexion)
+    monkeypatch.setattr(terminal.time, 'monotonic', lambda: reloj[0])
+    terminal.run_dashboard()
+    return conexion, reloj[0]
+
+def bloque(inicio):
+    return {'sim_range': [inicio, inicio + 99], 'counts': {'VICTORIA': 40, 'DERROTA': 50, 'EMPATE': 10}}
+
+def test_objetivo_ya_alcanzado_termina(monkeypatch, capsys):
+    conexion, reloj = correr(monkeypatch, [bloque(1), bloque(101), {'objetivo': 200}])
+    assert conexion.detenido and reloj == 0.0
+    assert 'Simulaciones Totales: 200' in capsys.readouterr().out
+
+def test_productor_detenido_sin_objetivo(monkeypatch, capsys):
+    conexion, reloj = correr(monkeypatch, [bloque(1)])
+    assert conexion.detenido
+    assert reloj >= terminal.ESPERA_FIN_CONTINUO
+    assert 'fin de la corrida' in capsys.readouterr().out
+
+def test_terminado():
+    tablero = terminal.Dashboard(total=float('inf'))
+    tablero.total_processed = 300
+    assert not tablero.terminado()
+    tablero.update_stats({'objetivo': 300})
+    assert tablero.terminado()
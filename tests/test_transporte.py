@@ -0,0 +1,57 @@
+import multiprocessing.queues
+import time
+
+import pytest
+
+from modelo import COLA_MODELO
+from transporte import BrokerLocal, TransporteLocal
+
+def obtener(transporte, cola, auto_ack=True):
+    # multiprocessing.Queue entrega lo publicado con un pequeno retraso
+    for _ in range(100):
+        mensaje = transporte.obtener(cola, auto_ack)
+        if mensaje is not None:
+            return mensaje
+        time.sleep(0.01)
+    return None
+
+@pytest.fixture
+def transporte():
+    t = TransporteLocal(BrokerLocal())
+    yield t
+    t.cerrar()
+
+def test_requeue_respeta_la_longitud_maxima(transporte):
+    transporte.declarar(COLA_MODELO, **{'x-max-length': 1})
+    transporte.publicar(COLA_MODELO, b'v1')
+    viejo = obtener(transporte, COLA_MODELO, auto_ack=False)
+    assert viejo.cuerpo == b'v1'
+    transporte.publicar(COLA_MODELO, b'v2')
+    time.sleep(0.05)
+    # get + requeue del modelo viejo: no se acumula junto al nuevo
+    transporte.nack(viejo.tag, requeue=True)
+    assert transporte.profundidad(COLA_MODELO) == 1
+    assert obtener(transporte, COLA_MODELO).cuerpo == b'v2'
+    assert transporte.obtener(COLA_MODELO) is None
+
+def test_requeue_marca_reentregado(transporte):
+    transporte.publicar('escenarios', b'a')
+    mensaje = obtener(transporte, 'escenarios', auto_ack=False)
+    assert not mensaje.reentregado
+    transporte.nack(mensaje.tag, requeue=True)
+    de_nuevo = obtener(transporte, 'escenarios')
+    assert de_nuevo.cuerpo == b'a' and de_nuevo.reentregado
+
+def test_profundidad_sin_qsize(transporte, monkeypatch):
+    def sin_qsize(self):
+        raise NotImplementedError
+    # Como en macOS
+    monkeypatch.setattr(multiprocessing.queues.Queue, 'qsize', sin_qsize)
+    for i in range(5):
+        transporte.publicar('escenarios', str(i).encode())
+    assert transporte.profundidad('escenarios') == 5
+    obtener(transporte, 'escenarios')
+    assert transporte.profundidad('escenarios') == 4
+    time.sleep(0.05)
+    assert transporte.purgar('escenarios') == 4
+    assert transporte.profundidad('escenarios') == 0
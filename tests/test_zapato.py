@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+import deck
+from deck import Baraja, RESULTADOS, simular_zapato
+
+# Un solo mazo con penetracion alta deja rondas que terminan en las ultimas cartas del zapato
+
+CASOS = [(1, 1.0), (1, 0.95), (1, 0.75), (2, 1.0), (6, 0.75)]
+
+@pytest.mark.parametrize('mazos,penetracion', CASOS)
+def test_zapato_numpy_juega_todas_las_rondas(mazos, penetracion):
+    n = 50000
+    detalle = {'partidas': []}
+    conteos = simular_zapato(Baraja().config, n, 1, mazos=mazos, penetracion=penetracion, detalle=detalle)
+    assert set(conteos) == set(RESULTADOS)
+    assert sum(conteos.values()) == n
+    assert sum(len(trozo[0]) for trozo in detalle['partidas']) == n
+
+@pytest.mark.parametrize('mazos,penetracion', CASOS)
+def test_zapato_sin_numpy_juega_todas_las_rondas(monkeypatch, mazos, penetracion):
+    monkeypatch.setattr(deck, '_HAS_NUMPY', False)
+    n = 5000
+    conteos = simular_zapato(Baraja().config, n, random.Random(1), mazos=mazos, penetracion=penetracion)
+    assert sum(conteos.values()) == n
+
+def test_zapato_es_reproducible():
+    a = simular_zapato(Baraja().config, 20000, 7, mazos=1, penetracion=1.0)
+    b = simular_zapato(Baraja().config, 20000, 7, mazos=1, penetracion=1.0)
+    assert a == b
+
+def test_zapato_baraja_corta():
+    assert simular_zapato({'A': 3}, 10, 1, mazos=1) == {**dict.fromkeys(RESULTADOS, 0), 'ERROR_NO_CARTAS': 10}
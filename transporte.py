@@ -0,0 +1,355 @@
+import time
+import heapq
+import threading
+import queue as _queue
+import multiprocessing
+from collections import namedtuple
+
+try:
+    import pika
+    _HAS_PIKA = True
+except Exception:
+    pika = None
+    _HAS_PIKA = False
+
+# Interfaz minima de mensajeria usada por productor, consumidores y dashboards:
+# declarar, publicar, consumir, obtener, ack y profundidad. TransporteRabbit la implementa sobre
+# RabbitMQ (pika) y TransporteLocal sobre colas de multiprocessing en un solo equipo.
+
+# `reentregado` indica que el mensaje ya se habia entregado antes sin confirmarse
+Mensaje = namedtuple('Mensaje', ('tag', 'cuerpo', 'content_type', 'reentregado'), defaults=(False,))
+
+# Topologia que conoce el broker local: colas y exchanges fanout con sus colas ligadas
+COLAS_LOCALES = ('modelo', 'escenarios', 'resultados')
+ENLACES_LOCALES = {
+    'resultados.fanout': ('resultados',),
+    'estadisticas.fanout': (),
+    'modelo.fanout': ('modelo',),
+}
+SUSCRIPTORES_LOCALES = 16 # Colas de suscripcion por exchange en el broker local
+ESPERA_LOCAL = 0.005 # Segundos que duerme el transporte local cuando no hay mensajes
+LOTE_LOCAL = 100     # Mensajes que se entregan por consumidor en cada vuelta
+
+def conectar(broker=None, host='localhost'):
+    """Transporte local si se pasa un BrokerLocal; si no, RabbitMQ en `host`."""
+    if broker is not None:
+        return TransporteLocal(broker)
+    return TransporteRabbit(host)
+
+class TransporteRabbit:
+    """Transporte sobre una BlockingConnection de pika."""
+
+    def __init__(self, host='localhost'):
+        if not _HAS_PIKA:
+            raise RuntimeError('pika no disponible')
+        self.conexion = pika.BlockingConnection(pika.ConnectionParameters(host))
+        self.canal = self.conexion.channel()
+        self._propiedades = {}
+
+    @property
+    def abierto(self):
+        return self.canal.is_open
+
+    def declarar(self, cola, durable=True, **argumentos):
+        self.canal.queue_declare(queue=cola, durable=durable, arguments=argumentos or None)
+
+    def declarar_fanout(self, exchange, colas=()):
+        self.canal.exchange_declare(exchange=exchange, exchange_type='fanout', durable=True)
+        for cola in colas:
+            self.canal.queue_bind(exchange=exchange, queue=cola)
+
+    def suscribir(self, exchange):
+        """Cola exclusiva ligada a `exchange`; regresa su nombre."""
+        self.canal.exchange_declare(exchange=exchange, exchange_type='fanout', durable=True)
+        cola = self.canal.queue_declare(queue='', exclusive=True).method.queue
+        self.canal.queue_bind(exchange=exchange, queue=cola)
+        return cola
+
+    def _propiedades_mensaje(self, content_type, expiracion_ms):
+        # BasicProperties transitorias, construidas una sola vez por combinacion
+        clave = (content_type, expiracion_ms)
+        if clave not in self._propiedades:
+            self._propiedades[clave] = pika.BasicProperties(
+                delivery_mode=pika.DeliveryMode.Transient,
+                content_type=content_type,
+                expiration=None if expiracion_ms is None else str(expiracion_ms),
+            )
+        return self._propiedades[clave]
+
+    def publicar(self, cola, cuerpo, content_type=None, exchange='', expiracion_ms=None):
+        self.canal.basic_publish(exchange=exchange, routing_key=cola, body=cuerpo,
+                                 properties=self._propiedades_mensaje(content_type, expiracion_ms))
+
+    def obtener(self, cola, auto_ack=True):
+        method_frame, header_frame, body = self.canal.basic_get(cola, auto_ack=auto_ack)
+        if method_frame is None:
+            return None
+        return Mensaje(method_frame.delivery_tag, body, header_frame.content_type, method_frame.redelivered)
+
+    def consumir(self, cola, callback, prefetch=None, auto_ack=False):
+        """Registra `callback(mensaje)` para cada entrega de `cola`."""
+        if prefetch:
+            self.canal.basic_qos(prefetch_count=prefetch)
+
+        def on_message(ch, method, properties, body):
+            callback(Mensaje(method.delivery_tag, body, properties.content_type, method.redelivered))
+
+        self.canal.basic_consume(queue=cola, on_message_callback=on_message, auto_ack=auto_ack)
+
+    def ack(self, tag, multiple=False):
+        self.canal.basic_ack(delivery_tag=tag, multiple=multiple)
+
+    def ack_threadsafe(self, tag, multiple=False):
+        # El canal no es thread-safe: el ack se agenda en el hilo de la conexion
+        self.conexion.add_callback_threadsafe(lambda: self.ack(tag, multiple))
+
+    def nack(self, tag, multiple=False, requeue=True):
+        self.canal.basic_nack(delivery_tag=tag, multiple=multiple, requeue=requeue)
+
+    def programar(self, segundos, funcion):
+        self.conexion.call_later(segundos, funcion)
+
+    def procesar(self, segundos=0):
+        self.conexion.process_data_events(time_limit=segundos)
+
+    def iniciar(self):
+        self.canal.start_consuming()
+
+    def detener(self):
+        self.canal.stop_consuming()
+
+    def purgar(self, cola):
+        return self.canal.queue_purge(cola).method.message_count
+
+    def profundidad(self, cola):
+        """Mensajes listos para entregar en `cola` (queue_declare pasivo)."""
+        return self.canal.queue_declare(queue=cola, passive=True).method.message_count
+
+    def cerrar(self):
+        if self.conexion.is_open:
+            self.conexion.close()
+
+class BrokerLocal:
+    """Colas de multiprocessing compartidas por los procesos de una corrida en un solo equipo.
+
+    Se crea en el proceso padre y se pasa a cada proceso hijo, que construye su
+    propio TransporteLocal. La topologia es fija: las colas de COLAS_LOCALES, los
+    exchanges fanout de ENLACES_LOCALES y `suscriptores` colas de suscripcion por
+    exchange, que solo reciben mensajes despues de que un proceso las toma con suscribir().
+    Cada cola lleva un contador compartido de mensajes, porque multiprocessing.Queue.qsize()
+    no esta implementado en macOS.
+    """
+
+    def __init__(self, colas=COLAS_LOCALES, enlaces=ENLACES_LOCALES, suscriptores=SUSCRIPTORES_LOCALES):
+        self.colas = {cola: multiprocessing.Queue() for cola in colas}
+        self.enlaces = {exchange: tuple(ligadas) for exchange, ligadas in enlaces.items()}
+        self.suscripciones = {}
+        for exchange in enlaces:
+            for i in range(suscriptores):
+                self.suscripciones[f"{exchange}#{i}"] = (multiprocessing.Queue(), multiprocessing.Event())
+        self.cuentas = {nombre: multiprocessing.Value('q', 0) for nombre in list(self.colas) + list(self.suscripciones)}
+        self.candado = multiprocessing.Lock()
+
+class TransporteLocal:
+    """Transporte sobre un BrokerLocal, sin broker externo.
+
+    Un get de la cola retira el mensaje para todos los procesos, asi que las entregas
+    sin confirmar no regresan a la cola si el proceso muere; nack con requeue si las
+    regresa, marcadas como reentregadas. El prefetch se ignora y la expiracion se revisa
+    al sacar el mensaje; `x-max-length` se respeta descartando los mensajes mas viejos al publicar.
+    Las entregas sin confirmar se protegen con un candado, porque ack_threadsafe se llama
+    desde otro hilo (el de la GUI) mientras el hilo consumidor entrega mensajes.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.abierto = True
+        self._consumidores = []
+        self._sin_confirmar = {} # tag -> (nombre de la cola, item)
+        self._candado = threading.Lock()
+        self._tag = 0
+        self._temporizadores = []
+        self._secuencia = 0
+        self._detenido = False
+        self._limites = {}
+
+    def _cola(self, nombre):
+        if nombre in self.broker.colas:
+            return self.broker.colas[nombre]
+        if nombre in self.broker.suscripciones:
+            return self.broker.suscripciones[nombre][0]
+        raise ValueError(f"Cola '{nombre}' no existe en el broker local")
+
+    def declarar(self, cola, durable=True, **argumentos):
+        self._cola(cola)
+        if 'x-max-length' in argumentos:
+            self._limites[cola] = argumentos['x-max-length']
+
+    def declarar_fanout(self, exchange, colas=()):
+        ligadas = self.broker.enlaces.get(exchange)
+        if ligadas is None or not set(colas) <= set(ligadas):
+            raise ValueError(f"Enlace de '{exchange}' a {list(colas)} no existe en el broker local")
+
+    def _suscripciones(self, exchange):
+        prefijo = f"{exchange}#"
+        return [(nombre, cola, activa) for nombre, (cola, activa) in self.broker.suscripciones.items()
+                if nombre.startswith(prefijo)]
+
+    def suscribir(self, exchange):
+        """Toma una cola de suscripcion libre de `exchange`; regresa su nombre."""
+        with self.broker.candado:
+            for nombre, _cola, activa in self._suscripciones(exchange):
+                if not activa.is_set():
+                    activa.set()
+                    return nombre
+        raise RuntimeError(f"No quedan suscripciones libres para '{exchange}' en el broker local")
+
+    def _put(self, nombre, item):
+        # El contador sube antes del put para que un get concurrente no lo deje negativo
+        with self.broker.cuentas[nombre].get_lock():
+            self.broker.cuentas[nombre].value += 1
+        self._cola(nombre).put(item)
+
+    def _get(self, nombre):
+        item = self._cola(nombre).get_nowait()
+        with self.broker.cuentas[nombre].get_lock():
+            self.broker.cuentas[nombre].value -= 1
+        return item
+
+    def _poner(self, nombre, item, al_frente=False):
+        """Agrega `item` a la cola respetando su `x-max-length`.
+
+        Con `al_frente` (un nack con requeue) el mensaje cuenta como el mas viejo de una cola
+        con longitud maxima, como en RabbitMQ, que lo regresa al inicio: si ya no cabe, es el
+        que se descarta y no uno mas nuevo.
+        """
+        limite = self._limites.get(nombre)
+        if limite is None:
+            self._put(nombre, item)
+            return
+        # Cola con longitud maxima: se descartan los mensajes del inicio (los mas viejos)
+        with self.broker.candado:
+            previos = []
+            while True:
+                try:
+                    previos.append(self._get(nombre))
+                except _queue.Empty:
+                    break
+            mensajes = [item] + previos if al_frente else previos + [item]
+            for mensaje in mensajes[len(mensajes) - limite:] if limite > 0 else []:
+                self._put(nombre, mensaje)
+
+    def publicar(self, cola, cuerpo, content_type=None, exchange='', expiracion_ms=None):
+        expira = None if expiracion_ms is None else time.time() + expiracion_ms / 1000
+        item = (cuerpo, content_type, expira, False)
+        if not exchange:
+            self._cola(cola)
+            self._poner(cola, item)
+            return
+        for ligada in self.broker.enlaces[exchange]:
+            self._poner(ligada, item)
+        for nombre, _suscripcion, activa in self._suscripciones(exchange):
+            if activa.is_set():
+                self._put(nombre, item)
+
+    def _sacar(self, nombre):
+        while True:
+            try:
+                item = self._get(nombre)
+            except _queue.Empty:
+                return None
+            if item[2] is None or item[2] > time.time():
+                return item
+
+    def _entregar(self, nombre, item, auto_ack):
+        with self._candado:
+            self._tag += 1
+            tag = self._tag
+            if not auto_ack:
+                self._sin_confirmar[tag] = (nombre, item)
+        return Mensaje(tag, item[0], item[1], item[3])
+
+    def obtener(self, cola, auto_ack=True):
+        self._cola(cola)
+        item = self._sacar(cola)
+        if item is None:
+            return None
+        return self._entregar(cola, item, auto_ack)
+
+    def consumir(self, cola, callback, prefetch=None, auto_ack=False):
+        self._cola(cola)
+        self._consumidores.append((cola, callback, auto_ack))
+
+    def ack(self, tag, multiple=False):
+        with self._candado:
+            if not multiple:
+                self._sin_confirmar.pop(tag, None)
+                return
+            for pendiente in [t for t in self._sin_confirmar if t <= tag]:
+                del self._sin_confirmar[pendiente]
+
+    ack_threadsafe = ack # ack ya toma el candado
+
+    def nack(self, tag, multiple=False, requeue=True):
+        with self._candado:
+            tags = [t for t in self._sin_confirmar if t <= tag] if multiple else [tag]
+            regresar = [self._sin_confirmar.pop(pendiente, (None, None)) for pendiente in tags]
+        for nombre, item in regresar:
+            if requeue and nombre is not None:
+                self._poner(nombre, item[:3] + (True,), al_frente=True)
+
+    def programar(self, segundos, funcion):
+        self._secuencia += 1
+        heapq.heappush(self._temporizadores, (time.monotonic() + segundos, self._secuencia, funcion))
+
+    def _vencidos(self):
+        ahora = time.monotonic()
+        while self._temporizadores and self._temporizadores[0][0] <= ahora:
+            _, _, funcion = heapq.heappop(self._temporizadores)
+            funcion()
+
+    def _vuelta(self):
+        entregados = 0
+        for cola, callback, auto_ack in self._consumidores:
+            for _ in range(LOTE_LOCAL):
+                item = self._sacar(cola)
+                if item is None:
+                    break
+                callback(self._entregar(cola, item, auto_ack))
+                entregados += 1
+                if self._detenido:
+                    return entregados
+        return entregados
+
+    def procesar(self, segundos=0):
+        limite = time.monotonic() + segundos
+        while True:
+            self._vencidos()
+            entregados = self._vuelta()
+            if self._detenido or time.monotonic() >= limite:
+                return
+            if not entregados:
+                time.sleep(ESPERA_LOCAL)
+
+    def iniciar(self):
+        self._detenido = False
+        while not self._detenido:
+            self.procesar(ESPERA_LOCAL)
+
+    def detener(self):
+        self._detenido = True
+
+    def purgar(self, cola):
+        self._cola(cola)
+        purgados = 0
+        while self._sacar(cola) is not None:
+            purgados += 1
+        return purgados
+
+    def profundidad(self, cola):
+        # Del contador compartido (aproximada: incluye mensajes ya expirados)
+        self._cola(cola)
+        return max(0, self.broker.cuentas[cola].value)
+
+    def cerrar(self):
+        self.abierto = False